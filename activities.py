@@ -3,17 +3,194 @@ from flask_jwt_extended import jwt_required, get_jwt_identity
 from src.models.user import User, db
 from src.models.activity import Activity
 from src.models.machine import Machine
+from src.models.archived_activity import ArchivedActivity
+from src.utils.cache import dashboard_stats_cache
+from src.utils.events import event_hub
+from src.utils.journal import record_change, record_changes
+from src.utils.archive import find_activity
+from src.utils.ledger import sync_activity_costs
+from src.utils.search import search_terms, search_statement, count_matches
+from src.utils.serialization import ACTIVITY_FIELDS, ARCHIVED_ACTIVITY_FIELDS, requested_fields, rows_to_dicts, json_response
 from datetime import datetime
+import base64
+import json
 import random
 
 activities_bp = Blueprint('activities', __name__)
 
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+# Searches matching more activities than this are returned newest first
+# instead of by relevance, since scoring every match would dominate the
+# request and broad terms score nearly alike anyway
+MAX_RANKED_MATCHES = 2000
+
+COST_FIELDS = ('labor_cost', 'parts_cost')
+
+def parse_costs(data):
+    # Cost fields present in the request body, as non-negative floats
+    costs = {}
+    for field in COST_FIELDS:
+        if data.get(field) is None:
+            continue
+        try:
+            value = float(data[field])
+        except (TypeError, ValueError):
+            raise ValueError(f'{field} must be a number')
+        if value < 0:
+            raise ValueError(f'{field} must not be negative')
+        costs[field] = value
+    return costs
+
+def encode_cursor(timestamp, activity_id):
+    payload = json.dumps([timestamp.isoformat(), activity_id]).encode()
+    return base64.urlsafe_b64encode(payload).decode().rstrip('=')
+
+def decode_cursor(cursor):
+    padded = cursor + '=' * (-len(cursor) % 4)
+    timestamp, activity_id = json.loads(base64.urlsafe_b64decode(padded))
+    return datetime.fromisoformat(timestamp), int(activity_id)
+
+def parse_datetime_arg(name):
+    value = request.args.get(name)
+    return datetime.fromisoformat(value) if value else None
+
+def include_archived():
+    # History reads opt in to the archive with ?include_archived=true
+    return request.args.get('include_archived', 'false').lower() in ('1', 'true', 'yes')
+
+def page_statement(model, field_map, fields, limit, after, start, end):
+    # The cursor columns are always read, after the requested fields
+    statement = db.select(*(field_map[field] for field in fields), model.timestamp, model.id)
+
+    # Filters are pushed into SQL so only the requested page is read
+    if request.args.get('status'):
+        statement = statement.where(model.status == request.args['status'])
+    if request.args.get('machine_id'):
+        statement = statement.where(model.machine_id == request.args['machine_id'])
+    if request.args.get('technician'):
+        statement = statement.where(model.technician == request.args['technician'])
+    if start:
+        statement = statement.where(model.timestamp >= start)
+    if end:
+        statement = statement.where(model.timestamp < end)
+
+    # Keyset pagination on (timestamp, id): seek past the last row of the
+    # previous page instead of OFFSET, so deep pages cost the same as the first
+    if after:
+        after_timestamp, after_id = after
+        statement = statement.where(db.or_(
+            model.timestamp < after_timestamp,
+            db.and_(model.timestamp == after_timestamp, model.id < after_id)
+        ))
+
+    return statement.order_by(model.timestamp.desc(), model.id.desc()).limit(limit + 1)
+
+def missing_activity(activity_id):
+    # Writes only touch live activities; archived ones are history
+    if db.session.get(ArchivedActivity, activity_id) is not None:
+        return jsonify({'error': 'Archived activities are read-only'}), 409
+    return jsonify({'error': 'Activity not found'}), 404
+
 @activities_bp.route('/', methods=['GET'])
 @jwt_required()
 def get_activities():
     try:
-        activities = Activity.query.order_by(Activity.timestamp.desc()).all()
-        return jsonify([activity.to_dict() for activity in activities]), 200
+        try:
+            limit = min(max(int(request.args.get('limit', DEFAULT_PAGE_SIZE)), 1), MAX_PAGE_SIZE)
+            cursor = request.args.get('cursor')
+            after = decode_cursor(cursor) if cursor else None
+            start = parse_datetime_arg('start')
+            end = parse_datetime_arg('end')
+            fields = requested_fields(ACTIVITY_FIELDS)
+        except (ValueError, TypeError) as e:
+            return jsonify({'error': f'Invalid query parameters: {e}'}), 400
+
+        statement = page_statement(Activity, ACTIVITY_FIELDS, fields, limit, after, start, end)
+        if include_archived():
+            # Each table reads its own newest limit + 1 rows through its
+            # (timestamp, id) index; the page is the newest of the union
+            archived = page_statement(ArchivedActivity, ARCHIVED_ACTIVITY_FIELDS, fields, limit, after, start, end)
+            merged = db.union_all(db.select(statement.subquery()), db.select(archived.subquery())).subquery()
+            timestamp_column, id_column = list(merged.c)[-2:]
+            statement = db.select(merged).order_by(timestamp_column.desc(), id_column.desc()).limit(limit + 1)
+
+        rows = db.session.execute(statement).all()
+
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = encode_cursor(rows[-1][-2], rows[-1][-1])
+
+        return json_response({
+            'activities': rows_to_dicts(fields, rows),
+            'next_cursor': next_cursor,
+            'limit': limit
+        })
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@activities_bp.route('/search', methods=['GET'])
+@jwt_required()
+def search_activities():
+    try:
+        try:
+            terms = search_terms(request.args.get('q', ''))
+            if not terms:
+                raise ValueError('q is required')
+            limit = min(max(int(request.args.get('limit', DEFAULT_PAGE_SIZE)), 1), MAX_PAGE_SIZE)
+            offset = max(int(request.args.get('offset', 0)), 0)
+            fields = requested_fields(ACTIVITY_FIELDS)
+        except (ValueError, TypeError) as e:
+            return jsonify({'error': f'Invalid query parameters: {e}'}), 400
+
+        sources = [(Activity, ACTIVITY_FIELDS)]
+        if include_archived():
+            sources.append((ArchivedActivity, ARCHIVED_ACTIVITY_FIELDS))
+
+        # Matching and ranking happen in the text index (FTS5 or tsvector);
+        # only the requested page of rows is read back
+        total = 0
+        matches = []
+        for model, field_map in sources:
+            statement, rank, rowid = search_statement(model, [field_map[field] for field in fields], terms)
+            filters = []
+            if request.args.get('status'):
+                filters.append(model.status == request.args['status'])
+            if request.args.get('machine_id'):
+                filters.append(model.machine_id == request.args['machine_id'])
+
+            if filters:
+                statement = statement.where(*filters)
+                total += db.session.scalar(db.select(db.func.count()).select_from(statement.subquery()))
+            else:
+                total += count_matches(model, terms)
+            matches.append((statement, rank, rowid))
+
+        ranked = total <= MAX_RANKED_MATCHES
+        if len(matches) == 1:
+            statement, rank, rowid = matches[0]
+            statement = statement.order_by(*((rank, rowid.desc()) if ranked else (rowid.desc(),)))
+        else:
+            # Each table contributes its first offset + limit matches in page
+            # order; the page is cut from the merged set
+            merged = db.union_all(*(
+                db.select(statement.add_columns(rank.label('search_rank'), rowid.label('search_rowid'))
+                          .order_by(*((rank, rowid.desc()) if ranked else (rowid.desc(),)))
+                          .limit(offset + limit).subquery())
+                for statement, rank, rowid in matches
+            )).subquery()
+            *columns, rank, rowid = merged.c
+            statement = db.select(*columns).order_by(*((rank, rowid.desc()) if ranked else (rowid.desc(),)))
+        rows = db.session.execute(statement.offset(offset).limit(limit)).all()
+
+        return json_response({
+            'activities': rows_to_dicts(fields, rows),
+            'total': total,
+            'next_offset': offset + limit if offset + limit < total else None,
+            'limit': limit
+        })
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -29,6 +206,11 @@ def create_activity():
         if not description or not technician:
             return jsonify({'error': 'Description and technician are required'}), 400
 
+        try:
+            costs = parse_costs(data)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+
         # Validate machine_id if provided
         if machine_id and not Machine.query.get(machine_id):
             return jsonify({'error': 'Machine not found'}), 404
@@ -37,11 +219,19 @@ def create_activity():
             description=description,
             technician=technician,
             status=data.get('status', 'pending'),
-            machine_id=machine_id
+            machine_id=machine_id,
+            **costs
         )
+        if activity.status == 'completed':
+            activity.timestamp = activity.completed_at = datetime.utcnow()
 
         db.session.add(activity)
+        db.session.flush()
+        sync_activity_costs([activity])
+        record_change('activity', 'created', activity.id, activity.to_dict())
         db.session.commit()
+        dashboard_stats_cache.invalidate()
+        event_hub.publish('activity.created', activity.to_dict())
 
         return jsonify(activity.to_dict()), 201
 
@@ -53,7 +243,10 @@ def create_activity():
 @jwt_required()
 def get_activity(activity_id):
     try:
-        activity = Activity.query.get_or_404(activity_id)
+        # Falls through to the archive, so old links keep working
+        activity = find_activity(activity_id)
+        if activity is None:
+            return jsonify({'error': 'Activity not found'}), 404
         return jsonify(activity.to_dict()), 200
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -62,9 +255,18 @@ def get_activity(activity_id):
 @jwt_required()
 def update_activity(activity_id):
     try:
-        activity = Activity.query.get_or_404(activity_id)
+        activity = db.session.get(Activity, activity_id)
+        if activity is None:
+            return missing_activity(activity_id)
         data = request.get_json()
 
+        try:
+            costs = parse_costs(data)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        for field, value in costs.items():
+            setattr(activity, field, value)
+
         activity.description = data.get('description', activity.description)
         activity.technician = data.get('technician', activity.technician)
         activity.status = data.get('status', activity.status)
@@ -74,7 +276,11 @@ def update_activity(activity_id):
         if data.get('status') == 'completed' and not activity.completed_at:
             activity.completed_at = datetime.utcnow()
 
+        sync_activity_costs([activity])
+        record_change('activity', 'updated', activity.id, activity.to_dict())
         db.session.commit()
+        dashboard_stats_cache.invalidate()
+        event_hub.publish('activity.updated', activity.to_dict())
         return jsonify(activity.to_dict()), 200
 
     except Exception as e:
@@ -85,9 +291,15 @@ def update_activity(activity_id):
 @jwt_required()
 def delete_activity(activity_id):
     try:
-        activity = Activity.query.get_or_404(activity_id)
+        activity = db.session.get(Activity, activity_id)
+        if activity is None:
+            return missing_activity(activity_id)
         db.session.delete(activity)
+        sync_activity_costs([], deleted_ids=[activity_id])
+        record_change('activity', 'deleted', activity_id)
         db.session.commit()
+        dashboard_stats_cache.invalidate()
+        event_hub.publish('activity.deleted', {'id': activity_id})
         return jsonify({'message': 'Activity deleted successfully'}), 200
 
     except Exception as e:
@@ -136,6 +348,7 @@ def generate_sample_activities():
         ]
 
         created_activities = []
+        new_activities = []
         for activity_data in sample_activities:
             activity = Activity(
                 description=activity_data['description'],
@@ -144,14 +357,21 @@ def generate_sample_activities():
                 machine_id=activity_data['machine_id']
             )
             
-            # Set completed_at for completed activities
+            # Set completed_at and costs for completed activities
             if activity_data['status'] == 'completed':
                 activity.completed_at = datetime.utcnow()
+                activity.labor_cost = float(random.randint(100, 1500))
+                activity.parts_cost = float(random.randint(0, 3000))
             
             db.session.add(activity)
+            new_activities.append(activity)
             created_activities.append(activity_data['description'])
 
+        db.session.flush()
+        sync_activity_costs(new_activities)
+        record_changes('activity', 'created', [(activity.id, activity.to_dict()) for activity in new_activities])
         db.session.commit()
+        dashboard_stats_cache.invalidate()
         return jsonify({
             'message': f'Created {len(created_activities)} sample activities',
             'activities': created_activities
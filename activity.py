@@ -2,13 +2,24 @@ from src.models.user import db
 from datetime import datetime
 
 class Activity(db.Model):
+    __table_args__ = (
+        # Newest-first pages and the recent-activity window, overall and per machine
+        db.Index('ix_activity_timestamp_id', 'timestamp', 'id'),
+        db.Index('ix_activity_machine_id_timestamp', 'machine_id', 'timestamp'),
+        # Ids are never reused once deleted or archived; without this SQLite
+        # hands out max(id) + 1, which can be an archived activity's id
+        {'sqlite_autoincrement': True}
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     description = db.Column(db.String(255), nullable=False)
     technician = db.Column(db.String(100), nullable=False)
     status = db.Column(db.String(20), default='pending')  # pending, in-progress, completed, active
     machine_id = db.Column(db.String(50), db.ForeignKey('machine.id'), nullable=True)
     timestamp = db.Column(db.DateTime, default=datetime.utcnow)
-    completed_at = db.Column(db.DateTime, nullable=True)
+    completed_at = db.Column(db.DateTime, nullable=True, index=True)
+    labor_cost = db.Column(db.Float, default=0.0)
+    parts_cost = db.Column(db.Float, default=0.0)
 
     # Relationship
     machine = db.relationship('Machine', backref=db.backref('activities', lazy=True))
@@ -24,6 +35,8 @@ class Activity(db.Model):
             'status': self.status,
             'machine_id': self.machine_id,
             'timestamp': self.timestamp.isoformat() if self.timestamp else None,
-            'completed_at': self.completed_at.isoformat() if self.completed_at else None
+            'completed_at': self.completed_at.isoformat() if self.completed_at else None,
+            'labor_cost': self.labor_cost,
+            'parts_cost': self.parts_cost
         }
 
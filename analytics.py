@@ -1,80 +1,142 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, current_app
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from src.models.user import User, db
 from src.models.machine import Machine
 from src.models.activity import Activity
 from src.models.predictive_data import PredictiveData
-import random
+from src.models.monthly_cost import MonthlyCost
+from src.utils.cache import dashboard_stats_cache
+from src.utils.async_db import async_db
+from src.utils.etag import conditional, conditional_async, request_etag, not_modified, tag
+from src.utils.serialization import json_response
+from src.utils.recompute import predictive_recomputer, is_stale
+from src.utils.scheduler import maintenance_scheduler
+from src.utils.ledger import ALL_MACHINES, period_of
+import asyncio
+import time
 from datetime import datetime, timedelta
 
 analytics_bp = Blueprint('analytics', __name__)
 
+DEFAULT_SCHEDULE_PAGE_SIZE = 100
+MAX_SCHEDULE_PAGE_SIZE = 1000
+
+# Months of cost history returned when no start is given
+DEFAULT_COST_PERIOD_MONTHS = 12
+
+def parse_period_range():
+    # ?start=YYYY-MM&end=YYYY-MM, both inclusive; defaults to the last
+    # twelve months up to the current one
+    end = request.args.get('end') or period_of(datetime.utcnow())
+    try:
+        end_month = datetime.strptime(end, '%Y-%m')
+        if request.args.get('start'):
+            start = period_of(datetime.strptime(request.args['start'], '%Y-%m'))
+        else:
+            months = end_month.year * 12 + end_month.month - DEFAULT_COST_PERIOD_MONTHS
+            start = f'{months // 12:04d}-{months % 12 + 1:02d}'
+    except ValueError:
+        raise ValueError('start and end must be months formatted YYYY-MM')
+    end = period_of(end_month)
+    if start > end:
+        raise ValueError('start must not be after end')
+    return start, end
+
+def machines_with_predictive_data_statement():
+    # Each machine with its predictive row (machine_id is unique), joined in
+    # a single query instead of one PredictiveData lookup per machine
+    return db.select(Machine, PredictiveData) \
+        .outerjoin(PredictiveData, PredictiveData.machine_id == Machine.id) \
+        .order_by(Machine.id)
+
+def query_machines_with_predictive_data():
+    return db.session.execute(machines_with_predictive_data_statement()).all()
+
+def load_machines_with_predictive_data():
+    rows = query_machines_with_predictive_data()
+
+    # Machines without predictive data are scored as one batch and inserted
+    # with one executemany INSERT, then the join is re-read so the query
+    # count stays fixed
+    missing = [machine.id for machine, predictive_data in rows if predictive_data is None]
+    if missing:
+        # Scoring pulls in numpy, so it is imported on first use only
+        from src.utils.scoring import score_machines
+        score_machines(missing)
+        rows = query_machines_with_predictive_data()
+
+    return rows, missing
+
+def predictive_response(rows):
+    # Serve the last computed scores straight away; anything missing or
+    # older than its machine's inputs is handed to the background
+    # recomputer instead of being scored inside this request
+    max_age = timedelta(seconds=current_app.config['PREDICTIVE_MAX_AGE'])
+    predictive_results = []
+    stale_ids = []
+    for machine, predictive_data in rows:
+        stale = is_stale(machine, predictive_data, max_age)
+        if stale:
+            stale_ids.append(machine.id)
+        predictive_results.append({
+            'machine': machine.to_dict(),
+            'predictive_data': predictive_data.to_dict() if predictive_data else None,
+            'stale': stale
+        })
+
+    predictive_recomputer.request_refresh(stale_ids)
+    return json_response(predictive_results)
+
 @analytics_bp.route('/predictive', methods=['GET'])
 @jwt_required()
+@conditional(Machine, PredictiveData)
 def get_predictive_analytics():
     try:
-        # Get all machines and their predictive data
-        machines = Machine.query.all()
-        
-        # Generate or get predictive data for each machine
-        predictive_results = []
-        for machine in machines:
-            predictive_data = PredictiveData.query.filter_by(machine_id=machine.id).first()
-            
-            if not predictive_data:
-                # Generate new predictive data
-                predictive_data = PredictiveData(
-                    machine_id=machine.id,
-                    failure_probability=random.uniform(0.05, 0.35),
-                    recommended_maintenance=random.randint(7, 45),
-                    cost_savings=random.randint(1000, 15000)
-                )
-                db.session.add(predictive_data)
-            
-            predictive_results.append({
-                'machine': machine.to_dict(),
-                'predictive_data': predictive_data.to_dict()
-            })
-        
-        db.session.commit()
-        return jsonify(predictive_results), 200
+        return predictive_response(query_machines_with_predictive_data())
 
     except Exception as e:
-        db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
+def dashboard_stats_statement():
+    # Every figure comes from one statement: conditional counts and AVG over
+    # machine, plus scalar subqueries for recent activities and cost savings
+    recent_activities = db.select(db.func.count(Activity.id)).where(
+        Activity.timestamp >= datetime.utcnow() - timedelta(days=7)
+    ).scalar_subquery()
+    total_cost_savings = db.select(db.func.sum(PredictiveData.cost_savings)).scalar_subquery()
+
+    def count_status(status):
+        return db.func.count(db.case((Machine.status == status, 1)))
+
+    return db.select(
+        db.func.count(Machine.id),
+        count_status('operational'),
+        count_status('warning'),
+        count_status('maintenance'),
+        db.func.avg(Machine.efficiency),
+        recent_activities,
+        total_cost_savings
+    )
+
+def dashboard_stats(row):
+    return {
+        'total_machines': row[0],
+        'operational_machines': row[1],
+        'warning_machines': row[2],
+        'maintenance_machines': row[3],
+        'avg_efficiency': round(row[4] or 0, 1),
+        'recent_activities': row[5],
+        'total_cost_savings': round(row[6] or 0, 2)
+    }
+
+def compute_dashboard_stats():
+    return dashboard_stats(db.session.execute(dashboard_stats_statement()).one())
+
 @analytics_bp.route('/dashboard-stats', methods=['GET'])
 @jwt_required()
 def get_dashboard_stats():
     try:
-        # Get basic statistics for dashboard
-        total_machines = Machine.query.count()
-        operational_machines = Machine.query.filter_by(status='operational').count()
-        warning_machines = Machine.query.filter_by(status='warning').count()
-        maintenance_machines = Machine.query.filter_by(status='maintenance').count()
-        
-        # Calculate average efficiency
-        machines = Machine.query.all()
-        avg_efficiency = sum(machine.efficiency for machine in machines) / len(machines) if machines else 0
-        
-        # Get recent activities count
-        recent_activities = Activity.query.filter(
-            Activity.timestamp >= datetime.utcnow() - timedelta(days=7)
-        ).count()
-        
-        # Calculate total cost savings from predictive data
-        total_cost_savings = db.session.query(db.func.sum(PredictiveData.cost_savings)).scalar() or 0
-
-        stats = {
-            'total_machines': total_machines,
-            'operational_machines': operational_machines,
-            'warning_machines': warning_machines,
-            'maintenance_machines': maintenance_machines,
-            'avg_efficiency': round(avg_efficiency, 1),
-            'recent_activities': recent_activities,
-            'total_cost_savings': round(total_cost_savings, 2)
-        }
-
+        stats = dashboard_stats_cache.get(compute_dashboard_stats, current_app.config['DASHBOARD_STATS_TTL'])
         return jsonify(stats), 200
 
     except Exception as e:
@@ -84,74 +146,147 @@ def get_dashboard_stats():
 @jwt_required()
 def get_maintenance_schedule():
     try:
-        machines = Machine.query.all()
-        schedule = []
-        
-        for machine in machines:
-            # Calculate urgency based on machine status and efficiency
-            if machine.status == 'maintenance':
-                urgency = 'high'
-                recommended_days = random.randint(1, 7)
-            elif machine.status == 'warning' or machine.efficiency < 80:
-                urgency = 'medium'
-                recommended_days = random.randint(7, 21)
-            else:
-                urgency = 'low'
-                recommended_days = random.randint(21, 60)
-            
-            estimated_cost = random.randint(500, 5000)
-            
-            schedule.append({
-                'machineId': machine.id,
-                'machineName': machine.name,
-                'urgency': urgency,
-                'recommendedDays': recommended_days,
-                'estimatedCost': estimated_cost,
-                'currentStatus': machine.status
-            })
-        
-        # Sort by urgency (high first)
-        urgency_order = {'high': 0, 'medium': 1, 'low': 2}
-        schedule.sort(key=lambda x: urgency_order[x['urgency']])
-        
-        return jsonify(schedule), 200
+        try:
+            offset = max(int(request.args.get('offset', 0)), 0)
+            limit = min(max(int(request.args.get('limit', DEFAULT_SCHEDULE_PAGE_SIZE)), 1), MAX_SCHEDULE_PAGE_SIZE)
+        except ValueError:
+            return jsonify({'error': 'offset and limit must be integers'}), 400
+
+        # Tagged with the version the plan is synced to, rather than a fresh
+        # read of the tables, so an unchanged plan answers 304 before any page
+        # is ranked or assigned
+        etag = request_etag(maintenance_scheduler.version())
+        response = not_modified(etag)
+        if response is not None:
+            return response
+
+        # Jobs in priority order with their planned day and technician; only
+        # the requested page is ranked and assigned
+        schedule, total = maintenance_scheduler.page(offset, limit)
+        next_offset = offset + len(schedule)
+
+        return tag(json_response({
+            'schedule': schedule,
+            'total': total,
+            'next_offset': next_offset if next_offset < total else None,
+            'limit': limit
+        }), etag)
 
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+def requested_machine_ids():
+    return [
+        machine_id.strip()
+        for value in request.args.getlist('machine_id')
+        for machine_id in value.split(',') if machine_id.strip()
+    ]
+
+def cost_analysis_statements(start, end, machine_ids):
+    # One grouped query over the monthly totals the ledger maintains:
+    # per-machine rows when filtering, the fleet-wide rows otherwise
+    monthly = db.select(
+        MonthlyCost.period,
+        db.func.sum(MonthlyCost.labor_cost),
+        db.func.sum(MonthlyCost.parts_cost),
+        db.func.sum(MonthlyCost.total_cost),
+        db.func.sum(MonthlyCost.activity_count)
+    ) \
+        .where(
+            MonthlyCost.machine_id.in_(machine_ids or [ALL_MACHINES]),
+            MonthlyCost.period >= start,
+            MonthlyCost.period <= end
+        ) \
+        .group_by(MonthlyCost.period) \
+        .order_by(MonthlyCost.period)
+
+    # Expected savings from the current predictive score of each machine
+    savings = db.select(db.func.sum(PredictiveData.cost_savings))
+    if machine_ids:
+        savings = savings.where(PredictiveData.machine_id.in_(machine_ids))
+    return monthly, savings
+
+def cost_analysis(rows, total_savings, start, end, machine_ids):
+    monthly = [{
+        'period': period,
+        'labor_cost': round(labor_cost or 0, 2),
+        'parts_cost': round(parts_cost or 0, 2),
+        'total_cost': round(total_cost or 0, 2),
+        'completed_activities': int(activity_count or 0)
+    } for period, labor_cost, parts_cost, total_cost, activity_count in rows]
+    total_maintenance_cost = sum(month['total_cost'] for month in monthly)
+    total_savings = total_savings or 0
+
+    return {
+        'total_maintenance_cost': round(total_maintenance_cost, 2),
+        'potential_savings': round(total_savings, 2),
+        'cost_reduction_percentage': round((total_savings / total_maintenance_cost) * 100, 1) if total_maintenance_cost > 0 else 0,
+        'monthly_savings': round(total_savings / 12, 2),
+        'labor_cost': round(sum(month['labor_cost'] for month in monthly), 2),
+        'parts_cost': round(sum(month['parts_cost'] for month in monthly), 2),
+        'completed_activities': sum(month['completed_activities'] for month in monthly),
+        'start': start,
+        'end': end,
+        'machine_ids': machine_ids,
+        'monthly': monthly
+    }
+
 @analytics_bp.route('/cost-analysis', methods=['GET'])
 @jwt_required()
 def get_cost_analysis():
     try:
-        # Get cost analysis data
-        machines = Machine.query.all()
-        total_maintenance_cost = 0
-        total_savings = 0
-        
-        for machine in machines:
-            # Simulate maintenance costs based on machine status
-            if machine.status == 'maintenance':
-                maintenance_cost = random.randint(2000, 8000)
-            elif machine.status == 'warning':
-                maintenance_cost = random.randint(1000, 4000)
-            else:
-                maintenance_cost = random.randint(200, 1000)
-            
-            total_maintenance_cost += maintenance_cost
-            
-            # Calculate potential savings from predictive maintenance
-            potential_savings = maintenance_cost * random.uniform(0.2, 0.6)
-            total_savings += potential_savings
-        
-        analysis = {
-            'total_maintenance_cost': round(total_maintenance_cost, 2),
-            'potential_savings': round(total_savings, 2),
-            'cost_reduction_percentage': round((total_savings / total_maintenance_cost) * 100, 1) if total_maintenance_cost > 0 else 0,
-            'monthly_savings': round(total_savings / 12, 2)
-        }
-        
-        return jsonify(analysis), 200
+        try:
+            start, end = parse_period_range()
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        machine_ids = requested_machine_ids()
+
+        monthly, savings = cost_analysis_statements(start, end, machine_ids)
+        rows = db.session.execute(monthly).all()
+        total_savings = db.session.scalar(savings)
+
+        return jsonify(cost_analysis(rows, total_savings, start, end, machine_ids)), 200
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@analytics_bp.route('/recompute', methods=['POST'])
+@jwt_required()
+def recompute_predictive_data():
+    try:
+        from src.utils.scoring import score_machines, get_model
+
+        started = time.perf_counter()
+        model = get_model(request.args.get('model'))
+        scored = score_machines(model=model)
+        db.session.commit()
+        dashboard_stats_cache.invalidate()
+
+        return jsonify({
+            'message': f'Scored {scored} machines',
+            'model': model.version,
+            'elapsed_ms': round((time.perf_counter() - started) * 1000, 2)
+        }), 200
+
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+@analytics_bp.route('/recompute/status', methods=['GET'])
+@jwt_required()
+def get_recompute_status():
+    try:
+        return jsonify(predictive_recomputer.metrics()), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
 
+@analytics_bp.route('/maintenance-schedule/status', methods=['GET'])
+@jwt_required()
+def get_maintenance_schedule_status():
+    try:
+        return jsonify(maintenance_scheduler.metrics()), 200
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -159,29 +294,79 @@ def get_cost_analysis():
 @jwt_required()
 def generate_sample_predictive_data():
     try:
-        machines = Machine.query.all()
-        created_data = []
-        
-        for machine in machines:
-            # Check if predictive data already exists
-            existing_data = PredictiveData.query.filter_by(machine_id=machine.id).first()
-            if not existing_data:
-                predictive_data = PredictiveData(
-                    machine_id=machine.id,
-                    failure_probability=random.uniform(0.05, 0.35),
-                    recommended_maintenance=random.randint(7, 45),
-                    cost_savings=random.randint(1000, 15000)
-                )
-                db.session.add(predictive_data)
-                created_data.append(machine.id)
-        
+        rows, missing = load_machines_with_predictive_data()
         db.session.commit()
+        dashboard_stats_cache.invalidate()
         return jsonify({
-            'message': f'Created predictive data for {len(created_data)} machines',
-            'machines': created_data
+            'message': f'Created predictive data for {len(missing)} machines',
+            'machines': missing
         }), 201
 
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
+# Coroutine versions of the database-bound GET views, for the ASGI entry
+# point (src/asgi.py). It verifies the token and runs them on the event
+# loop, so a worker keeps serving while they wait on the database; under
+# WSGI, and for every other endpoint, the sync views above answer as before.
+# Keyed by the sync view's endpoint, whose URL rule they share
+async_views = {}
+
+def async_view(view):
+    def decorator(coroutine):
+        async_views[f'{analytics_bp.name}.{view.__name__}'] = coroutine
+        return coroutine
+    return decorator
+
+# Rows read per round trip to the event loop while streaming a large result
+ASYNC_PARTITION_SIZE = 1000
+
+@async_view(get_predictive_analytics)
+@conditional_async(Machine, PredictiveData)
+async def get_predictive_analytics_async():
+    try:
+        rows = []
+        async with async_db.session() as session:
+            result = await session.stream(machines_with_predictive_data_statement())
+            async for partition in result.partitions(ASYNC_PARTITION_SIZE):
+                rows.extend(partition)
+
+        # Building and compressing the body is CPU work, done in a thread so
+        # the loop keeps serving meanwhile
+        return await asyncio.to_thread(predictive_response, rows)
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@async_view(get_dashboard_stats)
+async def get_dashboard_stats_async():
+    try:
+        async def compute():
+            async with async_db.session() as session:
+                return dashboard_stats((await session.execute(dashboard_stats_statement())).one())
+
+        stats = await dashboard_stats_cache.get_async(compute, current_app.config['DASHBOARD_STATS_TTL'])
+        return jsonify(stats), 200
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@async_view(get_cost_analysis)
+async def get_cost_analysis_async():
+    try:
+        try:
+            start, end = parse_period_range()
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        machine_ids = requested_machine_ids()
+
+        monthly, savings = cost_analysis_statements(start, end, machine_ids)
+        async with async_db.session() as session:
+            rows = (await session.execute(monthly)).all()
+            total_savings = await session.scalar(savings)
+
+        return jsonify(cost_analysis(rows, total_savings, start, end, machine_ids)), 200
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
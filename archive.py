@@ -0,0 +1,60 @@
+from src.models.user import db
+from src.models.activity import Activity
+from src.models.archived_activity import ArchivedActivity
+from datetime import datetime
+import time
+
+ARCHIVED_COLUMNS = ('id', 'description', 'technician', 'status', 'machine_id', 'timestamp',
+                    'completed_at', 'labor_cost', 'parts_cost')
+
+def archive_batch(cutoff, batch_size):
+    # Moves up to batch_size activities completed before cutoff into the
+    # archive in one short transaction, oldest first. Rows another
+    # transaction has locked are skipped rather than waited for.
+    #
+    # The cost ledger keeps their entries, so monthly totals don't change;
+    # the search index drops them through its delete trigger. Archiving is
+    # not a user-visible delete, so nothing is journaled or published
+    eligible = (Activity.status == 'completed', Activity.completed_at < cutoff)
+    ids = list(db.session.scalars(
+        db.select(Activity.id)
+        .where(*eligible)
+        .order_by(Activity.completed_at, Activity.id)
+        .limit(batch_size)
+        .with_for_update(skip_locked=True)
+    ))
+    if not ids:
+        db.session.rollback()
+        return 0
+
+    now = db.literal(datetime.utcnow(), db.DateTime)
+    db.session.execute(db.insert(ArchivedActivity).from_select(
+        [*ARCHIVED_COLUMNS, 'archived_at'],
+        db.select(*(getattr(Activity, column) for column in ARCHIVED_COLUMNS), now)
+        .where(Activity.id.in_(ids), *eligible)
+    ))
+    moved = db.session.execute(db.delete(Activity).where(Activity.id.in_(ids), *eligible)).rowcount
+    db.session.commit()
+    return moved
+
+def archive_activities(older_than, batch_size, pause, max_batches=0, log=None):
+    # Runs batches until nothing old enough is left (or max_batches ran),
+    # sleeping pause seconds between them so the archiver never holds
+    # locks for long and leaves room for production writes
+    cutoff = datetime.utcnow() - older_than
+    total = batches = 0
+    while not max_batches or batches < max_batches:
+        moved = archive_batch(cutoff, batch_size)
+        total += moved
+        batches += 1
+        if log:
+            log(moved, total)
+        if moved < batch_size:
+            break
+        time.sleep(pause)
+    return total
+
+def find_activity(activity_id):
+    # The live activity, else its archived copy (whose to_dict() carries
+    # archived_at), else None
+    return db.session.get(Activity, activity_id) or db.session.get(ArchivedActivity, activity_id)
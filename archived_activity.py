@@ -0,0 +1,39 @@
+from src.models.user import db
+from datetime import datetime
+
+class ArchivedActivity(db.Model):
+    # Completed activities moved out of the activity table by the archival
+    # job. Rows keep their original id and are never updated. No foreign key
+    # to machine, so history outlives deleted machines
+    __table_args__ = (
+        db.Index('ix_archived_activity_timestamp_id', 'timestamp', 'id'),
+        db.Index('ix_archived_activity_machine_id_timestamp', 'machine_id', 'timestamp'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    description = db.Column(db.String(255), nullable=False)
+    technician = db.Column(db.String(100), nullable=False)
+    status = db.Column(db.String(20), default='completed')
+    machine_id = db.Column(db.String(50), nullable=True)
+    timestamp = db.Column(db.DateTime)
+    completed_at = db.Column(db.DateTime)
+    labor_cost = db.Column(db.Float, default=0.0)
+    parts_cost = db.Column(db.Float, default=0.0)
+    archived_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f'<ArchivedActivity {self.id}: {self.description}>'
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'description': self.description,
+            'technician': self.technician,
+            'status': self.status,
+            'machine_id': self.machine_id,
+            'timestamp': self.timestamp.isoformat() if self.timestamp else None,
+            'completed_at': self.completed_at.isoformat() if self.completed_at else None,
+            'labor_cost': self.labor_cost,
+            'parts_cost': self.parts_cost,
+            'archived_at': self.archived_at.isoformat() if self.archived_at else None
+        }
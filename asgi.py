@@ -0,0 +1,173 @@
+from concurrent.futures import ThreadPoolExecutor
+from flask_jwt_extended import verify_jwt_in_request
+from werkzeug.exceptions import HTTPException
+from src.main import app as flask_app
+from src.routes.analytics import async_views
+from src.utils.async_db import async_db
+import asyncio
+import io
+import sys
+import threading
+
+# ASGI entry point (uvicorn src.asgi:app). GET requests for the analytics
+# endpoints in async_views run as coroutines on the worker's event loop, so
+# requests waiting on the database don't each hold a thread. Everything
+# else runs the unchanged Flask app on a pool of ASGI_THREADS threads, the
+# way a threaded WSGI worker would
+
+def wsgi_environ(scope, body=b''):
+    # The WSGI environ Flask builds its request from
+    root_path = scope.get('root_path', '')
+    path = scope['path']
+    if path.startswith(root_path):
+        path = path[len(root_path):]
+    environ = {
+        'REQUEST_METHOD': scope['method'],
+        'SCRIPT_NAME': root_path.encode('utf8').decode('latin1'),
+        'PATH_INFO': path.encode('utf8').decode('latin1'),
+        'QUERY_STRING': scope['query_string'].decode('ascii'),
+        'SERVER_PROTOCOL': f"HTTP/{scope['http_version']}",
+        'SERVER_NAME': 'localhost',
+        'SERVER_PORT': '80',
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': scope.get('scheme', 'http'),
+        'wsgi.input': io.BytesIO(body),
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': True,
+        'wsgi.run_once': False
+    }
+    if scope.get('server'):
+        environ['SERVER_NAME'], environ['SERVER_PORT'] = scope['server'][0], str(scope['server'][1])
+    if scope.get('client'):
+        environ['REMOTE_ADDR'], environ['REMOTE_PORT'] = scope['client'][0], str(scope['client'][1])
+    for name, value in scope['headers']:
+        name = name.decode('latin1').upper().replace('-', '_')
+        key = name if name in ('CONTENT_TYPE', 'CONTENT_LENGTH') else f'HTTP_{name}'
+        value = value.decode('latin1')
+        environ[key] = f'{environ[key]},{value}' if key in environ else value
+    return environ
+
+def response_start(status, headers):
+    return {
+        'type': 'http.response.start',
+        'status': status,
+        'headers': [(name.lower().encode('latin1'), value.encode('latin1')) for name, value in headers]
+    }
+
+class AsgiServer:
+
+    def __init__(self, flask_app, views):
+        self.flask_app = flask_app
+        self.views = views
+        self.executor = ThreadPoolExecutor(max_workers=flask_app.config['ASGI_THREADS'], thread_name_prefix='asgi')
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            return await self.lifespan(receive, send)
+        if scope['type'] == 'http' and scope['method'] == 'GET':
+            environ = wsgi_environ(scope)
+            view = self.match(environ)
+            if view is not None:
+                return await self.dispatch(view, environ, send)
+        await self.run_wsgi(scope, receive, send)
+
+    def match(self, environ):
+        # Redirects (a missing trailing slash) and 404s are left to Flask
+        adapter = self.flask_app.url_map.bind_to_environ(environ, server_name=self.flask_app.config['SERVER_NAME'])
+        try:
+            endpoint, _ = adapter.match(method='GET')
+        except HTTPException:
+            return None
+        return self.views.get(endpoint)
+
+    async def dispatch(self, view, environ, send):
+        # The same steps as Flask's full_dispatch_request(), with the view
+        # awaited: before_request hooks (tenant, metrics), the token check
+        # @jwt_required would do, then the after_request hooks
+        with self.flask_app.request_context(environ):
+            try:
+                try:
+                    response = self.flask_app.preprocess_request()
+                    if response is None:
+                        verify_jwt_in_request()
+                        response = await view()
+                except Exception as e:
+                    response = self.flask_app.handle_user_exception(e)
+            except Exception as e:
+                response = self.flask_app.handle_exception(e)
+            response = self.flask_app.process_response(self.flask_app.make_response(response))
+            body = response.get_data()
+
+        await send(response_start(response.status_code, response.headers.items()))
+        await send({'type': 'http.response.body', 'body': body})
+
+    async def run_wsgi(self, scope, receive, send):
+        # The request body is read on the loop, then one pool thread runs the
+        # app and iterates its response, handing each chunk back to the loop
+        # to send. Streamed responses (events, exports) hold their thread
+        # until they finish or the client disconnects
+        body = bytearray()
+        while True:
+            message = await receive()
+            if message['type'] == 'http.disconnect':
+                return
+            body += message.get('body', b'')
+            if not message.get('more_body'):
+                break
+
+        loop = asyncio.get_running_loop()
+        environ = wsgi_environ(scope, bytes(body))
+        disconnected = threading.Event()
+
+        async def watch_disconnect():
+            while (await receive())['type'] != 'http.disconnect':
+                pass
+            disconnected.set()
+
+        async def send_all(messages):
+            for message in messages:
+                await send(message)
+
+        def respond():
+            started = []
+
+            def start_response(status, headers, exc_info=None):
+                started[:] = [int(status.split(' ', 1)[0]), headers]
+
+            chunks = self.flask_app(environ, start_response)
+            try:
+                pending = [response_start(*started)]
+                for chunk in chunks:
+                    # The server drops sends after a disconnect, so a stream
+                    # has to be stopped here
+                    if disconnected.is_set():
+                        return
+                    if chunk:
+                        pending.append({'type': 'http.response.body', 'body': chunk, 'more_body': True})
+                        asyncio.run_coroutine_threadsafe(send_all(pending), loop).result()
+                        pending = []
+                pending.append({'type': 'http.response.body', 'body': b''})
+                asyncio.run_coroutine_threadsafe(send_all(pending), loop).result()
+            finally:
+                if hasattr(chunks, 'close'):
+                    chunks.close()
+
+        watcher = asyncio.ensure_future(watch_disconnect())
+        try:
+            await loop.run_in_executor(self.executor, respond)
+        finally:
+            watcher.cancel()
+
+    async def lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                await async_db.dispose()
+                self.executor.shutdown(wait=False)
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+app = AsgiServer(flask_app, async_views)
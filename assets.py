@@ -0,0 +1,214 @@
+from flask import request, current_app
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import threading
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+MANIFEST_NAME = 'asset-manifest.json'
+
+IMMUTABLE = 'public, max-age=31536000, immutable'
+
+# Precompressed variants are only kept for these types, and only when they
+# save at least a tenth of the original size
+COMPRESSIBLE_TYPES = ('text/', 'application/javascript', 'application/json', 'application/xml',
+                      'image/svg+xml', 'image/x-icon', 'image/vnd.microsoft.icon', 'application/wasm')
+
+class Asset:
+
+    def __init__(self, path, digest, mimetype, variants, size, mtime_ns):
+        self.path = path
+        self.digest = digest
+        self.mimetype = mimetype
+        # Content-Encoding -> body; 'identity' is the file itself
+        self.variants = variants
+        self.size = size
+        self.mtime_ns = mtime_ns
+
+    @property
+    def hashed_path(self):
+        # favicon.ico -> favicon.3f1c9a0b2d4e.ico
+        root, extension = os.path.splitext(self.path)
+        return f'{root}.{self.digest[:12]}{extension}'
+
+    def to_dict(self):
+        return {
+            'hashed': self.hashed_path,
+            'digest': self.digest,
+            'mimetype': self.mimetype,
+            'encodings': [encoding for encoding in self.variants if encoding != 'identity'],
+            'size': self.size,
+            'mtime_ns': self.mtime_ns
+        }
+
+def compress(body, mimetype):
+    variants = {}
+    if len(body) < 256 or not mimetype.startswith(COMPRESSIBLE_TYPES):
+        return variants
+    if brotli is not None:
+        variants['br'] = brotli.compress(body, quality=11)
+    variants['gzip'] = gzip.compress(body, compresslevel=9, mtime=0)
+    return {encoding: data for encoding, data in variants.items() if len(data) <= len(body) * 0.9}
+
+def read_file(path):
+    with open(path, 'rb') as handle:
+        return handle.read()
+
+class StaticManifest:
+    # In-memory map of every file under the static folder, by its plain and
+    # its content-hashed path. Built on the first static request from the
+    # folder plus asset-manifest.json (written by `flask maintai
+    # build-static`); files whose size or mtime no longer match the manifest
+    # are hashed and compressed again at load
+
+    def __init__(self, folder):
+        self.folder = folder
+        self.assets = {}
+        self.routes = {}
+
+    def add(self, asset):
+        self.assets[asset.path] = asset
+        self.routes[asset.path] = (asset, False)
+        self.routes[asset.hashed_path] = (asset, True)
+
+    def lookup(self, path):
+        return self.routes.get(path)
+
+    def paths(self):
+        return {path: asset.hashed_path for path, asset in sorted(self.assets.items())}
+
+    def changed(self):
+        # Whether a file was added, removed or rewritten since the scan; only
+        # stats the folder
+        current = {}
+        for path, full_path in walk(self.folder):
+            stat = os.stat(full_path)
+            current[path] = (stat.st_size, stat.st_mtime_ns)
+        return current != {path: (asset.size, asset.mtime_ns) for path, asset in self.assets.items()}
+
+    @classmethod
+    def scan(cls, folder, previous=None):
+        # Assets of a previous scan whose size and mtime still match are
+        # reused as they are
+        manifest = cls(folder)
+        try:
+            recorded = json.loads(read_file(os.path.join(folder, MANIFEST_NAME)))['assets']
+        except (OSError, ValueError, KeyError):
+            recorded = {}
+
+        for path, full_path in walk(folder):
+            stat = os.stat(full_path)
+            reused = previous.assets.get(path) if previous is not None else None
+            if reused and reused.size == stat.st_size and reused.mtime_ns == stat.st_mtime_ns:
+                manifest.add(reused)
+                continue
+            entry = recorded.get(path)
+            body = read_file(full_path)
+            if entry and entry['size'] == stat.st_size and entry['mtime_ns'] == stat.st_mtime_ns:
+                variants = {'identity': body}
+                for encoding in entry['encodings']:
+                    variant_path = f'{full_path}.{"br" if encoding == "br" else "gz"}'
+                    if os.path.exists(variant_path):
+                        variants[encoding] = read_file(variant_path)
+                asset = Asset(path, entry['digest'], entry['mimetype'], variants, stat.st_size, stat.st_mtime_ns)
+            else:
+                mimetype = mimetypes.guess_type(path)[0] or 'application/octet-stream'
+                variants = {'identity': body, **compress(body, mimetype)}
+                digest = hashlib.sha256(body).hexdigest()
+                asset = Asset(path, digest, mimetype, variants, stat.st_size, stat.st_mtime_ns)
+            manifest.add(asset)
+        return manifest
+
+    def write(self):
+        # Precompressed files go next to their source (app.js.gz, app.js.br)
+        # so the next start only reads them
+        for path, asset in self.assets.items():
+            full_path = os.path.join(self.folder, path)
+            for encoding, body in asset.variants.items():
+                if encoding != 'identity':
+                    with open(f'{full_path}.{"br" if encoding == "br" else "gz"}', 'wb') as handle:
+                        handle.write(body)
+        with open(os.path.join(self.folder, MANIFEST_NAME), 'w') as handle:
+            json.dump({'assets': {path: asset.to_dict() for path, asset in sorted(self.assets.items())}}, handle, indent=2)
+
+def walk(folder):
+    # (url path, file path) for every servable file. The manifest itself and
+    # .gz/.br files next to their source are build output, not assets
+    for root, directories, files in os.walk(folder):
+        directories[:] = sorted(directory for directory in directories if not directory.startswith('.'))
+        for name in sorted(files):
+            full_path = os.path.join(root, name)
+            if name.startswith('.') or name == MANIFEST_NAME:
+                continue
+            if name.endswith(('.gz', '.br')) and os.path.exists(full_path[:-3]):
+                continue
+            yield os.path.relpath(full_path, folder).replace(os.sep, '/'), full_path
+
+class StaticAssets:
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.manifest = None
+
+    def get_manifest(self):
+        # Debug servers stat the folder on every request so edits show up at
+        # once, and rescan only the files whose size or mtime changed
+        if self.manifest is None or current_app.debug:
+            with self.lock:
+                if self.manifest is None:
+                    self.manifest = StaticManifest.scan(current_app.static_folder)
+                elif current_app.debug and self.manifest.changed():
+                    self.manifest = StaticManifest.scan(current_app.static_folder, self.manifest)
+        return self.manifest
+
+    def reset(self):
+        with self.lock:
+            self.manifest = None
+
+    def serve(self, path):
+        manifest = self.get_manifest()
+        if path == MANIFEST_NAME:
+            response = current_app.response_class(json.dumps(manifest.paths()), mimetype='application/json')
+            response.headers['Cache-Control'] = 'no-cache'
+            return response
+
+        # Unknown paths get the SPA entry point so client-side routes work
+        found = manifest.lookup(path) or manifest.lookup('index.html')
+        if found is None:
+            return "index.html not found", 404
+        return asset_response(*found)
+
+static_assets = StaticAssets()
+
+def asset_response(asset, immutable):
+    # Hashed paths never change content, so browsers may cache them for a
+    # year without revalidating. Plain paths revalidate every time against a
+    # strong ETag carrying the content hash (and the encoding as a suffix)
+    cache_control = IMMUTABLE if immutable else 'no-cache'
+    etag = asset.digest[:32]
+
+    accepted = request.accept_encodings
+    encoding = 'identity'
+    if 'br' in asset.variants and accepted['br']:
+        encoding = 'br'
+    elif 'gzip' in asset.variants and accepted['gzip']:
+        encoding = 'gzip'
+    tag = etag if encoding == 'identity' else f'{etag}-{encoding}'
+
+    if request.if_none_match.contains(tag):
+        response = current_app.response_class(status=304)
+    else:
+        response = current_app.response_class(asset.variants[encoding], mimetype=asset.mimetype)
+        if encoding != 'identity':
+            response.headers['Content-Encoding'] = encoding
+    response.set_etag(tag)
+    response.headers['Cache-Control'] = cache_control
+    if len(asset.variants) > 1:
+        response.vary.add('Accept-Encoding')
+    return response
@@ -0,0 +1,60 @@
+from flask import current_app
+from sqlalchemy.engine import make_url
+from src.utils.routing import engine_options, use_replica
+from src.utils.tenancy import DEFAULT_TENANT, current_tenant, tenant_engine_options
+import threading
+
+# Drivers the async views run on, by backend. The sync engines keep their
+# own (pysqlite, psycopg2); both point at the same databases
+ASYNC_DRIVERS = {'sqlite': 'sqlite+aiosqlite', 'postgresql': 'postgresql+asyncpg'}
+
+def async_url(url):
+    url = make_url(url)
+    driver = ASYNC_DRIVERS.get(url.get_backend_name())
+    if driver is None:
+        raise ValueError(f'Async serving does not support {url.get_backend_name()} databases')
+    return url.set(drivername=driver)
+
+def async_engine_options(app, tenant, replica):
+    # Same database and pool sizing as the sync engine for tenant
+    if tenant != DEFAULT_TENANT:
+        return tenant_engine_options(tenant, app.config['TENANT_DATABASES'][tenant], async_url)
+    if replica:
+        return dict(engine_options('DB_READ'), url=async_url(app.config['DATABASE_READ_URL']))
+    return dict(app.config['SQLALCHEMY_ENGINE_OPTIONS'], url=async_url(app.config['SQLALCHEMY_DATABASE_URI']))
+
+class AsyncDatabase:
+    # Async engines for the ASGI entry point (src/asgi.py), one per tenant
+    # plus the default tenant's replica. They are created on first use, so
+    # WSGI workers never import the async drivers, and belong to the event
+    # loop that first used them. sqlalchemy.ext.asyncio is imported on
+    # first use only, for the same reason
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.engines = {}
+
+    def engine(self, app, tenant, replica=False):
+        from sqlalchemy.ext.asyncio import create_async_engine
+        with self.lock:
+            engine = self.engines.get((tenant, replica))
+            if engine is None:
+                options = async_engine_options(app, tenant, replica)
+                engine = self.engines[(tenant, replica)] = create_async_engine(options.pop('url'), **options)
+            return engine
+
+    def session(self):
+        # Read session for the current request: its tenant's database, or
+        # the replica wherever the sync routing would read from it
+        from sqlalchemy.ext.asyncio import AsyncSession
+        tenant = current_tenant()
+        replica = tenant == DEFAULT_TENANT and bool(current_app.config.get('DATABASE_READ_URL')) and use_replica()
+        return AsyncSession(self.engine(current_app, tenant, replica), expire_on_commit=False)
+
+    async def dispose(self):
+        with self.lock:
+            engines, self.engines = list(self.engines.values()), {}
+        for engine in engines:
+            await engine.dispose()
+
+async_db = AsyncDatabase()
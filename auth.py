@@ -1,6 +1,9 @@
 from flask import Blueprint, request, jsonify
-from flask_jwt_extended import create_access_token, jwt_required, get_jwt_identity
+from flask_jwt_extended import create_access_token, jwt_required
 from src.models.user import User, db
+from src.utils.passwords import hash_password, check_password, PasswordHasherBusy
+from src.utils.identity import current_identity
+from src.utils.tenancy import current_tenant, TENANT_CLAIM
 
 auth_bp = Blueprint('auth', __name__)
 
@@ -16,15 +19,21 @@ def login():
 
         user = User.query.filter_by(username=username).first()
 
-        if user and user.check_password(password) and user.is_active:
-            access_token = create_access_token(identity=str(user.id))
+        if user and check_password(user.password_hash, password) and user.is_active:
+            # The user was looked up in the tenant the X-Tenant header
+            # selected; the claim routes the token's requests back there
+            tenant = current_tenant()
+            access_token = create_access_token(identity=str(user.id), additional_claims={TENANT_CLAIM: tenant})
             return jsonify({
                 'access_token': access_token,
-                'user': user.to_dict()
+                'user': user.to_dict(),
+                'tenant': tenant
             }), 200
         else:
             return jsonify({'error': 'Invalid credentials'}), 401
 
+    except PasswordHasherBusy as e:
+        return jsonify({'error': str(e)}), 503
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -49,17 +58,22 @@ def register():
 
         # Create new user
         user = User(username=username, email=email, role=role)
-        user.set_password(password)
+        user.password_hash = hash_password(password)
         
         db.session.add(user)
         db.session.commit()
 
-        access_token = create_access_token(identity=str(user.id))
+        tenant = current_tenant()
+        access_token = create_access_token(identity=str(user.id), additional_claims={TENANT_CLAIM: tenant})
         return jsonify({
             'access_token': access_token,
-            'user': user.to_dict()
+            'user': user.to_dict(),
+            'tenant': tenant
         }), 201
 
+    except PasswordHasherBusy as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 503
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
@@ -68,13 +82,12 @@ def register():
 @jwt_required()
 def get_current_user():
     try:
-        user_id = int(get_jwt_identity())
-        user = User.query.get(user_id)
-        
+        user = current_identity()
+
         if not user:
             return jsonify({'error': 'User not found'}), 404
 
-        return jsonify({'user': user.to_dict()}), 200
+        return jsonify({'user': user, 'tenant': current_tenant()}), 200
 
     except Exception as e:
         return jsonify({'error': str(e)}), 500
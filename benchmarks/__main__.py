@@ -0,0 +1,191 @@
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+def load_app(database):
+    # DATABASE_URL has to be set before the app module is imported
+    os.environ['DATABASE_URL'] = database
+    os.environ.setdefault('PREDICTIVE_RECOMPUTE_INTERVAL', '0')
+    from src.main import app
+    return app
+
+def fleet_ids(app):
+    from src.models.user import db
+    from src.models.machine import Machine
+    from src.models.activity import Activity
+    with app.app_context():
+        machine_ids = list(db.session.scalars(db.select(Machine.id)))
+        max_activity_id = db.session.scalar(db.select(db.func.max(Activity.id))) or 1
+    return machine_ids, max_activity_id
+
+def generate(args):
+    app = load_app(args.database)
+    from benchmarks.fleet import generate_fleet
+    from src.main import init_db
+    with app.app_context():
+        init_db()
+        generate_fleet(args.machines, args.activities, seed=args.seed)
+
+def run(args):
+    from benchmarks import load
+
+    app = load_app(args.database)
+    machine_ids, max_activity_id = fleet_ids(app)
+    if not machine_ids:
+        sys.exit('No machines in the database; run `python -m benchmarks generate` first.')
+
+    if args.url:
+        client = load.HttpClient(args.url, load.login(base_url=args.url))
+    else:
+        client = load.FlaskClient(app, load.login(app=app))
+
+    scenarios = load.READ_SCENARIOS + (load.WRITE_SCENARIOS if args.writes else [])
+    if args.only:
+        scenarios = [scenario for scenario in scenarios if scenario[0] in args.only.split(',')]
+
+    print(f'{len(machine_ids)} machines, concurrency {args.concurrency}, {args.requests} requests per endpoint')
+    print(load.format_header())
+    report = load.run_suite(client, scenarios, args.requests, args.concurrency, machine_ids, max_activity_id, seed=args.seed)
+
+    if args.json:
+        with open(args.json, 'w') as output:
+            json.dump(report, output, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as baseline:
+            regressions = load.compare(report, json.load(baseline), args.max_regression)
+        for endpoint, before, after in regressions:
+            print(f'REGRESSION {endpoint}: p95 {before} ms -> {after} ms')
+        if regressions:
+            sys.exit(1)
+
+def explain(args):
+    from benchmarks import load
+    from benchmarks.explain import check_scenarios
+
+    app = load_app(args.database)
+    machine_ids, max_activity_id = fleet_ids(app)
+    if not machine_ids:
+        sys.exit('No machines in the database; run `python -m benchmarks generate` first.')
+
+    client = load.FlaskClient(app, load.login(app=app))
+    scenarios = load.READ_SCENARIOS + (load.WRITE_SCENARIOS if args.writes else [])
+    if args.only:
+        scenarios = [scenario for scenario in scenarios if scenario[0] in args.only.split(',')]
+
+    failures = check_scenarios(app, client, scenarios, machine_ids, max_activity_id,
+                               min_rows=args.min_rows, seed=args.seed)
+    if failures:
+        sys.exit(f'{len(failures)} unexpected full table scans')
+
+def sessions(args):
+    from benchmarks import load
+
+    client = load.HttpClient(args.url, load.login(base_url=args.url))
+    levels = [int(level) for level in args.sessions.split(',')]
+    # Warm up caches and connection pools before measuring
+    for _, method, path, _ in load.DASHBOARD_REFRESH:
+        client.request(method, path)
+    print(f'{len(load.DASHBOARD_REFRESH)} requests per refresh, {args.think_time} s think time, {args.duration} s per level')
+    print(f"{'sessions':>8} {'refreshes':>10} {'err':>5} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'refresh/s':>10}")
+    report = []
+    for level in levels:
+        result = load.run_sessions(client, level, args.duration, args.think_time, seed=args.seed)
+        print(f"{result['sessions']:>8} {result['refreshes']:>10} {result['errors']:>5} {result['p50_ms']:>9} "
+              f"{result['p95_ms']:>9} {result['p99_ms']:>9} {result['refreshes_per_s']:>10}")
+        report.append(result)
+    capacity = load.session_capacity(report, args.max_p95)
+    print(f'Sessions within p95 {args.max_p95} ms: {capacity}')
+
+    if args.json:
+        with open(args.json, 'w') as output:
+            json.dump({'url': args.url, 'max_p95_ms': args.max_p95, 'capacity': capacity, 'levels': report}, output, indent=2)
+
+# Run in a fresh interpreter per sample: times the import of src.main (app
+# creation included) and the first request, which opens the first database
+# connection. Prints both in milliseconds
+STARTUP_PROBE = '''
+import os, sys, time
+started = time.perf_counter()
+sys.path.insert(0, os.getcwd())
+from src.main import app
+from flask_jwt_extended import create_access_token
+imported = time.perf_counter()
+with app.app_context():
+    token = create_access_token(identity='1')
+response = app.test_client().get('/api/machines/?fields=id', headers={'Authorization': 'Bearer ' + token})
+assert response.status_code == 200, response.status_code
+print((imported - started) * 1000, (time.perf_counter() - imported) * 1000)
+'''
+
+def startup(args):
+    env = dict(os.environ, DATABASE_URL=args.database)
+    env.setdefault('PREDICTIVE_RECOMPUTE_INTERVAL', '0')
+    samples = []
+    for _ in range(args.samples):
+        output = subprocess.run([sys.executable, '-c', STARTUP_PROBE], env=env, check=True,
+                                capture_output=True, text=True).stdout
+        samples.append([float(value) for value in output.split()[-2:]])
+
+    imports = [sample[0] for sample in samples]
+    firsts = [sample[1] for sample in samples]
+    totals = [sum(sample) for sample in samples]
+    print(f"{'':22} {'min ms':>9} {'median ms':>10} {'max ms':>9}")
+    for label, values in (('import + create_app', imports), ('first request', firsts), ('cold start', totals)):
+        print(f'{label:22} {min(values):>9.1f} {statistics.median(values):>10.1f} {max(values):>9.1f}')
+
+    if args.json:
+        with open(args.json, 'w') as output:
+            json.dump({'samples': samples, 'cold_start_median_ms': round(statistics.median(totals), 1)}, output, indent=2)
+
+def main():
+    parser = argparse.ArgumentParser(prog='python -m benchmarks', description='MaintAI load tests')
+    parser.add_argument('--database', default='sqlite:///' + os.path.abspath('bench.db'),
+                        help='SQLAlchemy URL of the benchmark database (default: ./bench.db)')
+    parser.add_argument('--seed', type=int, default=42)
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    generate_parser = commands.add_parser('generate', help='Bulk-load a seeded synthetic fleet')
+    generate_parser.add_argument('--machines', type=int, default=10000)
+    generate_parser.add_argument('--activities', type=int, default=2000000)
+    generate_parser.set_defaults(handler=generate)
+
+    run_parser = commands.add_parser('run', help='Drive every endpoint and report latency percentiles')
+    run_parser.add_argument('--concurrency', type=int, default=8)
+    run_parser.add_argument('--requests', type=int, default=200, help='Requests per endpoint')
+    run_parser.add_argument('--url', help='Base URL of a running server; defaults to the in-process test client')
+    run_parser.add_argument('--writes', action='store_true', help='Include write endpoints (modifies the database)')
+    run_parser.add_argument('--only', help='Comma-separated endpoint names to run')
+    run_parser.add_argument('--json', help='Write the report to this file')
+    run_parser.add_argument('--baseline', help='Earlier --json report to compare p95 latencies against')
+    run_parser.add_argument('--max-regression', type=float, default=0.2, help='Allowed p95 growth before failing (0.2 = 20%%)')
+    run_parser.set_defaults(handler=run)
+
+    explain_parser = commands.add_parser('explain', help='EXPLAIN every endpoint query and fail on full table scans')
+    explain_parser.add_argument('--min-rows', type=int, default=10000, help='Tables with at least this many rows count as large')
+    explain_parser.add_argument('--writes', action='store_true', help='Include write endpoints (modifies the database)')
+    explain_parser.add_argument('--only', help='Comma-separated endpoint names to check')
+    explain_parser.set_defaults(handler=explain)
+
+    sessions_parser = commands.add_parser('sessions', help='Find how many concurrent dashboard sessions a server keeps responsive')
+    sessions_parser.add_argument('--url', required=True, help='Base URL of the running server')
+    sessions_parser.add_argument('--sessions', default='10,25,50,100,200', help='Comma-separated session counts to try')
+    sessions_parser.add_argument('--duration', type=float, default=20, help='Seconds per session count')
+    sessions_parser.add_argument('--think-time', type=float, default=2, help='Mean seconds between a session\'s refreshes')
+    sessions_parser.add_argument('--max-p95', type=float, default=500, help='Refresh p95 in ms a session count must stay within')
+    sessions_parser.add_argument('--json', help='Write the report to this file')
+    sessions_parser.set_defaults(handler=sessions)
+
+    startup_parser = commands.add_parser('startup', help='Measure cold start: app import plus first request')
+    startup_parser.add_argument('--samples', type=int, default=10, help='Fresh interpreters to start')
+    startup_parser.add_argument('--json', help='Write the samples to this file')
+    startup_parser.set_defaults(handler=startup)
+
+    args = parser.parse_args()
+    args.handler(args)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,101 @@
+from sqlalchemy import event
+import json
+
+# Plan checks for the queries behind each benchmark scenario: every SELECT
+# an endpoint issues is captured, run through EXPLAIN on the benchmark
+# database, and reported if it reads a large table without an index
+
+# (scenario, table) pairs whose response covers or aggregates the whole
+# table, so reading all of it is by design
+FULL_SCAN_ALLOWED = {
+    ('machines.list', 'machine'),
+    ('machines.list.sparse', 'machine'),
+    ('analytics.dashboard_stats', 'machine'),
+    ('analytics.dashboard_stats', 'predictive_data'),
+    ('analytics.predictive', 'machine'),
+    ('analytics.predictive', 'predictive_data'),
+    ('analytics.cost_analysis', 'predictive_data'),
+    ('exports.machines', 'machine'),
+    ('exports.predictive.csv', 'predictive_data'),
+    # The planner's heap is built from the whole fleet on first use
+    ('analytics.maintenance_schedule', 'machine')
+}
+
+class StatementRecorder:
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.statements = []
+        self.recording = False
+
+    def __enter__(self):
+        event.listen(self.engine, 'before_cursor_execute', self.record)
+        return self
+
+    def __exit__(self, *exc_info):
+        event.remove(self.engine, 'before_cursor_execute', self.record)
+
+    def record(self, conn, cursor, statement, parameters, context, executemany):
+        if self.recording and not executemany and statement.lstrip().upper().startswith(('SELECT', 'WITH')):
+            self.statements.append((statement, parameters))
+
+def table_sizes(connection, tables):
+    return {table: connection.exec_driver_sql(f'SELECT count(*) FROM {table}').scalar() for table in tables}
+
+def full_scans(connection, statement, parameters, large_tables):
+    # Names of large tables the plan reads row by row
+    if connection.dialect.name == 'sqlite':
+        # "SCAN activity" is a table scan; "SCAN activity USING [COVERING]
+        # INDEX ..." walks an index and "SEARCH ..." seeks one
+        plan = connection.exec_driver_sql('EXPLAIN QUERY PLAN ' + statement, parameters).all()
+        return sorted({
+            detail.split()[1] for *_, detail in plan
+            if detail.startswith('SCAN ') and ' USING ' not in detail and detail.split()[1] in large_tables
+        })
+    if connection.dialect.name == 'postgresql':
+        plan = connection.exec_driver_sql('EXPLAIN (FORMAT JSON) ' + statement, parameters).scalar()
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        scanned = set()
+        nodes = [entry['Plan'] for entry in plan]
+        while nodes:
+            node = nodes.pop()
+            if node['Node Type'] == 'Seq Scan' and node.get('Relation Name') in large_tables:
+                scanned.add(node['Relation Name'])
+            nodes.extend(node.get('Plans', []))
+        return sorted(scanned)
+    raise ValueError(f'EXPLAIN checks do not support {connection.dialect.name}')
+
+def check_scenarios(app, client, scenarios, machine_ids, max_activity_id, min_rows=10000, seed=42, log=print):
+    # Returns (scenario, table, statement) for every unexpected full scan
+    from src.models.user import db
+    from benchmarks.load import run_scenario
+
+    with app.app_context():
+        engine = db.engine
+        with engine.connect() as connection:
+            sizes = table_sizes(connection, db.metadata.tables)
+    large_tables = {table for table, rows in sizes.items() if rows >= min_rows}
+    log(f"Large tables (>= {min_rows} rows): {', '.join(sorted(large_tables)) or 'none'}")
+
+    failures = []
+    with StatementRecorder(engine) as recorder:
+        for scenario in scenarios:
+            # Two requests: the first one fills caches and the second one
+            # shows the steady-state queries
+            recorder.statements = []
+            recorder.recording = True
+            run_scenario(client, scenario, 2, 1, machine_ids, max_activity_id, seed)
+            recorder.recording = False
+
+            name = scenario[0]
+            with engine.connect() as connection:
+                for statement, parameters in recorder.statements:
+                    for table in full_scans(connection, statement, parameters, large_tables):
+                        allowed = (name, table) in FULL_SCAN_ALLOWED
+                        log(f"{'allowed' if allowed else 'FULL SCAN'} {name}: {table}")
+                        if not allowed:
+                            log('    ' + ' '.join(statement.split()))
+                            failures.append((name, table, statement))
+            log(f'checked {name}: {len(recorder.statements)} statements')
+    return failures
@@ -0,0 +1,98 @@
+from src.models.user import db
+from src.models.machine import Machine
+from src.models.activity import Activity
+from src.utils.scoring import score_machines
+from src.utils.ledger import rebuild_cost_ledger
+from datetime import datetime, timedelta
+import random
+import time
+
+MACHINE_TYPES = ['Production Line', 'Assembly Unit', 'Quality Control', 'Packaging Unit', 'CNC Mill', 'Press', 'Conveyor', 'Compressor']
+
+TECHNICIANS = ['Ahmed Hassan', 'Sarah Johnson', 'Mohammed Ali', 'Lisa Chen', 'David Rodriguez',
+               'Fatima Zahra', 'John Smith', 'Elena Petrova', 'Kenji Sato', 'Amina Yusuf']
+
+DESCRIPTIONS = ['Routine maintenance check', 'Replace worn belt', 'Calibrate sensors', 'Oil change and lubrication service',
+                'Emergency repair', 'Bearing replacement', 'Inspect hydraulic lines', 'Firmware update',
+                'Clean cooling system', 'Tighten drive chain']
+
+ACTIVITY_STATUSES = ['completed'] * 7 + ['pending', 'in-progress', 'active']
+
+CHUNK_SIZE = 10000
+
+def machine_rows(count, rng, now):
+    for index in range(count):
+        status = rng.choices(['operational', 'warning', 'maintenance'], weights=[80, 15, 5])[0]
+        degraded = status != 'operational'
+        yield {
+            'id': f'BENCH-{index:06d}',
+            'name': f'{rng.choice(MACHINE_TYPES)} {index}',
+            'status': status,
+            'efficiency': round(rng.uniform(60, 85) if degraded else rng.uniform(85, 100), 1),
+            'temperature': round(rng.uniform(35, 55) if degraded else rng.uniform(18, 40), 1),
+            'vibration': round(rng.uniform(1.0, 2.5) if degraded else rng.uniform(0.1, 1.2), 2),
+            'last_maintenance': (now - timedelta(days=rng.randint(1, 400))).strftime('%Y-%m-%d'),
+            'created_at': now,
+            'updated_at': now
+        }
+
+def activity_rows(count, machine_ids, rng, now, cost_rng):
+    # Costs come from their own generator so the rest of the fleet stays
+    # identical to fleets generated before activities had costs
+    span = 3 * 365 * 24 * 3600
+    for _ in range(count):
+        timestamp = now - timedelta(seconds=rng.randint(0, span))
+        status = rng.choice(ACTIVITY_STATUSES)
+        completed = status == 'completed'
+        machine_id = rng.choice(machine_ids)
+        yield {
+            'description': f'{rng.choice(DESCRIPTIONS)} on {machine_id}',
+            'technician': rng.choice(TECHNICIANS),
+            'status': status,
+            'machine_id': machine_id,
+            'timestamp': timestamp,
+            'completed_at': timestamp + timedelta(hours=rng.randint(1, 72)) if completed else None,
+            'labor_cost': round(cost_rng.uniform(80, 1500), 2) if completed else 0.0,
+            'parts_cost': round(cost_rng.expovariate(1 / 600), 2) if completed else 0.0
+        }
+
+def insert_chunked(model, rows):
+    inserted = 0
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) == CHUNK_SIZE:
+            db.session.execute(db.insert(model), chunk)
+            db.session.commit()
+            inserted += len(chunk)
+            chunk = []
+    if chunk:
+        db.session.execute(db.insert(model), chunk)
+        db.session.commit()
+        inserted += len(chunk)
+    return inserted
+
+def generate_fleet(machines, activities, seed=42, log=print):
+    # Same seed, same fleet: machine ids, readings and activity history are
+    # all drawn from one seeded generator. Must run inside an app context
+    rng = random.Random(seed)
+    now = datetime(2025, 1, 1)
+
+    started = time.perf_counter()
+    insert_chunked(Machine, machine_rows(machines, rng, now))
+    log(f'Inserted {machines} machines in {time.perf_counter() - started:.1f}s')
+
+    machine_ids = [f'BENCH-{index:06d}' for index in range(machines)]
+    started = time.perf_counter()
+    insert_chunked(Activity, activity_rows(activities, machine_ids, rng, now, random.Random(seed + 1)))
+    log(f'Inserted {activities} activities in {time.perf_counter() - started:.1f}s')
+
+    started = time.perf_counter()
+    entries = rebuild_cost_ledger()
+    db.session.commit()
+    log(f'Built cost ledger for {entries} completed activities in {time.perf_counter() - started:.1f}s')
+
+    started = time.perf_counter()
+    scored = score_machines()
+    db.session.commit()
+    log(f'Scored {scored} machines in {time.perf_counter() - started:.1f}s')
@@ -0,0 +1,206 @@
+from concurrent.futures import ThreadPoolExecutor
+import json
+import random
+import threading
+import time
+import urllib.error
+import urllib.request
+
+# (name, method, path, body). Paths may use {machine_id} and {activity_id},
+# filled from the benchmark fleet for each request
+READ_SCENARIOS = [
+    ('auth.login', 'POST', '/api/auth/login', 'login'),
+    ('auth.me', 'GET', '/api/auth/me', None),
+    ('machines.list', 'GET', '/api/machines/', None),
+    ('machines.list.sparse', 'GET', '/api/machines/?fields=id,status', None),
+    ('machines.get', 'GET', '/api/machines/{machine_id}', None),
+    ('activities.page', 'GET', '/api/activities/?limit=100', None),
+    ('activities.by_machine', 'GET', '/api/activities/?machine_id={machine_id}&limit=50', None),
+    ('activities.get', 'GET', '/api/activities/{activity_id}', None),
+    ('activities.search', 'GET', '/api/activities/search?q=belt&limit=50', None),
+    ('analytics.dashboard_stats', 'GET', '/api/analytics/dashboard-stats', None),
+    ('analytics.predictive', 'GET', '/api/analytics/predictive', None),
+    ('analytics.maintenance_schedule', 'GET', '/api/analytics/maintenance-schedule', None),
+    ('analytics.maintenance_schedule.deep', 'GET', '/api/analytics/maintenance-schedule?offset=5000&limit=100', None),
+    ('analytics.cost_analysis', 'GET', '/api/analytics/cost-analysis', None),
+    ('exports.machines', 'GET', '/api/exports/machines?format=ndjson', None),
+    ('exports.predictive.csv', 'GET', '/api/exports/predictive?format=csv', None),
+    ('changes.page', 'GET', '/api/changes?since=0&limit=100', None),
+    ('users.list', 'GET', '/api/users/users', None),
+    ('users.get', 'GET', '/api/users/users/1', None)
+]
+
+WRITE_SCENARIOS = [
+    ('telemetry.ingest', 'POST', '/api/telemetry/', 'telemetry'),
+    ('machines.update', 'PUT', '/api/machines/{machine_id}', 'machine'),
+    ('activities.create', 'POST', '/api/activities/', 'activity')
+]
+
+# One dashboard refresh: the requests the dashboard page makes each time it
+# loads, in order. Sessions repeat it after a think time
+DASHBOARD_REFRESH = [
+    ('analytics.dashboard_stats', 'GET', '/api/analytics/dashboard-stats', None),
+    ('analytics.cost_analysis', 'GET', '/api/analytics/cost-analysis', None),
+    ('analytics.maintenance_schedule', 'GET', '/api/analytics/maintenance-schedule?limit=20', None),
+    ('activities.page', 'GET', '/api/activities/?limit=20', None)
+]
+
+class FlaskClient:
+    # In-process client; one per worker thread since test clients keep state
+
+    def __init__(self, app, token):
+        self.local = threading.local()
+        self.app = app
+        self.headers = {'Authorization': f'Bearer {token}'}
+
+    def request(self, method, path, body=None):
+        client = getattr(self.local, 'client', None)
+        if client is None:
+            client = self.local.client = self.app.test_client()
+        response = client.open(path, method=method, json=body, headers=self.headers)
+        return response.status_code, len(response.get_data())
+
+class HttpClient:
+    # Drives an already running server over real HTTP
+
+    def __init__(self, base_url, token):
+        self.base_url = base_url.rstrip('/')
+        self.headers = {'Authorization': f'Bearer {token}', 'Content-Type': 'application/json'}
+
+    def request(self, method, path, body=None):
+        data = json.dumps(body).encode() if body is not None else None
+        request = urllib.request.Request(self.base_url + path, data=data, method=method, headers=self.headers)
+        try:
+            with urllib.request.urlopen(request) as response:
+                return response.status, len(response.read())
+        except urllib.error.HTTPError as e:
+            return e.code, len(e.read())
+
+def login(base_url=None, app=None, username='admin', password='password'):
+    payload = {'username': username, 'password': password}
+    if app is not None:
+        return app.test_client().post('/api/auth/login', json=payload).get_json()['access_token']
+    request = urllib.request.Request(
+        base_url.rstrip('/') + '/api/auth/login', data=json.dumps(payload).encode(),
+        method='POST', headers={'Content-Type': 'application/json'}
+    )
+    with urllib.request.urlopen(request) as response:
+        return json.loads(response.read())['access_token']
+
+def build_body(kind, rng, machine_ids):
+    if kind == 'telemetry':
+        return [{
+            'machine_id': rng.choice(machine_ids),
+            'temperature': round(rng.uniform(20, 50), 1),
+            'vibration': round(rng.uniform(0.1, 2.0), 2),
+            'efficiency': round(rng.uniform(60, 100), 1)
+        } for _ in range(50)]
+    if kind == 'login':
+        return {'username': 'admin', 'password': 'password'}
+    if kind == 'machine':
+        return {'temperature': round(rng.uniform(20, 50), 1)}
+    if kind == 'activity':
+        return {'description': 'Benchmark inspection', 'technician': 'Load Test', 'machine_id': rng.choice(machine_ids)}
+    return None
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    index = min(int(round(fraction * (len(sorted_values) - 1))), len(sorted_values) - 1)
+    return sorted_values[index]
+
+def run_scenario(client, scenario, requests, concurrency, machine_ids, max_activity_id, seed):
+    name, method, path, body_kind = scenario
+    rng = random.Random(seed)
+    calls = [(
+        path.format(machine_id=rng.choice(machine_ids), activity_id=rng.randint(1, max_activity_id)),
+        build_body(body_kind, rng, machine_ids)
+    ) for _ in range(requests)]
+
+    def call(item):
+        started = time.perf_counter()
+        status, size = client.request(method, *item)
+        return time.perf_counter() - started, status, size
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        results = list(executor.map(call, calls))
+    wall = time.perf_counter() - started
+
+    latencies = sorted(result[0] for result in results)
+    return {
+        'endpoint': name,
+        'requests': requests,
+        'errors': sum(1 for result in results if result[1] >= 400),
+        'p50_ms': round(percentile(latencies, 0.50) * 1000, 2),
+        'p95_ms': round(percentile(latencies, 0.95) * 1000, 2),
+        'p99_ms': round(percentile(latencies, 0.99) * 1000, 2),
+        'throughput_rps': round(requests / wall, 1) if wall > 0 else None,
+        'avg_bytes': int(sum(result[2] for result in results) / requests)
+    }
+
+def run_suite(client, scenarios, requests, concurrency, machine_ids, max_activity_id, seed=42, log=print):
+    report = []
+    for index, scenario in enumerate(scenarios):
+        # Warm up caches and connection pools before measuring
+        run_scenario(client, scenario, min(requests, concurrency), concurrency, machine_ids, max_activity_id, seed)
+        result = run_scenario(client, scenario, requests, concurrency, machine_ids, max_activity_id, seed + index)
+        log(format_row(result))
+        report.append(result)
+    return report
+
+def run_sessions(client, sessions, duration, think_time, seed=42):
+    # sessions concurrent dashboard users for duration seconds, each
+    # refreshing the dashboard, then idling think_time seconds (+-50 %).
+    # Latency is per refresh: all of its requests, back to back
+    deadline = time.perf_counter() + duration
+    refreshes = []
+    lock = threading.Lock()
+
+    def session(index):
+        rng = random.Random(seed + index)
+        # Stagger the first refreshes over one think time
+        time.sleep(rng.uniform(0, think_time))
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            errors = sum(1 for _, method, path, _ in DASHBOARD_REFRESH if client.request(method, path)[0] >= 400)
+            with lock:
+                refreshes.append((time.perf_counter() - started, errors))
+            time.sleep(think_time * rng.uniform(0.5, 1.5))
+
+    with ThreadPoolExecutor(max_workers=sessions) as executor:
+        list(executor.map(session, range(sessions)))
+
+    latencies = sorted(refresh[0] for refresh in refreshes)
+    return {
+        'sessions': sessions,
+        'refreshes': len(refreshes),
+        'errors': sum(refresh[1] for refresh in refreshes),
+        'p50_ms': round(percentile(latencies, 0.50) * 1000, 2),
+        'p95_ms': round(percentile(latencies, 0.95) * 1000, 2),
+        'p99_ms': round(percentile(latencies, 0.99) * 1000, 2),
+        'refreshes_per_s': round(len(refreshes) / duration, 1)
+    }
+
+def session_capacity(report, max_p95_ms):
+    # Most sessions served with p95 refresh latency within max_p95_ms and
+    # no errors
+    return max((result['sessions'] for result in report
+                if result['p95_ms'] <= max_p95_ms and not result['errors']), default=0)
+
+def format_header():
+    return f"{'endpoint':34} {'reqs':>6} {'err':>5} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'req/s':>9} {'bytes':>10}"
+
+def format_row(result):
+    return (f"{result['endpoint']:34} {result['requests']:>6} {result['errors']:>5} {result['p50_ms']:>9} "
+            f"{result['p95_ms']:>9} {result['p99_ms']:>9} {result['throughput_rps']:>9} {result['avg_bytes']:>10}")
+
+def compare(report, baseline, max_regression):
+    # Endpoints whose p95 grew by more than max_regression (0.2 = 20 %)
+    previous = {result['endpoint']: result for result in baseline}
+    regressions = []
+    for result in report:
+        before = previous.get(result['endpoint'])
+        if before and before['p95_ms'] > 0 and result['p95_ms'] > before['p95_ms'] * (1 + max_regression):
+            regressions.append((result['endpoint'], before['p95_ms'], result['p95_ms']))
+    return regressions
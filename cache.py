@@ -0,0 +1,50 @@
+from src.utils.tenancy import PerTenant
+import threading
+import time
+
+class SnapshotCache:
+    # Holds one computed value per process. Writers call invalidate() after
+    # committing; the TTL bounds staleness for writes made by other workers
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.value = None
+        self.expires_at = 0.0
+        self.generation = 0
+
+    def get(self, compute, ttl):
+        with self.lock:
+            if self.value is not None and time.monotonic() < self.expires_at:
+                return self.value
+            generation = self.generation
+
+        value = compute()
+
+        with self.lock:
+            # Don't store a result computed before a concurrent invalidate()
+            if generation == self.generation:
+                self.value = value
+                self.expires_at = time.monotonic() + ttl
+        return value
+
+    async def get_async(self, compute, ttl):
+        # get() for a coroutine compute, awaited outside the lock
+        with self.lock:
+            if self.value is not None and time.monotonic() < self.expires_at:
+                return self.value
+            generation = self.generation
+
+        value = await compute()
+
+        with self.lock:
+            if generation == self.generation:
+                self.value = value
+                self.expires_at = time.monotonic() + ttl
+        return value
+
+    def invalidate(self):
+        with self.lock:
+            self.value = None
+            self.generation += 1
+
+dashboard_stats_cache = PerTenant(SnapshotCache)
@@ -0,0 +1,23 @@
+from src.models.user import db
+from datetime import datetime
+
+class ChangeLog(db.Model):
+    id = db.Column(db.Integer, primary_key=True)  # Monotonic sequence number clients sync from
+    entity = db.Column(db.String(20), nullable=False)  # machine, activity
+    entity_id = db.Column(db.String(50), nullable=False)
+    action = db.Column(db.String(20), nullable=False)  # created, updated, deleted
+    data = db.Column(db.JSON, nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+
+    def __repr__(self):
+        return f'<ChangeLog {self.id}: {self.entity} {self.entity_id} {self.action}>'
+
+    def to_dict(self):
+        return {
+            'seq': self.id,
+            'entity': self.entity,
+            'entity_id': self.entity_id,
+            'action': self.action,
+            'data': self.data,
+            'created_at': self.created_at.isoformat() if self.created_at else None
+        }
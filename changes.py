@@ -0,0 +1,55 @@
+from flask import Blueprint, request, jsonify, current_app
+from flask_jwt_extended import jwt_required
+from src.models.user import db
+from src.models.change_log import ChangeLog
+
+changes_bp = Blueprint('changes', __name__)
+
+DEFAULT_CHANGES_LIMIT = 500
+MAX_CHANGES_LIMIT = 5000
+
+@changes_bp.route('', methods=['GET'])
+@jwt_required()
+def get_changes():
+    try:
+        try:
+            since = int(request.args.get('since', 0))
+            limit = min(max(int(request.args.get('limit', DEFAULT_CHANGES_LIMIT)), 1), MAX_CHANGES_LIMIT)
+        except ValueError:
+            return jsonify({'error': 'since and limit must be integers'}), 400
+
+        oldest, newest = db.session.execute(
+            db.select(db.func.min(ChangeLog.id), db.func.max(ChangeLog.id))
+        ).one()
+        newest = newest or 0
+
+        # A client whose position was compacted away, or that is so far behind
+        # that replaying is slower than reloading, gets a snapshot token
+        # instead: refetch the full lists, then resume with since=<token>
+        compacted = oldest is not None and since < oldest - 1
+        if compacted or newest - since > current_app.config['CHANGE_FEED_MAX_LAG']:
+            return jsonify({
+                'error': 'Too far behind, reload the full lists and resume from snapshot_token',
+                'snapshot_required': True,
+                'snapshot_token': newest
+            }), 410
+
+        # Sequence numbers are committed in order (see record_changes), so
+        # everything visible after since can be returned at once
+        changes = ChangeLog.query \
+            .filter(ChangeLog.id > since) \
+            .order_by(ChangeLog.id) \
+            .limit(limit + 1) \
+            .all()
+
+        has_more = len(changes) > limit
+        changes = changes[:limit]
+
+        return jsonify({
+            'changes': [change.to_dict() for change in changes],
+            'next_since': changes[-1].id if changes else since,
+            'has_more': has_more
+        }), 200
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
@@ -0,0 +1,27 @@
+from src.models.user import db
+from datetime import datetime
+
+class CostLedger(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    activity_id = db.Column(db.Integer, unique=True, nullable=False)  # One entry per completed activity
+    machine_id = db.Column(db.String(50), nullable=False, index=True)
+    period = db.Column(db.String(7), nullable=False, index=True)  # YYYY-MM of completion
+    labor_cost = db.Column(db.Float, default=0.0)
+    parts_cost = db.Column(db.Float, default=0.0)
+    total_cost = db.Column(db.Float, default=0.0)
+    recorded_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f'<CostLedger {self.activity_id}: {self.machine_id} {self.period} {self.total_cost}>'
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'activity_id': self.activity_id,
+            'machine_id': self.machine_id,
+            'period': self.period,
+            'labor_cost': self.labor_cost,
+            'parts_cost': self.parts_cost,
+            'total_cost': self.total_cost,
+            'recorded_at': self.recorded_at.isoformat() if self.recorded_at else None
+        }
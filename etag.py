@@ -0,0 +1,73 @@
+from flask import request, make_response
+from functools import wraps
+from src.models.user import db
+from src.utils.async_db import async_db
+from src.utils.tenancy import current_tenant
+import hashlib
+
+def table_version_statement(*models):
+    # Row count and newest updated_at per table, read in a single SELECT.
+    # Any insert, update or delete through the API changes one of them
+    columns = []
+    for model in models:
+        columns.append(db.select(db.func.count()).select_from(model).scalar_subquery())
+        columns.append(db.select(db.func.max(model.updated_at)).scalar_subquery())
+    return db.select(*columns)
+
+def table_version(*models):
+    return db.session.execute(table_version_statement(*models)).one()
+
+def request_etag(version):
+    # Tenants can hold identical row counts and timestamps, so the tenant is
+    # part of the key and one tenant's tag never validates another's page
+    key = '|'.join([current_tenant(), request.endpoint, request.query_string.decode(), *map(str, version)])
+    return hashlib.sha1(key.encode()).hexdigest()
+
+def not_modified(etag):
+    # The 304 for a client that already holds this version, else None.
+    # Compressed representations carry their encoding as a suffix
+    for candidate in (etag, f'{etag}-gzip', f'{etag}-br'):
+        if request.if_none_match.contains(candidate):
+            response = make_response('', 304)
+            response.set_etag(candidate)
+            response.headers['Cache-Control'] = 'no-cache'
+            response.vary.add('Accept-Encoding')
+            return response
+    return None
+
+def tag(response, etag):
+    if response.status_code == 200:
+        encoding = response.headers.get('Content-Encoding')
+        response.set_etag(f'{etag}-{encoding}' if encoding else etag)
+        response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+def conditional(*models):
+    # Answers If-None-Match with 304 before the view loads or serializes any
+    # ORM objects; otherwise tags the view's 200 response with a strong ETag
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            etag = request_etag(table_version(*models))
+            response = not_modified(etag)
+            if response is None:
+                response = tag(make_response(view(*args, **kwargs)), etag)
+            return response
+        return wrapper
+    return decorator
+
+def conditional_async(*models):
+    # conditional() for the async views, reading the version through the
+    # async engine
+    def decorator(view):
+        @wraps(view)
+        async def wrapper(*args, **kwargs):
+            async with async_db.session() as session:
+                version = (await session.execute(table_version_statement(*models))).one()
+            etag = request_etag(version)
+            response = not_modified(etag)
+            if response is None:
+                response = tag(make_response(await view(*args, **kwargs)), etag)
+            return response
+        return wrapper
+    return decorator
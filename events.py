@@ -0,0 +1,50 @@
+from src.utils.tenancy import PerTenant
+import itertools
+import queue
+import threading
+
+class Subscriber:
+    def __init__(self, maxsize):
+        self.queue = queue.Queue(maxsize=maxsize)
+        self.dropped = False
+
+class EventHub:
+    # Per-process fan-out of change events to connected stream clients. Each
+    # client has a bounded queue; a client that falls behind is dropped
+    # rather than letting its backlog grow without limit
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.subscribers = set()
+        self.sequence = itertools.count(1)
+        self.stats = {'published': 0, 'dropped_clients': 0}
+
+    def subscribe(self, maxsize, max_clients):
+        with self.lock:
+            if len(self.subscribers) >= max_clients:
+                return None
+            subscriber = Subscriber(maxsize)
+            self.subscribers.add(subscriber)
+            return subscriber
+
+    def unsubscribe(self, subscriber):
+        with self.lock:
+            self.subscribers.discard(subscriber)
+
+    def publish(self, event_type, data):
+        with self.lock:
+            event = (next(self.sequence), event_type, data)
+            self.stats['published'] += 1
+            for subscriber in list(self.subscribers):
+                try:
+                    subscriber.queue.put_nowait(event)
+                except queue.Full:
+                    subscriber.dropped = True
+                    self.subscribers.discard(subscriber)
+                    self.stats['dropped_clients'] += 1
+
+    def metrics(self):
+        with self.lock:
+            return dict(self.stats, clients=len(self.subscribers))
+
+event_hub = PerTenant(EventHub)
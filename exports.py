@@ -0,0 +1,80 @@
+from flask import Blueprint, Response, request, jsonify, stream_with_context
+from flask_jwt_extended import jwt_required
+from src.models.user import db
+from src.models.machine import Machine
+from src.models.activity import Activity
+from src.models.archived_activity import ArchivedActivity
+from src.models.predictive_data import PredictiveData
+import csv
+import io
+import json
+
+exports_bp = Blueprint('exports', __name__)
+
+EXPORT_MODELS = {
+    'machines': Machine,
+    'activities': Activity,
+    'predictive': PredictiveData
+}
+
+# Archives exported ahead of the live table with ?include_archived=true
+EXPORT_ARCHIVES = {
+    'activities': ArchivedActivity
+}
+
+EXPORT_BATCH_SIZE = 1000
+
+def iter_rows(model):
+    # yield_per streams from a server-side cursor in fixed-size batches, so
+    # memory stays flat regardless of how many rows the table holds
+    statement = db.select(model).order_by(model.id).execution_options(yield_per=EXPORT_BATCH_SIZE)
+    for row in db.session.scalars(statement):
+        yield row.to_dict()
+
+def iter_sources(models):
+    for model in models:
+        yield from iter_rows(model)
+
+def generate_ndjson(models):
+    for row in iter_sources(models):
+        yield json.dumps(row) + '\n'
+
+def generate_csv(models):
+    buffer = io.StringIO()
+    writer = None
+    for row in iter_sources(models):
+        if writer is None:
+            writer = csv.DictWriter(buffer, fieldnames=list(row.keys()))
+            writer.writeheader()
+        writer.writerow(row)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate(0)
+
+@exports_bp.route('/<resource>', methods=['GET'])
+@jwt_required()
+def export_resource(resource):
+    try:
+        model = EXPORT_MODELS.get(resource)
+        if not model:
+            return jsonify({'error': f"Unknown export '{resource}'"}), 404
+
+        models = [model]
+        if resource in EXPORT_ARCHIVES and request.args.get('include_archived', 'false').lower() in ('1', 'true', 'yes'):
+            models.insert(0, EXPORT_ARCHIVES[resource])
+
+        export_format = request.args.get('format', 'ndjson')
+        if export_format == 'ndjson':
+            generator, mimetype = generate_ndjson(models), 'application/x-ndjson'
+        elif export_format == 'csv':
+            generator, mimetype = generate_csv(models), 'text/csv'
+        else:
+            return jsonify({'error': 'Format must be ndjson or csv'}), 400
+
+        response = Response(stream_with_context(generator), mimetype=mimetype)
+        response.headers['Content-Disposition'] = f'attachment; filename={resource}.{export_format}'
+        response.headers['X-Accel-Buffering'] = 'no'
+        return response
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
@@ -0,0 +1,60 @@
+from flask import current_app
+from flask_jwt_extended import get_jwt_identity
+from src.models.user import User, db
+from src.utils.tenancy import PerTenant
+from collections import OrderedDict
+import threading
+import time
+
+class IdentityCache:
+    # LRU of serialized users keyed by JWT subject, each entry valid for a
+    # TTL. The users blueprint invalidates entries it changes; the TTL
+    # bounds staleness for changes made by other workers
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, subject):
+        with self.lock:
+            entry = self.entries.get(subject)
+            if entry is not None and time.monotonic() < entry[0]:
+                self.entries.move_to_end(subject)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+            return None
+
+    def put(self, subject, identity, ttl, maxsize):
+        with self.lock:
+            self.entries[subject] = (time.monotonic() + ttl, identity)
+            self.entries.move_to_end(subject)
+            while len(self.entries) > maxsize:
+                self.entries.popitem(last=False)
+
+    def invalidate(self, subject):
+        with self.lock:
+            self.entries.pop(str(subject), None)
+
+# User ids are only unique within a tenant, hence a cache per tenant
+identity_cache = PerTenant(IdentityCache)
+
+def load_identity(subject):
+    identity = identity_cache.get(subject)
+    if identity is None:
+        user = db.session.get(User, int(subject))
+        if user is None:
+            return None
+        identity = user.to_dict()
+        identity_cache.put(
+            subject, identity,
+            current_app.config['IDENTITY_CACHE_TTL'],
+            current_app.config['IDENTITY_CACHE_SIZE']
+        )
+    return identity
+
+def current_identity():
+    # Serialized user for the request's JWT subject, or None
+    return load_identity(get_jwt_identity())
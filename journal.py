@@ -0,0 +1,61 @@
+from flask import current_app
+from src.models.user import db
+from src.models.change_log import ChangeLog
+from src.utils.tenancy import current_tenant
+from datetime import datetime, timedelta
+import threading
+import time
+
+compaction_lock = threading.Lock()
+# Per tenant, since each tenant's journal lives in its own database
+next_compaction = {}
+
+def record_change(entity, action, entity_id, data=None):
+    # Adds the journal entry to the caller's session so it commits, or rolls
+    # back, together with the change it describes
+    record_changes(entity, action, [(entity_id, data)])
+
+# Advisory lock serializing journal writers on PostgreSQL
+JOURNAL_LOCK_KEY = 0x6d61696e7461
+
+def record_changes(entity, action, changes):
+    if not changes:
+        return
+    # Sequence numbers must become visible in order, or a feed reader could
+    # pass over a lower one whose transaction hadn't committed yet. SQLite
+    # runs one write transaction at a time; on PostgreSQL the lock is held
+    # until this transaction ends, so the next writer takes its numbers
+    # only after these are committed
+    if db.session.get_bind().dialect.name == 'postgresql':
+        db.session.execute(db.select(db.func.pg_advisory_xact_lock(JOURNAL_LOCK_KEY)))
+    now = datetime.utcnow()
+    db.session.execute(db.insert(ChangeLog), [{
+        'entity': entity,
+        'entity_id': str(entity_id),
+        'action': action,
+        'data': data,
+        'created_at': now
+    } for entity_id, data in changes])
+    maybe_compact()
+
+def maybe_compact():
+    # At most once per interval per process and tenant, piggybacking on a
+    # write transaction that is already open
+    tenant = current_tenant()
+    with compaction_lock:
+        if time.monotonic() < next_compaction.get(tenant, 0.0):
+            return
+        next_compaction[tenant] = time.monotonic() + current_app.config['CHANGE_LOG_COMPACT_INTERVAL']
+    compact(timedelta(days=current_app.config['CHANGE_LOG_RETENTION_DAYS']))
+
+def compact(retention):
+    # Entries older than the retention window are deleted, except the newest
+    # one, which keeps the current sequence number visible
+    newest = db.session.scalar(db.select(db.func.max(ChangeLog.id)))
+    if newest is None:
+        return 0
+    result = db.session.execute(db.delete(ChangeLog).where(
+        ChangeLog.created_at < datetime.utcnow() - retention,
+        ChangeLog.id < newest
+    ))
+    return result.rowcount
@@ -0,0 +1,155 @@
+from src.models.user import db
+from src.models.activity import Activity
+from src.models.archived_activity import ArchivedActivity
+from src.models.cost_ledger import CostLedger
+from src.models.monthly_cost import MonthlyCost
+from src.utils.upsert import upsert
+from datetime import datetime
+
+ALL_MACHINES = '*'
+
+SUMMED_COLUMNS = ('labor_cost', 'parts_cost', 'total_cost', 'activity_count')
+
+def period_of(moment):
+    return moment.strftime('%Y-%m')
+
+def period_expression(column, dialect_name):
+    # SQL equivalent of period_of() for the set-based rebuild
+    if dialect_name == 'sqlite':
+        return db.func.strftime('%Y-%m', column)
+    if dialect_name == 'postgresql':
+        return db.func.to_char(column, 'YYYY-MM')
+    if dialect_name in ('mysql', 'mariadb'):
+        return db.func.date_format(column, '%Y-%m')
+    raise ValueError(f'Cost ledger rebuild does not support {dialect_name}')
+
+def ledger_entry(activity):
+    # The ledger row an activity should have: completed work on a machine.
+    # Costs are booked in the month the work was completed
+    if activity is None or activity.status != 'completed' or not activity.machine_id:
+        return None
+    labor_cost = activity.labor_cost or 0.0
+    parts_cost = activity.parts_cost or 0.0
+    return {
+        'activity_id': activity.id,
+        'machine_id': activity.machine_id,
+        'period': period_of(activity.completed_at or activity.timestamp or datetime.utcnow()),
+        'labor_cost': labor_cost,
+        'parts_cost': parts_cost,
+        'total_cost': labor_cost + parts_cost
+    }
+
+def sync_activity_costs(activities, deleted_ids=()):
+    # Brings the ledger rows of these activities in line with their current
+    # state and moves the monthly totals by the difference. Runs in the
+    # caller's session so it commits, or rolls back, with the activity change
+    desired = {activity.id: ledger_entry(activity) for activity in activities}
+    desired.update({activity_id: None for activity_id in deleted_ids})
+    if not desired:
+        return
+
+    existing = {
+        row.activity_id: row
+        for row in CostLedger.query.filter(CostLedger.activity_id.in_(list(desired)))
+    }
+
+    deltas = {}
+    def book(entry, sign):
+        for machine_id in (entry['machine_id'], ALL_MACHINES):
+            delta = deltas.setdefault((machine_id, entry['period']), dict.fromkeys(SUMMED_COLUMNS, 0))
+            delta['labor_cost'] += sign * entry['labor_cost']
+            delta['parts_cost'] += sign * entry['parts_cost']
+            delta['total_cost'] += sign * entry['total_cost']
+            delta['activity_count'] += sign
+
+    for activity_id, entry in desired.items():
+        row = existing.get(activity_id)
+        current = None
+        if row is not None:
+            current = {
+                'activity_id': row.activity_id, 'machine_id': row.machine_id, 'period': row.period,
+                'labor_cost': row.labor_cost, 'parts_cost': row.parts_cost, 'total_cost': row.total_cost
+            }
+        if current == entry:
+            continue
+        if current is not None:
+            book(current, -1)
+        if entry is not None:
+            book(entry, 1)
+
+        # Updated in place rather than deleted and re-added, since the unit
+        # of work would insert the new row before deleting the old one
+        if row is None:
+            db.session.add(CostLedger(**entry))
+        elif entry is None:
+            db.session.delete(row)
+        else:
+            for key, value in entry.items():
+                setattr(row, key, value)
+            row.recorded_at = datetime.utcnow()
+
+    apply_deltas(deltas)
+
+def apply_deltas(deltas):
+    deltas = {key: delta for key, delta in deltas.items() if any(delta.values())}
+    if not deltas:
+        return
+    now = datetime.utcnow()
+    rows = [dict(delta, machine_id=machine_id, period=period, updated_at=now)
+            for (machine_id, period), delta in deltas.items()]
+    table = MonthlyCost.__table__
+
+    # Adds each delta to the stored totals in one executemany
+    statement = upsert(MonthlyCost, [table.c.machine_id, table.c.period], ['updated_at'], summed_columns=SUMMED_COLUMNS)
+    if statement is not None:
+        db.session.execute(statement, rows)
+    else:
+        for row in rows:
+            result = db.session.execute(
+                db.update(MonthlyCost)
+                .where(MonthlyCost.machine_id == row['machine_id'], MonthlyCost.period == row['period'])
+                .values({**{column: table.c[column] + row[column] for column in SUMMED_COLUMNS}, 'updated_at': now})
+            )
+            if result.rowcount == 0:
+                db.session.execute(db.insert(MonthlyCost), [row])
+
+    # Months that lost their last activity disappear instead of lingering at 0
+    db.session.execute(db.delete(MonthlyCost).where(
+        MonthlyCost.activity_count <= 0,
+        MonthlyCost.machine_id.in_({machine_id for machine_id, _ in deltas})
+    ))
+
+def rebuild_cost_ledger():
+    # Recomputes the ledger and monthly totals from the live and archived
+    # activities with set-based INSERT ... SELECT statements, e.g. after
+    # bulk-loading activities or adding the cost columns to an existing database
+    dialect_name = db.session.get_bind().dialect.name
+    now = db.literal(datetime.utcnow(), db.DateTime)
+
+    db.session.execute(db.delete(MonthlyCost))
+    db.session.execute(db.delete(CostLedger))
+    for model in (Activity, ArchivedActivity):
+        completed_at = db.func.coalesce(model.completed_at, model.timestamp)
+        labor_cost = db.func.coalesce(model.labor_cost, 0.0)
+        parts_cost = db.func.coalesce(model.parts_cost, 0.0)
+        db.session.execute(db.insert(CostLedger).from_select(
+            ['activity_id', 'machine_id', 'period', 'labor_cost', 'parts_cost', 'total_cost', 'recorded_at'],
+            db.select(
+                model.id, model.machine_id, period_expression(completed_at, dialect_name),
+                labor_cost, parts_cost, labor_cost + parts_cost, now
+            ).where(model.status == 'completed', model.machine_id.is_not(None))
+        ))
+
+    columns = ['machine_id', 'period', *SUMMED_COLUMNS, 'updated_at']
+    sums = [
+        db.func.sum(CostLedger.labor_cost), db.func.sum(CostLedger.parts_cost),
+        db.func.sum(CostLedger.total_cost), db.func.count()
+    ]
+    db.session.execute(db.insert(MonthlyCost).from_select(columns, db.select(
+        CostLedger.machine_id, CostLedger.period, *sums, now
+    ).group_by(CostLedger.machine_id, CostLedger.period)))
+    db.session.execute(db.insert(MonthlyCost).from_select(columns, db.select(
+        db.literal(ALL_MACHINES), CostLedger.period, *sums, now
+    ).group_by(CostLedger.period)))
+
+    return db.session.scalar(db.select(db.func.count()).select_from(CostLedger))
@@ -4,13 +4,13 @@ from datetime import datetime
 class Machine(db.Model):
     id = db.Column(db.String(50), primary_key=True)  # Machine ID like "MACHINE-001"
     name = db.Column(db.String(100), nullable=False)
-    status = db.Column(db.String(20), default='operational')  # operational, warning, maintenance
+    status = db.Column(db.String(20), default='operational', index=True)  # operational, warning, maintenance
     efficiency = db.Column(db.Float, default=100.0)
     temperature = db.Column(db.Float, default=25.0)
     vibration = db.Column(db.Float, default=0.5)
     last_maintenance = db.Column(db.String(50), default='2024-01-15')
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
-    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)
 
     def __repr__(self):
         return f'<Machine {self.id}>'
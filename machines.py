@@ -2,16 +2,31 @@ from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from src.models.user import User, db
 from src.models.machine import Machine
+from src.utils.cache import dashboard_stats_cache
+from src.utils.events import event_hub
+from src.utils.journal import record_change, record_changes
+from src.utils.etag import conditional
+from src.utils.serialization import MACHINE_FIELDS, requested_fields, rows_to_dicts, json_response
+from src.utils.upsert import upsert
+from datetime import datetime
 import random
+import time
 
 machines_bp = Blueprint('machines', __name__)
 
 @machines_bp.route('/', methods=['GET'])
 @jwt_required()
+@conditional(Machine)
 def get_machines():
     try:
-        machines = Machine.query.all()
-        return jsonify([machine.to_dict() for machine in machines]), 200
+        try:
+            fields = requested_fields(MACHINE_FIELDS)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+
+        # Plain row tuples straight from Core, no ORM instances or to_dict()
+        rows = db.session.execute(db.select(*(MACHINE_FIELDS[field] for field in fields)).order_by(Machine.id))
+        return json_response(rows_to_dicts(fields, rows))
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -41,7 +56,11 @@ def create_machine():
         )
 
         db.session.add(machine)
+        db.session.flush()
+        record_change('machine', 'created', machine.id, machine.to_dict())
         db.session.commit()
+        dashboard_stats_cache.invalidate()
+        event_hub.publish('machine.created', machine.to_dict())
 
         return jsonify(machine.to_dict()), 201
 
@@ -49,6 +68,136 @@ def create_machine():
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
+MAX_BULK_MACHINES = 10000
+EXISTENCE_CHUNK_SIZE = 500
+
+MACHINE_DEFAULTS = {
+    'status': 'operational',
+    'efficiency': 100.0,
+    'temperature': 25.0,
+    'vibration': 0.5,
+    'last_maintenance': '2024-01-15'
+}
+
+# Columns the bulk upsert overwrites on an existing machine
+UPSERT_COLUMNS = ['name', 'status', 'efficiency', 'temperature', 'vibration', 'last_maintenance', 'updated_at']
+
+def load_existing_machines(machine_ids):
+    # One IN query per chunk instead of one lookup per machine; chunking keeps
+    # the bound parameter count under SQLite's limit
+    existing = {}
+    for start in range(0, len(machine_ids), EXISTENCE_CHUNK_SIZE):
+        chunk = machine_ids[start:start + EXISTENCE_CHUNK_SIZE]
+        for machine in Machine.query.filter(Machine.id.in_(chunk)):
+            existing[machine.id] = machine
+    return existing
+
+@machines_bp.route('/bulk', methods=['POST'])
+@jwt_required()
+def bulk_upsert_machines():
+    try:
+        started = time.perf_counter()
+        data = request.get_json()
+
+        if not isinstance(data, list):
+            return jsonify({'error': 'Request body must be an array of machines'}), 400
+        if len(data) > MAX_BULK_MACHINES:
+            return jsonify({'error': f'At most {MAX_BULK_MACHINES} machines per request'}), 400
+
+        results = [None] * len(data)
+        valid = {}
+        for index, machine_data in enumerate(data):
+            machine_id = machine_data.get('id') if isinstance(machine_data, dict) else None
+            if not machine_id:
+                results[index] = {'id': machine_id, 'result': 'error', 'error': 'Machine ID is required'}
+                continue
+            if not isinstance(machine_id, str):
+                results[index] = {'id': machine_id, 'result': 'error', 'error': 'Machine ID must be a string'}
+                continue
+            if machine_id in valid:
+                results[index] = {'id': machine_id, 'result': 'error', 'error': 'Duplicate machine ID in request'}
+                continue
+            try:
+                for field in ('efficiency', 'temperature', 'vibration'):
+                    if machine_data.get(field) is not None:
+                        machine_data[field] = float(machine_data[field])
+            except (TypeError, ValueError):
+                results[index] = {'id': machine_id, 'result': 'error', 'error': 'Efficiency, temperature and vibration must be numbers'}
+                continue
+            if any(machine_data.get(field) is not None and not isinstance(machine_data[field], str)
+                   for field in ('name', 'status', 'last_maintenance')):
+                results[index] = {'id': machine_id, 'result': 'error', 'error': 'Name, status and last_maintenance must be strings'}
+                continue
+            valid[machine_id] = (index, machine_data)
+
+        existing = load_existing_machines(list(valid))
+
+        now = datetime.utcnow()
+        rows = []
+        for machine_id, (index, machine_data) in valid.items():
+            current = existing.get(machine_id)
+            if current:
+                base = {field: getattr(current, field) for field in MACHINE_DEFAULTS}
+                base['name'] = current.name
+                base['created_at'] = current.created_at
+            else:
+                if not machine_data.get('name'):
+                    results[index] = {'id': machine_id, 'result': 'error', 'error': 'Name is required for new machines'}
+                    continue
+                base = dict(MACHINE_DEFAULTS, created_at=now)
+            row = {'id': machine_id, 'updated_at': now}
+            for field in ('name', *MACHINE_DEFAULTS):
+                value = machine_data.get(field)
+                row[field] = value if value is not None else base.get(field)
+            row['created_at'] = base['created_at']
+            rows.append(row)
+            results[index] = {'id': machine_id, 'result': 'updated' if current else 'created'}
+
+        if rows:
+            # Existing instances were only needed for the merge above; drop them so
+            # the session doesn't hold stale copies of the rows we are about to write
+            for machine in existing.values():
+                db.session.expunge(machine)
+
+            statement = upsert(Machine, [Machine.id], UPSERT_COLUMNS)
+            if statement is not None:
+                db.session.execute(statement, rows)
+            else:
+                created = [row for row in rows if row['id'] not in existing]
+                updated = [row for row in rows if row['id'] in existing]
+                if created:
+                    db.session.execute(db.insert(Machine), created)
+                if updated:
+                    db.session.execute(db.update(Machine), updated)
+
+            # Transient instances only to reuse to_dict() for the journal payload
+            for action, is_update in (('created', False), ('updated', True)):
+                record_changes('machine', action, [
+                    (row['id'], Machine(**row).to_dict()) for row in rows if (row['id'] in existing) == is_update
+                ])
+            db.session.commit()
+            dashboard_stats_cache.invalidate()
+            # One event for the whole batch rather than one per row, so a large
+            # upsert doesn't overflow every stream client's queue
+            event_hub.publish('machine.batch', {
+                'created': [row['id'] for row in rows if row['id'] not in existing],
+                'updated': [row['id'] for row in rows if row['id'] in existing]
+            })
+
+        elapsed = time.perf_counter() - started
+        return jsonify({
+            'results': results,
+            'created': sum(1 for result in results if result['result'] == 'created'),
+            'updated': sum(1 for result in results if result['result'] == 'updated'),
+            'errors': sum(1 for result in results if result['result'] == 'error'),
+            'elapsed_ms': round(elapsed * 1000, 2),
+            'rows_per_second': round(len(rows) / elapsed, 1) if elapsed > 0 else None
+        }), 200
+
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
 @machines_bp.route('/<machine_id>', methods=['GET'])
 @jwt_required()
 def get_machine(machine_id):
@@ -72,7 +221,11 @@ def update_machine(machine_id):
         machine.vibration = data.get('vibration', machine.vibration)
         machine.last_maintenance = data.get('last_maintenance', machine.last_maintenance)
 
+        db.session.flush()
+        record_change('machine', 'updated', machine.id, machine.to_dict())
         db.session.commit()
+        dashboard_stats_cache.invalidate()
+        event_hub.publish('machine.updated', machine.to_dict())
         return jsonify(machine.to_dict()), 200
 
     except Exception as e:
@@ -85,7 +238,10 @@ def delete_machine(machine_id):
     try:
         machine = Machine.query.get_or_404(machine_id)
         db.session.delete(machine)
+        record_change('machine', 'deleted', machine_id)
         db.session.commit()
+        dashboard_stats_cache.invalidate()
+        event_hub.publish('machine.deleted', {'id': machine_id})
         return jsonify({'message': 'Machine deleted successfully'}), 200
 
     except Exception as e:
@@ -136,10 +292,12 @@ def generate_sample_machines():
             }
         ]
 
+        # Check which machines already exist with a single query
+        existing = load_existing_machines([machine_data['id'] for machine_data in sample_machines])
+
         created_machines = []
         for machine_data in sample_machines:
-            # Check if machine already exists
-            if not Machine.query.get(machine_data['id']):
+            if machine_data['id'] not in existing:
                 machine = Machine(
                     id=machine_data['id'],
                     name=machine_data['name'],
@@ -150,12 +308,17 @@ def generate_sample_machines():
                     last_maintenance=machine_data['last_maintenance']
                 )
                 db.session.add(machine)
-                created_machines.append(machine_data['id'])
+                created_machines.append(machine)
 
+        db.session.flush()
+        record_changes('machine', 'created', [(machine.id, machine.to_dict()) for machine in created_machines])
         db.session.commit()
+        dashboard_stats_cache.invalidate()
+        if created_machines:
+            event_hub.publish('machine.batch', {'created': [machine.id for machine in created_machines], 'updated': []})
         return jsonify({
             'message': f'Created {len(created_machines)} sample machines',
-            'machines': created_machines
+            'machines': [machine.id for machine in created_machines]
         }), 201
 
     except Exception as e:
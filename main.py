@@ -1,82 +1,310 @@
 import os
 import sys
+import click
+import time
+from datetime import timedelta
 # DON\'T CHANGE THIS !!!
 sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
 
-from flask import Flask, send_from_directory
+from flask import Flask, current_app
+from flask.cli import AppGroup, with_appcontext
 from flask_cors import CORS
 from flask_jwt_extended import JWTManager
+from sqlalchemy.exc import IntegrityError
 from src.models.user import db, bcrypt
-from src.models.machine import Machine
-from src.models.activity import Activity
-from src.models.predictive_data import PredictiveData
-from src.routes.user import user_bp
-from src.routes.auth import auth_bp
-from src.routes.machines import machines_bp
-from src.routes.activities import activities_bp
-from src.routes.analytics import analytics_bp
-
-app = Flask(__name__, static_folder=os.path.join(os.path.dirname(__file__), 'static'))
-app.config['SECRET_KEY'] = os.getenv('SECRET_KEY', 'maintai-secret-key-2024')
-app.config['JWT_SECRET_KEY'] = os.getenv('JWT_SECRET_KEY', 'maintai-jwt-secret-key-2024')
-
-# Enable CORS for all routes
-CORS(app, origins="*")
-
-# Initialize JWT and Bcrypt
-jwt = JWTManager(app)
-bcrypt.init_app(app)
-
-# Register blueprints
-app.register_blueprint(auth_bp, url_prefix='/api/auth')
-app.register_blueprint(user_bp, url_prefix='/api/users')
-app.register_blueprint(machines_bp, url_prefix='/api/machines')
-app.register_blueprint(activities_bp, url_prefix='/api/activities')
-app.register_blueprint(analytics_bp, url_prefix='/api/analytics')
-
-# Database configuration - using PostgreSQL
-app.config['SQLALCHEMY_DATABASE_URI'] = os.getenv('DATABASE_URL', f"sqlite:///{os.path.join(os.path.dirname(__file__), 'database', 'app.db')}")
-app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
-db.init_app(app)
-
-# This block will only run when the app context is pushed, which happens on startup
-with app.app_context():
-    db.create_all()
-
-    # Create default admin user if it doesn\'t exist
-    admin_user = User.query.filter_by(username='admin').first()
-    if not admin_user:
-        admin_user = User(
-            username='admin',
-            email='admin@maintai.com',
-            role='admin'
-        )
-        admin_user.set_password('password')
-        db.session.add(admin_user)
+from src.utils.recompute import predictive_recomputer
+from src.utils import metrics, routing, tenancy
+from src.utils.tenancy import tenant_option, tenant_schema, current_tenant
+from src.utils.assets import StaticManifest, static_assets
+
+def load_config(app):
+    # Database configuration - using PostgreSQL
+    app.config['SQLALCHEMY_DATABASE_URI'] = os.getenv('DATABASE_URL', f"sqlite:///{os.path.join(os.path.dirname(__file__), 'database', 'app.db')}")
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = routing.engine_options('DB')
+
+    # Optional read replica: SELECTs issued by GET/HEAD requests go to
+    # DATABASE_READ_URL, everything else to DATABASE_URL. After a write the
+    # client keeps reading from the primary for READ_YOUR_WRITES_SECONDS
+    app.config['DATABASE_READ_URL'] = os.getenv('DATABASE_READ_URL')
+    app.config['READ_YOUR_WRITES_SECONDS'] = float(os.getenv('READ_YOUR_WRITES_SECONDS', '5'))
+    if app.config['DATABASE_READ_URL']:
+        app.config['SQLALCHEMY_BINDS'] = {
+            'replica': dict(routing.engine_options('DB_READ'), url=app.config['DATABASE_READ_URL'])
+        }
+
+    # Tenants: JSON object mapping each tenant to its own database URL (or
+    # {"url": ..., "schema": ...} for a PostgreSQL schema), each with its own
+    # connection pool. Tokens carry the tenant; requests without one use
+    # the X-Tenant header, else the default tenant on DATABASE_URL
+    app.config['TENANT_DATABASES'] = os.getenv('TENANT_DATABASES', '{}')
+
+    # Telemetry ingestion: seconds between bulk flushes, how many buffered
+    # machines trigger an early flush, and the minimum seconds between two
+    # change journal entries for one machine's telemetry
+    app.config['TELEMETRY_FLUSH_INTERVAL'] = float(os.getenv('TELEMETRY_FLUSH_INTERVAL', '1.0'))
+    app.config['TELEMETRY_MAX_BUFFER'] = int(os.getenv('TELEMETRY_MAX_BUFFER', '5000'))
+    app.config['TELEMETRY_JOURNAL_INTERVAL'] = float(os.getenv('TELEMETRY_JOURNAL_INTERVAL', '60'))
+
+    # Dashboard stats are served from an in-process snapshot for up to this many
+    # seconds; writes through the API invalidate it immediately
+    app.config['DASHBOARD_STATS_TTL'] = float(os.getenv('DASHBOARD_STATS_TTL', '30'))
+
+    # Version of the failure-probability model used to score predictive data
+    app.config['SCORING_MODEL'] = os.getenv('SCORING_MODEL', 'logistic-v1')
+
+    # Background predictive recompute. Set the interval to 0 to disable the
+    # in-process thread and run `flask recompute-predictive --loop` instead
+    app.config['PREDICTIVE_RECOMPUTE_INTERVAL'] = float(os.getenv('PREDICTIVE_RECOMPUTE_INTERVAL', '60'))
+    app.config['PREDICTIVE_RECOMPUTE_BATCH_SIZE'] = int(os.getenv('PREDICTIVE_RECOMPUTE_BATCH_SIZE', '500'))
+    app.config['PREDICTIVE_RECOMPUTE_WORKERS'] = int(os.getenv('PREDICTIVE_RECOMPUTE_WORKERS', '1'))
+    app.config['PREDICTIVE_RECOMPUTE_MAX_PER_RUN'] = int(os.getenv('PREDICTIVE_RECOMPUTE_MAX_PER_RUN', '50000'))
+    app.config['PREDICTIVE_MAX_AGE'] = float(os.getenv('PREDICTIVE_MAX_AGE', '86400'))
+
+    # Activity archival: age in days before a completed activity is archived,
+    # rows moved per batch transaction and seconds to pause between batches
+    app.config['ARCHIVE_AFTER_DAYS'] = float(os.getenv('ARCHIVE_AFTER_DAYS', '365'))
+    app.config['ARCHIVE_BATCH_SIZE'] = int(os.getenv('ARCHIVE_BATCH_SIZE', '500'))
+    app.config['ARCHIVE_BATCH_PAUSE'] = float(os.getenv('ARCHIVE_BATCH_PAUSE', '0.5'))
+
+    # List responses larger than this many bytes are gzip/brotli compressed
+    app.config['COMPRESSION_MIN_SIZE'] = int(os.getenv('COMPRESSION_MIN_SIZE', '1024'))
+    app.config['COMPRESSION_LEVEL'] = int(os.getenv('COMPRESSION_LEVEL', '5'))
+
+    # Requests slower than this are logged with their SQL; 0 disables the log
+    app.config['SLOW_REQUEST_THRESHOLD_MS'] = float(os.getenv('SLOW_REQUEST_THRESHOLD_MS', '0'))
+
+    # Server-Sent Events: per-client queue bound, client cap per worker,
+    # keepalive interval and lifetime of ?jwt= stream tokens in seconds
+    app.config['STREAM_QUEUE_SIZE'] = int(os.getenv('STREAM_QUEUE_SIZE', '256'))
+    app.config['STREAM_MAX_CLIENTS'] = int(os.getenv('STREAM_MAX_CLIENTS', '5000'))
+    app.config['STREAM_HEARTBEAT'] = float(os.getenv('STREAM_HEARTBEAT', '15'))
+    app.config['STREAM_TOKEN_TTL'] = int(os.getenv('STREAM_TOKEN_TTL', '60'))
+
+    # ASGI serving (src/asgi.py): threads running the sync routes per worker.
+    # Open event streams and exports each hold one while they last
+    app.config['ASGI_THREADS'] = int(os.getenv('ASGI_THREADS', '32'))
+
+    # Change journal for GET /api/changes: retention, how often writers compact
+    # it, and how far behind a client may be before it must snapshot
+    app.config['CHANGE_LOG_RETENTION_DAYS'] = float(os.getenv('CHANGE_LOG_RETENTION_DAYS', '7'))
+    app.config['CHANGE_LOG_COMPACT_INTERVAL'] = float(os.getenv('CHANGE_LOG_COMPACT_INTERVAL', '3600'))
+    app.config['CHANGE_FEED_MAX_LAG'] = int(os.getenv('CHANGE_FEED_MAX_LAG', '50000'))
+
+    # bcrypt runs on at most BCRYPT_MAX_CONCURRENCY threads; up to
+    # BCRYPT_MAX_PENDING more requests wait BCRYPT_QUEUE_TIMEOUT seconds for a
+    # slot before getting a 503
+    app.config['BCRYPT_MAX_CONCURRENCY'] = int(os.getenv('BCRYPT_MAX_CONCURRENCY', str(max(1, (os.cpu_count() or 2) // 2))))
+    app.config['BCRYPT_MAX_PENDING'] = int(os.getenv('BCRYPT_MAX_PENDING', '64'))
+    app.config['BCRYPT_QUEUE_TIMEOUT'] = float(os.getenv('BCRYPT_QUEUE_TIMEOUT', '10'))
+
+    # Maintenance scheduler: jobs per technician per day, how many recent
+    # activities decide technician assignment, how often the in-memory plan
+    # checks the database for changes, and how often it is rebuilt from
+    # scratch rather than updated in place
+    app.config['SCHEDULER_TECHNICIAN_CAPACITY'] = int(os.getenv('SCHEDULER_TECHNICIAN_CAPACITY', '4'))
+    app.config['SCHEDULER_HISTORY_SIZE'] = int(os.getenv('SCHEDULER_HISTORY_SIZE', '50000'))
+    app.config['SCHEDULER_SYNC_INTERVAL'] = float(os.getenv('SCHEDULER_SYNC_INTERVAL', '1'))
+    app.config['SCHEDULER_REBUILD_INTERVAL'] = float(os.getenv('SCHEDULER_REBUILD_INTERVAL', '3600'))
+
+    # Cached user identity per JWT subject for /api/auth/me and role checks
+    app.config['IDENTITY_CACHE_TTL'] = float(os.getenv('IDENTITY_CACHE_TTL', '60'))
+    app.config['IDENTITY_CACHE_SIZE'] = int(os.getenv('IDENTITY_CACHE_SIZE', '10000'))
+
+    # Create tables and the default admin user when the app is created, as a
+    # convenience for single-process development. Deployments leave this off
+    # and run `flask maintai init-db` once instead
+    app.config['AUTO_INIT_DB'] = os.getenv('AUTO_INIT_DB', 'false').lower() in ('1', 'true', 'yes')
+
+def register_blueprints(app):
+    # Imported here rather than at module level so importing src.main (e.g.
+    # from the CLI) doesn't load every route module's dependencies up front
+    from src.routes.user import user_bp
+    from src.routes.auth import auth_bp
+    from src.routes.machines import machines_bp
+    from src.routes.activities import activities_bp
+    from src.routes.analytics import analytics_bp
+    from src.routes.exports import exports_bp
+    from src.routes.telemetry import telemetry_bp
+    from src.routes.stream import stream_bp
+    from src.routes.changes import changes_bp
+
+    app.register_blueprint(auth_bp, url_prefix='/api/auth')
+    app.register_blueprint(user_bp, url_prefix='/api/users')
+    app.register_blueprint(machines_bp, url_prefix='/api/machines')
+    app.register_blueprint(activities_bp, url_prefix='/api/activities')
+    app.register_blueprint(analytics_bp, url_prefix='/api/analytics')
+    app.register_blueprint(exports_bp, url_prefix='/api/exports')
+    app.register_blueprint(telemetry_bp, url_prefix='/api/telemetry')
+    app.register_blueprint(stream_bp, url_prefix='/api/stream')
+    app.register_blueprint(changes_bp, url_prefix='/api/changes')
+
+def init_db(admin_username='admin', admin_password='password'):
+    # Creates missing tables and indexes and the default admin user in the
+    # current tenant's database. Safe to rerun, and to run from several
+    # instances at once: a losing admin insert is ignored
+    from src.models.user import User
+    # Imported for their side effect of registering tables on db.metadata
+    from src.models import machine, activity, archived_activity, predictive_data, change_log, cost_ledger, monthly_cost
+    from src.utils.schema import upgrade_schema
+    from src.utils.search import install_search_index
+
+    schema = tenant_schema(current_tenant())
+    if schema:
+        db.session.execute(db.text(f'CREATE SCHEMA IF NOT EXISTS "{schema}"'))
+    # On the session's connection rather than db.create_all(), which
+    # always targets the default database
+    db.metadata.create_all(db.session.connection())
+    upgrade_schema()
+    install_search_index()
+    db.session.commit()
+
+    if User.query.filter_by(username=admin_username).first():
+        return False
+    admin_user = User(
+        username=admin_username,
+        email=f'{admin_username}@maintai.com',
+        role='admin'
+    )
+    admin_user.set_password(admin_password)
+    db.session.add(admin_user)
+    try:
         db.session.commit()
-        print("Default admin user created: admin/password")
+    except IntegrityError:
+        db.session.rollback()
+        return False
+    return True
 
-@app.route('/', defaults={'path': ''})
-@app.route('/<path:path>')
-def serve_static_files(path):
-    if path != "" and os.path.exists(app.static_folder + '/' + path):
-        return send_from_directory(app.static_folder, path)
-    else:
-        return send_from_directory(app.static_folder, 'index.html')
-def serve(path):
-    static_folder_path = app.static_folder
-    if static_folder_path is None:
-            return "Static folder not configured", 404
-
-    if path != "" and os.path.exists(os.path.join(static_folder_path, path)):
-        return send_from_directory(static_folder_path, path)
+maintai_cli = AppGroup('maintai', help='MaintAI database and maintenance commands.')
+
+@maintai_cli.command('init-db')
+@tenant_option
+@click.option('--admin-username', default='admin', help='Username of the bootstrap admin.')
+@click.option('--admin-password', default='password', envvar='MAINTAI_ADMIN_PASSWORD', help='Password of the bootstrap admin.')
+def init_db_command(admin_username, admin_password):
+    if init_db(admin_username, admin_password):
+        click.echo(f'Created tables and default admin user: {admin_username}')
     else:
-        index_path = os.path.join(static_folder_path, 'index.html')
-        if os.path.exists(index_path):
-            return send_from_directory(static_folder_path, 'index.html')
-        else:
-            return "index.html not found", 404
+        click.echo('Created missing tables and indexes; admin user already exists')
+
+@maintai_cli.command('build-static')
+def build_static_command():
+    manifest = StaticManifest.scan(current_app.static_folder)
+    manifest.write()
+    static_assets.reset()
+    click.echo(f'Wrote {len(manifest.assets)} assets to {current_app.static_folder}')
+
+@maintai_cli.command('rebuild-cost-ledger')
+@tenant_option
+def rebuild_cost_ledger_command():
+    from src.utils.ledger import rebuild_cost_ledger
+    entries = rebuild_cost_ledger()
+    db.session.commit()
+    click.echo(f'Rebuilt cost ledger: {entries} completed activities')
+
+@maintai_cli.command('rebuild-search-index')
+@tenant_option
+def rebuild_search_index_command():
+    from src.utils.search import rebuild_search_index
+    activities = rebuild_search_index()
+    db.session.commit()
+    click.echo(f'Rebuilt activity search index: {activities} activities')
+
+@maintai_cli.command('archive-activities')
+@tenant_option
+@click.option('--older-than-days', type=float, help='Archive activities completed more than this many days ago.')
+@click.option('--batch-size', type=int, help='Activities moved per transaction.')
+@click.option('--pause', type=float, help='Seconds to sleep between batches.')
+@click.option('--max-batches', default=0, help='Stop after this many batches; 0 runs until done.')
+@click.option('--loop', is_flag=True, help='Keep archiving every --interval seconds.')
+@click.option('--interval', default=3600.0, help='Seconds between runs with --loop.')
+def archive_activities_command(older_than_days, batch_size, pause, max_batches, loop, interval):
+    from src.utils.archive import archive_activities
+    config = current_app.config
+    while True:
+        moved = archive_activities(
+            timedelta(days=older_than_days if older_than_days is not None else config['ARCHIVE_AFTER_DAYS']),
+            batch_size or config['ARCHIVE_BATCH_SIZE'],
+            pause if pause is not None else config['ARCHIVE_BATCH_PAUSE'],
+            max_batches=max_batches
+        )
+        click.echo(f'Archived {moved} completed activities')
+        if not loop:
+            break
+        time.sleep(interval)
+
+@click.command('recompute-predictive')
+@click.option('--loop', is_flag=True, help='Keep rescoring every --interval seconds.')
+@click.option('--interval', default=60.0, help='Seconds between runs with --loop.')
+@with_appcontext
+@tenant_option
+def recompute_predictive_command(loop, interval):
+    app = current_app._get_current_object()
+    while True:
+        scored = predictive_recomputer.run_once(app)
+        click.echo(f'Rescored {scored} stale machines')
+        if not loop:
+            break
+        time.sleep(interval)
+
+def create_app(config=None):
+    app = Flask(__name__, static_folder=os.path.join(os.path.dirname(__file__), 'static'))
+    app.config['SECRET_KEY'] = os.getenv('SECRET_KEY', 'maintai-secret-key-2024')
+    app.config['JWT_SECRET_KEY'] = os.getenv('JWT_SECRET_KEY', 'maintai-jwt-secret-key-2024')
+    load_config(app)
+    if config:
+        app.config.update(config)
+
+    # Enable CORS for all routes
+    CORS(app, origins="*")
+
+    # Initialize JWT and Bcrypt
+    jwt = JWTManager(app)
+    bcrypt.init_app(app)
+
+    register_blueprints(app)
+
+    # Adds an engine per tenant to the binds, so it goes before db.init_app
+    tenancy.init_app(app, jwt)
+
+    # Nothing here touches the database: engines connect lazily on first use
+    db.init_app(app)
+
+    # Per-endpoint latency, SQL and response size metrics at /api/metrics
+    metrics.init_app(app)
+    routing.init_app(app)
+
+    app.cli.add_command(maintai_cli)
+    app.cli.add_command(recompute_predictive_command)
+
+    if app.config['AUTO_INIT_DB']:
+        with app.app_context():
+            if init_db():
+                print("Default admin user created: admin/password")
+
+    if app.config['PREDICTIVE_RECOMPUTE_INTERVAL'] > 0:
+        # Started by the first request rather than here, so CLI commands
+        # don't spawn it and each pre-forked worker gets its own thread.
+        # After the request, once its token has picked the tenant whose
+        # recomputer this is
+        @app.after_request
+        def start_predictive_recomputer(response):
+            if predictive_recomputer.thread is None:
+                predictive_recomputer.start(app)
+            return response
+
+    @app.route('/', defaults={'path': ''})
+    @app.route('/<path:path>')
+    def serve_static_files(path):
+        # Served from the in-memory manifest; no filesystem access per hit
+        return static_assets.serve(path)
+
+    return app
 
+app = create_app()
 
 if __name__ == '__main__':
+    with app.app_context():
+        if init_db():
+            print("Default admin user created: admin/password")
     app.run(host='0.0.0.0', port=5000, debug=True)
@@ -0,0 +1,127 @@
+from flask import g, request, has_request_context
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+import threading
+import time
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+MAX_LOGGED_STATEMENTS = 50
+
+class RequestMetrics:
+    # Per-endpoint latency histograms, status counts, SQL statement counts,
+    # DB time and response bytes, aggregated in-process
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.endpoints = {}
+        self.statuses = {}
+
+    def record(self, endpoint, method, status, elapsed, statements, db_time, size):
+        with self.lock:
+            stats = self.endpoints.get(endpoint)
+            if stats is None:
+                stats = self.endpoints[endpoint] = {
+                    'buckets': [0] * len(LATENCY_BUCKETS),
+                    'count': 0,
+                    'sum': 0.0,
+                    'statements': 0,
+                    'db_time': 0.0,
+                    'bytes': 0
+                }
+            for index, bound in enumerate(LATENCY_BUCKETS):
+                if elapsed <= bound:
+                    stats['buckets'][index] += 1
+            stats['count'] += 1
+            stats['sum'] += elapsed
+            stats['statements'] += statements
+            stats['db_time'] += db_time
+            stats['bytes'] += size
+            key = (endpoint, method, status)
+            self.statuses[key] = self.statuses.get(key, 0) + 1
+
+    def render(self):
+        with self.lock:
+            endpoints = {name: dict(stats, buckets=list(stats['buckets'])) for name, stats in self.endpoints.items()}
+            statuses = dict(self.statuses)
+
+        lines = [
+            '# HELP maintai_http_requests_total HTTP requests by endpoint, method and status.',
+            '# TYPE maintai_http_requests_total counter'
+        ]
+        for (endpoint, method, status), count in sorted(statuses.items()):
+            lines.append(f'maintai_http_requests_total{{endpoint="{endpoint}",method="{method}",status="{status}"}} {count}')
+
+        lines += [
+            '# HELP maintai_http_request_duration_seconds Request latency by endpoint.',
+            '# TYPE maintai_http_request_duration_seconds histogram'
+        ]
+        for endpoint, stats in sorted(endpoints.items()):
+            for bound, count in zip(LATENCY_BUCKETS, stats['buckets']):
+                lines.append(f'maintai_http_request_duration_seconds_bucket{{endpoint="{endpoint}",le="{bound}"}} {count}')
+            lines.append(f'maintai_http_request_duration_seconds_bucket{{endpoint="{endpoint}",le="+Inf"}} {stats["count"]}')
+            lines.append(f'maintai_http_request_duration_seconds_sum{{endpoint="{endpoint}"}} {stats["sum"]:.6f}')
+            lines.append(f'maintai_http_request_duration_seconds_count{{endpoint="{endpoint}"}} {stats["count"]}')
+
+        for name, key, kind, help_text in (
+            ('maintai_db_statements_total', 'statements', 'counter', 'SQL statements executed by endpoint.'),
+            ('maintai_db_duration_seconds_total', 'db_time', 'counter', 'Time spent executing SQL by endpoint.'),
+            ('maintai_http_response_bytes_total', 'bytes', 'counter', 'Response body bytes by endpoint.')
+        ):
+            lines += [f'# HELP {name} {help_text}', f'# TYPE {name} {kind}']
+            for endpoint, stats in sorted(endpoints.items()):
+                value = f'{stats[key]:.6f}' if isinstance(stats[key], float) else stats[key]
+                lines.append(f'{name}{{endpoint="{endpoint}"}} {value}')
+
+        return '\n'.join(lines) + '\n'
+
+request_metrics = RequestMetrics()
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if has_request_context() and 'sql_statements' in g:
+        conn.info.setdefault('query_start', []).append(time.perf_counter())
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if has_request_context() and 'sql_statements' in g and conn.info.get('query_start'):
+        elapsed = time.perf_counter() - conn.info['query_start'].pop()
+        g.sql_statements += 1
+        g.sql_time += elapsed
+        if g.sql_log is not None and len(g.sql_log) < MAX_LOGGED_STATEMENTS:
+            g.sql_log.append((elapsed, statement))
+
+def init_app(app):
+    # Statements are only remembered when slow-request logging is enabled
+    log_statements = app.config['SLOW_REQUEST_THRESHOLD_MS'] > 0
+
+    @app.before_request
+    def start_request_timer():
+        g.request_started = time.perf_counter()
+        g.sql_statements = 0
+        g.sql_time = 0.0
+        g.sql_log = [] if log_statements else None
+
+    @app.after_request
+    def record_request_metrics(response):
+        if 'request_started' not in g:
+            return response
+        elapsed = time.perf_counter() - g.request_started
+        endpoint = request.endpoint or 'unmatched'
+        request_metrics.record(
+            endpoint, request.method, response.status_code, elapsed,
+            g.sql_statements, g.sql_time, response.content_length or 0
+        )
+
+        if log_statements and elapsed * 1000 >= app.config['SLOW_REQUEST_THRESHOLD_MS']:
+            app.logger.warning(
+                'Slow request %s %s -> %s in %.1f ms (%d SQL statements, %.1f ms in DB)\n%s',
+                request.method, request.full_path.rstrip('?'), response.status_code, elapsed * 1000,
+                g.sql_statements, g.sql_time * 1000,
+                '\n'.join(f'  [{duration * 1000:.1f} ms] {statement}' for duration, statement in g.sql_log)
+            )
+        return response
+
+    @app.route('/api/metrics', methods=['GET'])
+    def get_metrics():
+        return app.response_class(request_metrics.render(), mimetype='text/plain; version=0.0.4')
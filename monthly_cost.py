@@ -0,0 +1,27 @@
+from src.models.user import db
+from datetime import datetime
+
+class MonthlyCost(db.Model):
+    # Running totals of the cost ledger per machine and month, adjusted on
+    # every ledger change. machine_id '*' holds the fleet-wide total
+    machine_id = db.Column(db.String(50), primary_key=True)
+    period = db.Column(db.String(7), primary_key=True)  # YYYY-MM
+    labor_cost = db.Column(db.Float, default=0.0)
+    parts_cost = db.Column(db.Float, default=0.0)
+    total_cost = db.Column(db.Float, default=0.0)
+    activity_count = db.Column(db.Integer, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    def __repr__(self):
+        return f'<MonthlyCost {self.machine_id} {self.period}>'
+
+    def to_dict(self):
+        return {
+            'machine_id': self.machine_id,
+            'period': self.period,
+            'labor_cost': self.labor_cost,
+            'parts_cost': self.parts_cost,
+            'total_cost': self.total_cost,
+            'activity_count': self.activity_count,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None
+        }
@@ -0,0 +1,47 @@
+from flask import current_app
+from concurrent.futures import ThreadPoolExecutor
+from src.models.user import bcrypt
+import threading
+
+class PasswordHasherBusy(Exception):
+    pass
+
+class PasswordHasher:
+    # bcrypt runs on a small dedicated pool (the C code releases the GIL), so
+    # a burst of logins occupies at most max_workers cores instead of every
+    # request thread. Beyond max_pending queued jobs, callers get
+    # PasswordHasherBusy rather than waiting without bound
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.executor = None
+        self.slots = None
+
+    def pool(self):
+        with self.lock:
+            if self.executor is None:
+                config = current_app.config
+                self.executor = ThreadPoolExecutor(
+                    max_workers=config['BCRYPT_MAX_CONCURRENCY'], thread_name_prefix='bcrypt'
+                )
+                self.slots = threading.BoundedSemaphore(config['BCRYPT_MAX_CONCURRENCY'] + config['BCRYPT_MAX_PENDING'])
+            return self.executor, self.slots
+
+    def run(self, function, *args):
+        executor, slots = self.pool()
+        if not slots.acquire(timeout=current_app.config['BCRYPT_QUEUE_TIMEOUT']):
+            raise PasswordHasherBusy('Too many password checks in progress, retry shortly')
+        try:
+            return executor.submit(function, *args).result()
+        finally:
+            slots.release()
+
+password_hasher = PasswordHasher()
+
+def hash_password(password):
+    return password_hasher.run(bcrypt.generate_password_hash, password).decode('utf-8')
+
+def check_password(password_hash, password):
+    if not password_hash:
+        return False
+    return password_hasher.run(bcrypt.check_password_hash, password_hash, password)
@@ -3,15 +3,16 @@ from datetime import datetime
 
 class PredictiveData(db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    machine_id = db.Column(db.String(50), db.ForeignKey('machine.id'), nullable=False)
+    machine_id = db.Column(db.String(50), db.ForeignKey('machine.id'), nullable=False, index=True, unique=True)  # One row per machine, updated in place
     failure_probability = db.Column(db.Float, default=0.0)
     recommended_maintenance = db.Column(db.Integer, default=30)  # days
     cost_savings = db.Column(db.Float, default=0.0)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
-    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)
 
     # Relationship
-    machine = db.relationship('Machine', backref=db.backref('predictive_data', lazy=True))
+    # Deleted with its machine; every scored machine has a row
+    machine = db.relationship('Machine', backref=db.backref('predictive_data', lazy=True, cascade='all, delete-orphan'))
 
     def __repr__(self):
         return f'<PredictiveData for {self.machine_id}>'
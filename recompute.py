@@ -0,0 +1,139 @@
+from flask import current_app
+from concurrent.futures import ThreadPoolExecutor
+from src.models.user import db
+from src.models.machine import Machine
+from src.models.predictive_data import PredictiveData
+from src.utils.cache import dashboard_stats_cache
+from src.utils.tenancy import PerTenant, current_tenant, tenant_context
+from datetime import datetime, timedelta
+import threading
+import time
+
+def stale_machine_ids(limit, max_age):
+    # A machine needs rescoring when it has no predictive row, its inputs
+    # changed after the last score, or the score is older than max_age
+    # (days since maintenance keeps growing even when nothing is written)
+    statement = db.select(Machine.id) \
+        .outerjoin(PredictiveData, PredictiveData.machine_id == Machine.id) \
+        .where(db.or_(
+            PredictiveData.id.is_(None),
+            Machine.updated_at > PredictiveData.updated_at,
+            PredictiveData.updated_at < datetime.utcnow() - max_age
+        )) \
+        .order_by(Machine.id) \
+        .limit(limit)
+    return list(db.session.scalars(statement))
+
+def is_stale(machine, predictive_data, max_age):
+    # stale_machine_ids() for a row that is already loaded
+    if predictive_data is None:
+        return True
+    scored_at = predictive_data.updated_at
+    if scored_at is None:
+        return False
+    return (machine.updated_at is not None and machine.updated_at > scored_at) \
+        or scored_at < datetime.utcnow() - max_age
+
+class PredictiveRecomputer:
+    # Rescores stale machines in the background so reads never wait on the
+    # model; request_refresh() lets a read wake it early
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.requested = set()
+        self.wakeup = threading.Event()
+        self.thread = None
+        self.app = None
+        self.tenant = None
+        self.stats = {
+            'runs': 0,
+            'machines_scored': 0,
+            'errors': 0,
+            'last_run_at': None,
+            'last_run_ms': None
+        }
+
+    def start(self, app):
+        with self.lock:
+            if self.thread is not None:
+                return
+            self.app = app
+            self.tenant = current_tenant()
+            self.thread = threading.Thread(target=self.run, name=f'predictive-recompute-{self.tenant}', daemon=True)
+            self.thread.start()
+
+    def request_refresh(self, machine_ids):
+        if not machine_ids:
+            return
+        with self.lock:
+            self.requested.update(machine_ids)
+        if self.thread is not None:
+            self.wakeup.set()
+
+    def run(self):
+        while True:
+            try:
+                with tenant_context(self.tenant):
+                    self.run_once(self.app)
+            except Exception:
+                with self.lock:
+                    self.stats['errors'] += 1
+                self.app.logger.exception('Predictive recompute failed')
+            self.wakeup.wait(self.app.config['PREDICTIVE_RECOMPUTE_INTERVAL'])
+            self.wakeup.clear()
+
+    def run_once(self, app):
+        started = time.perf_counter()
+        tenant = current_tenant()
+        batch_size = app.config['PREDICTIVE_RECOMPUTE_BATCH_SIZE']
+        max_age = timedelta(seconds=app.config['PREDICTIVE_MAX_AGE'])
+
+        with self.lock:
+            requested, self.requested = self.requested, set()
+
+        with app.app_context():
+            # Explicitly requested machines first, then whatever else is stale
+            stale = set(requested) | set(stale_machine_ids(app.config['PREDICTIVE_RECOMPUTE_MAX_PER_RUN'], max_age))
+            db.session.remove()
+
+        machine_ids = sorted(stale)
+        batches = [machine_ids[start:start + batch_size] for start in range(0, len(machine_ids), batch_size)]
+
+        scored = 0
+        if batches:
+            with ThreadPoolExecutor(max_workers=app.config['PREDICTIVE_RECOMPUTE_WORKERS']) as executor:
+                scored = sum(executor.map(lambda batch: self.score_batch(app, tenant, batch), batches))
+            dashboard_stats_cache.invalidate()
+
+        with self.lock:
+            self.stats['runs'] += 1
+            self.stats['machines_scored'] += scored
+            self.stats['last_run_at'] = datetime.utcnow().isoformat()
+            self.stats['last_run_ms'] = round((time.perf_counter() - started) * 1000, 2)
+        return scored
+
+    def score_batch(self, app, tenant, machine_ids):
+        # Each batch gets its own app context, and so its own session and
+        # connection, and commits on its own. Scoring (and numpy) is only
+        # imported once there is something to score
+        from src.utils.scoring import score_machines
+
+        with tenant_context(tenant), app.app_context():
+            try:
+                scored = score_machines(machine_ids)
+                db.session.commit()
+                return scored
+            except Exception:
+                db.session.rollback()
+                with self.lock:
+                    self.stats['errors'] += 1
+                    self.requested.update(machine_ids)
+                current_app.logger.exception('Predictive recompute batch failed')
+                return 0
+
+    def metrics(self):
+        with self.lock:
+            return dict(self.stats, pending=len(self.requested), running=self.thread is not None)
+
+# Started per tenant by that tenant's first request
+predictive_recomputer = PerTenant(PredictiveRecomputer)
@@ -0,0 +1,75 @@
+from flask import current_app, g, request, has_request_context
+from sqlalchemy import event
+from src.models.user import db
+import os
+import time
+
+READ_METHODS = ('GET', 'HEAD')
+
+READ_PRIMARY_COOKIE = 'maintai_read_primary_until'
+
+def engine_options(prefix):
+    # Pool sizing is only passed through when configured, since SQLite's
+    # default pools reject some of these arguments
+    options = {}
+    for name, cast in (('POOL_SIZE', int), ('MAX_OVERFLOW', int), ('POOL_TIMEOUT', float), ('POOL_RECYCLE', int)):
+        value = os.getenv(f'{prefix}_{name}')
+        if value is not None:
+            options[name.lower()] = cast(value)
+    return options
+
+def use_replica():
+    if not has_request_context() or request.method not in READ_METHODS:
+        return False
+    if 'use_replica' not in g:
+        # Read-your-writes: a client that wrote recently keeps reading from
+        # the primary until its replica has had time to catch up
+        try:
+            read_primary_until = float(request.cookies.get(READ_PRIMARY_COOKIE, 0))
+        except ValueError:
+            read_primary_until = 0
+        g.use_replica = time.time() >= read_primary_until
+    return g.use_replica
+
+def stay_on_primary():
+    # A GET that writes (e.g. scoring machines inline) must read its own
+    # rows back from the primary for the rest of the request
+    if has_request_context():
+        g.use_replica = False
+
+def route_reads(orm_execute_state):
+    # Flushes never pass through here, so only SELECTs issued while serving
+    # a GET or HEAD request can land on the replica. The replica belongs to
+    # the default database; other tenants read their own. Imported here
+    # since tenancy builds its pools with engine_options()
+    from src.utils.tenancy import current_tenant, DEFAULT_TENANT
+    if not orm_execute_state.is_select:
+        stay_on_primary()
+    elif ('bind' not in orm_execute_state.bind_arguments and current_app.config.get('DATABASE_READ_URL')
+          and current_tenant() == DEFAULT_TENANT and use_replica()):
+        statement = orm_execute_state.statement
+        if getattr(statement, '_for_update_arg', None) is None:
+            orm_execute_state.bind_arguments['bind'] = db.engines['replica']
+
+def route_after_flush(session, flush_context):
+    stay_on_primary()
+
+def init_app(app):
+    if not app.config.get('DATABASE_READ_URL'):
+        return
+    # db.session is shared by every app in the process, so its listeners are
+    # added by the first app with a replica and check the current app's
+    # config on each call
+    for identifier, listener in (('do_orm_execute', route_reads), ('after_flush', route_after_flush)):
+        if not event.contains(db.session, identifier, listener):
+            event.listen(db.session, identifier, listener)
+
+    @app.after_request
+    def mark_recent_write(response):
+        window = app.config['READ_YOUR_WRITES_SECONDS']
+        if window > 0 and request.method not in READ_METHODS and response.status_code < 400:
+            response.set_cookie(
+                READ_PRIMARY_COOKIE, str(time.time() + window),
+                max_age=int(window) + 1, httponly=True, samesite='Lax'
+            )
+        return response
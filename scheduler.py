@@ -0,0 +1,354 @@
+from flask import current_app
+from src.models.user import db
+from src.models.machine import Machine
+from src.models.activity import Activity
+from src.models.predictive_data import PredictiveData
+from src.utils.tenancy import PerTenant
+from collections import Counter
+import bisect
+import heapq
+import threading
+import time
+
+STATUS_WEIGHTS = {'maintenance': 2.0, 'warning': 1.0}
+
+# Fallback deadline (days) when a machine has no predictive data yet
+DEFAULT_RECOMMENDED_DAYS = {'high': 7, 'medium': 21, 'low': 60}
+
+BASE_COSTS = {'high': 3000, 'medium': 1500, 'low': 500}
+
+CHUNK_SIZE = 500
+
+def priority_of(status, efficiency, failure_probability):
+    # Status dominates, then predicted failure, then lost efficiency
+    return (
+        STATUS_WEIGHTS.get(status, 0.0)
+        + (failure_probability or 0.0)
+        + max(0.0, 100.0 - (efficiency if efficiency is not None else 100.0)) / 100.0
+    )
+
+def urgency_of(status, efficiency, failure_probability):
+    failure_probability = failure_probability or 0.0
+    if status == 'maintenance' or failure_probability >= 0.7:
+        return 'high'
+    if status == 'warning' or (efficiency is not None and efficiency < 80) or failure_probability >= 0.3:
+        return 'medium'
+    return 'low'
+
+def make_job(row):
+    machine_id, name, status, efficiency, failure_probability, recommended_days = row
+    urgency = urgency_of(status, efficiency, failure_probability)
+    return {
+        'machineId': machine_id,
+        'machineName': name,
+        'urgency': urgency,
+        'priority': round(priority_of(status, efficiency, failure_probability), 4),
+        'failureProbability': failure_probability,
+        'recommendedDays': recommended_days if recommended_days is not None else DEFAULT_RECOMMENDED_DAYS[urgency],
+        'estimatedCost': round(BASE_COSTS[urgency] * (1 + (failure_probability or 0.0))),
+        'currentStatus': status
+    }
+
+def load_rows(machine_ids=None):
+    # One row per machine with its predictive data, if any
+    statement = db.select(
+        Machine.id, Machine.name, Machine.status, Machine.efficiency,
+        PredictiveData.failure_probability, PredictiveData.recommended_maintenance
+    ).outerjoin(PredictiveData, PredictiveData.machine_id == Machine.id)
+
+    if machine_ids is None:
+        return db.session.execute(statement).all()
+    machine_ids = list(machine_ids)
+    rows = []
+    for start in range(0, len(machine_ids), CHUNK_SIZE):
+        rows.extend(db.session.execute(statement.where(Machine.id.in_(machine_ids[start:start + CHUNK_SIZE]))).all())
+    return rows
+
+def data_version():
+    return db.session.execute(db.select(
+        db.select(db.func.count()).select_from(Machine).scalar_subquery(),
+        db.select(db.func.max(Machine.updated_at)).scalar_subquery(),
+        db.select(db.func.max(PredictiveData.updated_at)).scalar_subquery(),
+        db.select(db.func.max(Activity.id)).scalar_subquery()
+    )).one()
+
+class MaintenanceScheduler:
+    # Machines sit in a max-heap keyed by priority. Pages are served from a
+    # ranked prefix popped off the heap only as deep as clients have read,
+    # so the first 100 of 50k jobs cost a heapify plus 100 pops.
+    #
+    # Each day holds technicians x capacity jobs, in rank order. Within a
+    # day a job goes to the technician who has worked on that machine most
+    # within the last SCHEDULER_HISTORY_SIZE activities,
+    # if they have a free slot, otherwise to the least loaded technician.
+    # Days are assigned lazily and cached.
+    #
+    # A changed machine gets a new heap entry and the old one is skipped
+    # when popped. The ranked prefix is cut back to the first position the
+    # change affects, and only the days from there on are re-planned
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.clear()
+
+    def clear(self):
+        self.jobs = {}
+        self.versions = {}
+        self.heap = []
+        self.ranked = []
+        self.ranked_keys = []
+        self.days = {}
+        self.history = {}
+        self.affinity = {}
+        self.technicians = []
+        self.technician_set = set()
+        self.capacity = None
+        self.synced = None
+        self.checked_at = 0.0
+        self.rebuilt_at = 0.0
+        self.stats = {'rebuilds': 0, 'incremental_syncs': 0, 'replanned_machines': 0}
+
+    # Ranking
+
+    def key(self, machine_id):
+        return (-self.jobs[machine_id]['priority'], machine_id)
+
+    def push(self, machine_id):
+        self.versions[machine_id] = self.versions.get(machine_id, 0) + 1
+        heapq.heappush(self.heap, (self.key(machine_id), self.versions[machine_id], machine_id))
+
+    def extend(self, size):
+        while len(self.ranked) < size and self.heap:
+            key, version, machine_id = heapq.heappop(self.heap)
+            if self.versions.get(machine_id) != version:
+                continue
+            self.ranked.append(machine_id)
+            self.ranked_keys.append(key)
+
+    def truncate(self, position):
+        # Return ranked machines from position on to the heap under their
+        # current keys; removed machines are simply dropped
+        if position >= len(self.ranked):
+            return
+        for machine_id in self.ranked[position:]:
+            if machine_id in self.jobs:
+                heapq.heappush(self.heap, (self.key(machine_id), self.versions[machine_id], machine_id))
+        del self.ranked[position:]
+        del self.ranked_keys[position:]
+        first_day = position // self.day_size()
+        for day in [day for day in self.days if day >= first_day]:
+            del self.days[day]
+
+    def position_of(self, machine_id):
+        # Only the ranked prefix has positions; machines still in the heap
+        # haven't been planned yet
+        key = self.key(machine_id) if machine_id in self.jobs else None
+        if key is not None:
+            index = bisect.bisect_left(self.ranked_keys, key)
+            if index < len(self.ranked) and self.ranked[index] == machine_id:
+                return index
+        try:
+            return self.ranked.index(machine_id)
+        except ValueError:
+            return None
+
+    def apply(self, rows, removed=()):
+        # Re-plan changed machines: the prefix is cut at the earlier of each
+        # machine's old position and the position its new priority sorts to
+        cut = len(self.ranked)
+        ranked = set()
+        for machine_id in [*removed, *(row[0] for row in rows)]:
+            position = self.position_of(machine_id) if machine_id in self.jobs else None
+            if position is not None:
+                cut = min(cut, position)
+                ranked.add(machine_id)
+        for machine_id in removed:
+            self.jobs.pop(machine_id, None)
+            self.versions.pop(machine_id, None)
+        for row in rows:
+            self.jobs[row[0]] = make_job(row)
+            cut = min(cut, bisect.bisect_left(self.ranked_keys, self.key(row[0])))
+
+        # Changed machines that were ranked go back with the truncated tail;
+        # the rest get a fresh entry that supersedes their old one
+        self.truncate(cut)
+        for row in rows:
+            if row[0] not in ranked:
+                self.push(row[0])
+
+        # Old heap entries are skipped lazily; compact once they dominate
+        if len(self.heap) > 2 * len(self.jobs) + 1024:
+            live = set(self.ranked)
+            self.heap = [entry for entry in self.heap
+                         if self.versions.get(entry[2]) == entry[1] and entry[2] not in live]
+            heapq.heapify(self.heap)
+        self.stats['replanned_machines'] += len(rows) + len(removed)
+
+    # Technicians
+
+    def day_size(self):
+        return max(len(self.technicians), 1) * self.capacity
+
+    def add_history(self, rows):
+        # rows: (machine_id, technician, count) from Activity
+        touched = set()
+        for machine_id, technician, count in rows:
+            if not technician:
+                continue
+            if machine_id is not None:
+                self.history.setdefault(machine_id, Counter())[technician] += count
+                touched.add(machine_id)
+            if technician not in self.technician_set:
+                self.technician_set.add(technician)
+                self.technicians.append(technician)
+        for machine_id in touched:
+            self.affinity[machine_id] = min(self.history[machine_id].items(), key=lambda item: (-item[1], item[0]))[0]
+        return touched
+
+    def assign_day(self, day):
+        size = self.day_size()
+        self.extend((day + 1) * size)
+        machine_ids = self.ranked[day * size:(day + 1) * size]
+        if not self.technicians:
+            self.days[day] = {machine_id: None for machine_id in machine_ids}
+            return
+
+        loads = {technician: 0 for technician in self.technicians}
+        assignment = {}
+        for machine_id in machine_ids:
+            technician = self.affinity.get(machine_id)
+            if technician is None or loads[technician] >= self.capacity:
+                technician = min(self.technicians, key=lambda name: (loads[name], name))
+            loads[technician] += 1
+            assignment[machine_id] = technician
+        self.days[day] = assignment
+
+    # Syncing with the database
+
+    def rebuild(self, version):
+        stats = self.stats
+        self.clear()
+        self.stats = stats
+        self.capacity = current_app.config['SCHEDULER_TECHNICIAN_CAPACITY']
+        self.technician_set = set()
+        # Only recent history counts, which also keeps technicians who
+        # stopped logging work off the plan
+        since = (version[3] or 0) - current_app.config['SCHEDULER_HISTORY_SIZE']
+        self.add_history(db.session.execute(
+            db.select(Activity.machine_id, Activity.technician, db.func.count())
+            .where(Activity.id > since)
+            .group_by(Activity.machine_id, Activity.technician)
+        ).all())
+        self.technicians.sort()
+
+        for row in load_rows():
+            self.jobs[row[0]] = make_job(row)
+            self.versions[row[0]] = 1
+        self.heap = [(self.key(machine_id), 1, machine_id) for machine_id in self.jobs]
+        heapq.heapify(self.heap)
+        self.synced = version
+        self.rebuilt_at = time.monotonic()
+        self.stats['rebuilds'] += 1
+
+    def sync(self):
+        config = current_app.config
+        now = time.monotonic()
+        if self.synced is not None and now - self.checked_at < config['SCHEDULER_SYNC_INTERVAL']:
+            return
+        self.checked_at = now
+
+        version = data_version()
+        if (self.synced is None or time.monotonic() - self.rebuilt_at > config['SCHEDULER_REBUILD_INTERVAL']
+                or self.capacity != config['SCHEDULER_TECHNICIAN_CAPACITY']):
+            self.rebuild(version)
+            return
+        if version == self.synced:
+            return
+
+        machine_count, machine_updated, predictive_updated, activity_id = version
+        _, last_machine_updated, last_predictive_updated, last_activity_id = self.synced
+
+        # >= rather than >: rows written in the same timestamp tick as the
+        # last sync are simply re-applied
+        changed = set()
+        if machine_updated is not None:
+            statement = db.select(Machine.id)
+            if last_machine_updated is not None:
+                statement = statement.where(Machine.updated_at >= last_machine_updated)
+            changed.update(db.session.scalars(statement))
+        if predictive_updated is not None:
+            statement = db.select(PredictiveData.machine_id)
+            if last_predictive_updated is not None:
+                statement = statement.where(PredictiveData.updated_at >= last_predictive_updated)
+            changed.update(db.session.scalars(statement.distinct()))
+
+        if len(changed) > max(len(self.jobs) // 5, CHUNK_SIZE):
+            self.rebuild(version)
+            return
+
+        rows = load_rows(changed) if changed else []
+        found = {row[0] for row in rows}
+        self.apply(rows, removed=[machine_id for machine_id in changed if machine_id not in found])
+        if len(self.jobs) != machine_count:
+            # Deletes don't leave an updated_at behind
+            self.rebuild(version)
+            return
+
+        if activity_id is not None and activity_id != last_activity_id:
+            technicians = len(self.technicians)
+            touched = self.add_history(db.session.execute(
+                db.select(Activity.machine_id, Activity.technician, db.func.count())
+                .where(Activity.id > (last_activity_id or 0))
+                .group_by(Activity.machine_id, Activity.technician)
+            ).all())
+            if len(self.technicians) != technicians:
+                self.technicians.sort()
+                self.days.clear()
+            else:
+                for machine_id in touched:
+                    position = self.position_of(machine_id)
+                    if position is not None:
+                        self.days.pop(position // self.day_size(), None)
+
+        self.synced = version
+        self.stats['incremental_syncs'] += 1
+
+    def version(self):
+        # The data version and day size the plan is synced to. Pages served
+        # while it is unchanged are identical, so it keys the ETag
+        with self.lock:
+            self.sync()
+            return (*self.synced, self.capacity)
+
+    def page(self, offset, limit):
+        with self.lock:
+            self.sync()
+            total = len(self.jobs)
+            end = min(offset + limit, total)
+            if offset >= end:
+                return [], total
+
+            size = self.day_size()
+            self.extend(end)
+            for day in range(offset // size, (end - 1) // size + 1):
+                if day not in self.days:
+                    self.assign_day(day)
+
+            jobs = []
+            for position in range(offset, end):
+                machine_id = self.ranked[position]
+                day = position // size
+                job = dict(self.jobs[machine_id])
+                job['rank'] = position + 1
+                job['scheduledDay'] = day
+                job['technician'] = self.days[day][machine_id]
+                job['overdue'] = day > job['recommendedDays']
+                jobs.append(job)
+            return jobs, total
+
+    def metrics(self):
+        with self.lock:
+            return dict(self.stats, machines=len(self.jobs), ranked=len(self.ranked),
+                        heap=len(self.heap), technicians=len(self.technicians))
+
+maintenance_scheduler = PerTenant(MaintenanceScheduler)
@@ -0,0 +1,103 @@
+from sqlalchemy import inspect
+from sqlalchemy.schema import CreateIndex, CreateTable
+from src.models.user import db
+from src.models.activity import Activity
+from src.models.archived_activity import ArchivedActivity
+from src.models.predictive_data import PredictiveData
+
+def enable_activity_autoincrement():
+    # SQLite activity tables created before ids were AUTOINCREMENT reuse the
+    # id of a deleted newest row, which may belong to an archived activity.
+    # AUTOINCREMENT can't be added by ALTER TABLE, so the table is copied
+    # into a new one that replaces it, and its id sequence starts after
+    # every live and archived id. The indexes and search triggers dropped
+    # with the old table are recreated by the steps after this one
+    connection = db.session.connection()
+    if connection.dialect.name != 'sqlite':
+        return False
+    table = Activity.__table__
+    ddl = connection.exec_driver_sql(
+        "SELECT sql FROM sqlite_master WHERE type = 'table' AND name = ?", (table.name,)
+    ).scalar()
+    if ddl is None or 'AUTOINCREMENT' in ddl.upper():
+        return False
+
+    columns = ', '.join(connection.dialect.identifier_preparer.quote(column.name) for column in table.columns)
+    connection.exec_driver_sql(f'ALTER TABLE {table.name} RENAME TO {table.name}_old')
+    connection.execute(CreateTable(table))
+    connection.exec_driver_sql(f'INSERT INTO {table.name} ({columns}) SELECT {columns} FROM {table.name}_old')
+    connection.exec_driver_sql(f'DROP TABLE {table.name}_old')
+
+    highest = max(
+        db.session.scalar(db.select(db.func.max(Activity.id))) or 0,
+        db.session.scalar(db.select(db.func.max(ArchivedActivity.id))) or 0
+    )
+    connection.exec_driver_sql('DELETE FROM sqlite_sequence WHERE name = ?', (table.name,))
+    connection.exec_driver_sql('INSERT INTO sqlite_sequence (name, seq) VALUES (?, ?)', (table.name, highest))
+    return True
+
+def drop_duplicate_predictive_data():
+    # Databases from before predictive_data.machine_id was unique may hold
+    # several rows per machine. Only the newest was ever read, so the rest
+    # are dropped before the unique index is created
+    duplicated = db.session.scalar(
+        db.select(PredictiveData.machine_id)
+        .group_by(PredictiveData.machine_id)
+        .having(db.func.count() > 1)
+        .limit(1)
+    )
+    if duplicated is None:
+        return 0
+    newest = db.select(db.func.max(PredictiveData.id)).group_by(PredictiveData.machine_id)
+    return db.session.execute(db.delete(PredictiveData).where(PredictiveData.id.not_in(newest))).rowcount
+
+def add_missing_columns():
+    # create_all() never alters a table that already exists, so columns
+    # declared on the models later are added here. Existing rows get the
+    # column's scalar default; PostgreSQL's IF NOT EXISTS lets several
+    # instances run this at once
+    connection = db.session.connection()
+    inspector = inspect(connection)
+    compiler = connection.dialect.ddl_compiler(connection.dialect, None)
+    if_not_exists = ' IF NOT EXISTS' if connection.dialect.name == 'postgresql' else ''
+    added = []
+    for table in db.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+        existing = {column['name'] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name in existing:
+                continue
+            specification = compiler.get_column_specification(column)
+            if column.server_default is None and column.default is not None and column.default.is_scalar:
+                specification += f' DEFAULT {compiler.sql_compiler.render_literal_value(column.default.arg, column.type)}'
+            connection.exec_driver_sql(
+                f'ALTER TABLE {compiler.preparer.format_table(table)} ADD COLUMN{if_not_exists} {specification}'
+            )
+            added.append(f'{table.name}.{column.name}')
+    return added
+
+def create_missing_indexes():
+    # create_all() only indexes the tables it creates; indexes declared on
+    # the models after a table existed are added here. IF NOT EXISTS lets
+    # several instances run this at once where the database supports it
+    connection = db.session.connection()
+    inspector = inspect(connection)
+    if_not_exists = connection.dialect.name in ('sqlite', 'postgresql')
+    created = []
+    for table in db.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+        existing = {index['name'] for index in inspector.get_indexes(table.name)}
+        for index in sorted(table.indexes, key=lambda index: index.name):
+            if index.name not in existing:
+                connection.execute(CreateIndex(index, if_not_exists=if_not_exists))
+                created.append(index.name)
+    return created
+
+def upgrade_schema():
+    # Brings an existing database up to the models; idempotent, run by init_db
+    add_missing_columns()
+    enable_activity_autoincrement()
+    drop_duplicate_predictive_data()
+    return create_missing_indexes()
@@ -0,0 +1,142 @@
+from flask import current_app
+from src.models.user import db
+from src.models.machine import Machine
+from src.models.predictive_data import PredictiveData
+from src.utils.upsert import upsert
+from abc import ABC, abstractmethod
+from datetime import datetime
+import numpy as np
+
+class ScoringModel(ABC):
+    # Scores arrays of machine inputs and returns arrays of
+    # (failure_probability, recommended_maintenance, cost_savings). Inputs
+    # never contain NaN; score_machines() fills missing readings first
+    version = None
+
+    @abstractmethod
+    def score(self, temperature, vibration, efficiency, days_since_maintenance):
+        pass
+
+class LogisticRiskModel(ScoringModel):
+    version = 'logistic-v1'
+
+    intercept = -2.5
+    temperature_weight = 0.8      # per 10 °C above 35 °C
+    vibration_weight = 1.2        # per 0.5 mm/s above 1.0 mm/s
+    efficiency_weight = 0.9       # per 10 points below 85 %
+    maintenance_weight = 0.25     # per 30 days beyond 90 days, capped at a year
+    failure_cost = 15000.0
+    preventive_cost = 1500.0
+    max_interval = 60
+
+    def score(self, temperature, vibration, efficiency, days_since_maintenance):
+        z = (self.intercept
+             + self.temperature_weight * (temperature - 35.0) / 10.0
+             + self.vibration_weight * (vibration - 1.0) / 0.5
+             + self.efficiency_weight * (85.0 - efficiency) / 10.0
+             + self.maintenance_weight * (np.minimum(days_since_maintenance, 365.0) - 90.0) / 30.0)
+        failure_probability = np.clip(1.0 / (1.0 + np.exp(-z)), 0.01, 0.99)
+
+        recommended_maintenance = np.clip(
+            np.rint(self.max_interval * (1.0 - failure_probability)), 1, self.max_interval
+        ).astype(np.int64)
+
+        # Expected failure cost avoided by servicing ahead of time
+        cost_savings = np.maximum(failure_probability * self.failure_cost - self.preventive_cost, 0.0).round(2)
+
+        return failure_probability.round(4), recommended_maintenance, cost_savings
+
+MODELS = {model.version: model for model in (LogisticRiskModel(),)}
+
+DEFAULT_MODEL = LogisticRiskModel.version
+
+IN_CLAUSE_LIMIT = 500
+
+def get_model(version=None):
+    version = version or current_app.config.get('SCORING_MODEL', DEFAULT_MODEL)
+    if version not in MODELS:
+        raise ValueError(f"Unknown scoring model '{version}'")
+    return MODELS[version]
+
+def days_since(dates, today):
+    # last_maintenance is stored as a YYYY-MM-DD string; anything unparseable
+    # is treated as never maintained within the last year
+    try:
+        parsed = np.array(dates, dtype='datetime64[D]')
+    except ValueError:
+        parsed = np.array([parse_date(value) for value in dates], dtype='datetime64[D]')
+    days = (np.datetime64(today, 'D') - parsed).astype(np.float64)
+    return np.where(np.isnat(parsed), 365.0, np.maximum(days, 0.0))
+
+def parse_date(value):
+    try:
+        return np.datetime64(value, 'D')
+    except (TypeError, ValueError):
+        return np.datetime64('NaT')
+
+def readings(values, column):
+    # NULL readings are scored as the column's default for new machines,
+    # the same values a machine created without that reading would have
+    array = np.array(values, dtype=np.float64)
+    return np.where(np.isnan(array), column.default.arg, array)
+
+def score_machines(machine_ids=None, model=None):
+    model = model or get_model()
+
+    # Read only the input columns as plain tuples; no ORM instances
+    statement = db.select(
+        Machine.id, Machine.temperature, Machine.vibration, Machine.efficiency, Machine.last_maintenance
+    )
+    if machine_ids is not None and len(machine_ids) <= IN_CLAUSE_LIMIT:
+        statement = statement.where(Machine.id.in_(machine_ids))
+    rows = db.session.execute(statement).all()
+    if machine_ids is not None and len(machine_ids) > IN_CLAUSE_LIMIT:
+        wanted = set(machine_ids)
+        rows = [row for row in rows if row[0] in wanted]
+    if not rows:
+        return 0
+
+    ids, temperature, vibration, efficiency, last_maintenance = zip(*rows)
+    now = datetime.utcnow()
+    failure_probability, recommended_maintenance, cost_savings = model.score(
+        readings(temperature, Machine.__table__.c.temperature),
+        readings(vibration, Machine.__table__.c.vibration),
+        readings(efficiency, Machine.__table__.c.efficiency),
+        days_since([value or 'NaT' for value in last_maintenance], now.date())
+    )
+
+    store_scores(ids, failure_probability.tolist(), recommended_maintenance.tolist(), cost_savings.tolist(), now)
+    return len(ids)
+
+def insert_statement():
+    statement = upsert(PredictiveData, [PredictiveData.machine_id],
+                       ['failure_probability', 'recommended_maintenance', 'cost_savings', 'updated_at'])
+    return statement if statement is not None else db.insert(PredictiveData)
+
+def store_scores(machine_ids, failure_probability, recommended_maintenance, cost_savings, now):
+    statement = db.select(PredictiveData.machine_id, PredictiveData.id)
+    # Small batches filter in SQL; whole-fleet runs just read every row
+    if len(machine_ids) <= IN_CLAUSE_LIMIT:
+        statement = statement.where(PredictiveData.machine_id.in_(machine_ids))
+    existing = dict(db.session.execute(statement).all())
+
+    updates, inserts = [], []
+    for machine_id, probability, interval, savings in zip(machine_ids, failure_probability, recommended_maintenance, cost_savings):
+        values = {
+            'failure_probability': probability,
+            'recommended_maintenance': interval,
+            'cost_savings': savings,
+            'updated_at': now
+        }
+        if machine_id in existing:
+            updates.append(dict(values, id=existing[machine_id]))
+        else:
+            inserts.append(dict(values, machine_id=machine_id, created_at=now))
+
+    # One executemany UPDATE by primary key and one executemany INSERT. The
+    # INSERT becomes an upsert where supported, since machine_id is unique
+    # and a concurrent scoring run may have inserted the same machines
+    if updates:
+        db.session.execute(db.update(PredictiveData), updates)
+    if inserts:
+        db.session.execute(insert_statement(), inserts)
@@ -0,0 +1,108 @@
+from src.models.user import db
+from src.models.activity import Activity
+from src.models.archived_activity import ArchivedActivity
+import re
+
+# Both the live and the archived activities are indexed; each table gets its
+# own index under the names below ({table} is the table name)
+SEARCHABLE_MODELS = (Activity, ArchivedActivity)
+
+# SQLite: an external-content FTS5 table per table, kept in step by
+# triggers so every write path (routes, bulk inserts, the benchmark fleet,
+# the archival job) updates it in the same transaction as the row itself
+SQLITE_INDEX = [
+    """CREATE VIRTUAL TABLE IF NOT EXISTS {table}_fts USING fts5(
+        description, technician, content='{table}', content_rowid='id', tokenize='porter unicode61'
+    )""",
+    """CREATE TRIGGER IF NOT EXISTS {table}_fts_insert AFTER INSERT ON {table} BEGIN
+        INSERT INTO {table}_fts(rowid, description, technician) VALUES (new.id, new.description, new.technician);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS {table}_fts_delete AFTER DELETE ON {table} BEGIN
+        INSERT INTO {table}_fts({table}_fts, rowid, description, technician) VALUES ('delete', old.id, old.description, old.technician);
+    END""",
+    """CREATE TRIGGER IF NOT EXISTS {table}_fts_update AFTER UPDATE OF description, technician ON {table} BEGIN
+        INSERT INTO {table}_fts({table}_fts, rowid, description, technician) VALUES ('delete', old.id, old.description, old.technician);
+        INSERT INTO {table}_fts(rowid, description, technician) VALUES (new.id, new.description, new.technician);
+    END"""
+]
+
+# Postgres: a generated tsvector column, recomputed by the database on every
+# insert or update, behind a GIN index
+POSTGRES_INDEX = [
+    """ALTER TABLE {table} ADD COLUMN IF NOT EXISTS search_vector tsvector GENERATED ALWAYS AS (
+        to_tsvector('english', coalesce(description, '') || ' ' || coalesce(technician, ''))
+    ) STORED""",
+    'CREATE INDEX IF NOT EXISTS ix_{table}_search_vector ON {table} USING GIN (search_vector)'
+]
+
+def dialect():
+    return db.session.get_bind().dialect.name
+
+def install_search_index():
+    # Idempotent; called from init_db. Other dialects search with LIKE
+    statements = {'sqlite': SQLITE_INDEX, 'postgresql': POSTGRES_INDEX}.get(dialect(), [])
+    for model in SEARCHABLE_MODELS:
+        for statement in statements:
+            db.session.execute(db.text(statement.format(table=model.__tablename__)))
+    return bool(statements)
+
+def rebuild_search_index():
+    # Reindexes every existing activity, e.g. for a database whose rows
+    # predate the index
+    install_search_index()
+    indexed = 0
+    for model in SEARCHABLE_MODELS:
+        table = model.__tablename__
+        if dialect() == 'sqlite':
+            db.session.execute(db.text(f"INSERT INTO {table}_fts({table}_fts) VALUES ('rebuild')"))
+        elif dialect() == 'postgresql':
+            db.session.execute(db.text(f'REINDEX INDEX ix_{table}_search_vector'))
+        indexed += db.session.scalar(db.select(db.func.count()).select_from(model))
+    return indexed
+
+def search_terms(query):
+    # Words only, so user input can never be parsed as FTS/tsquery syntax
+    return re.findall(r'\w+', query.lower())
+
+def fts_match(terms):
+    # Every term must match; the last one as a prefix, for search-as-you-type
+    # ("lubric" finds "lubrication"). Prefixing every term would make FTS5
+    # merge whole doclists instead of seeking through them
+    return ' '.join(f'"{term}"' for term in terms[:-1]) + f' "{terms[-1]}"*'
+
+def tsquery(terms):
+    return db.func.to_tsquery('english', ' & '.join(terms[:-1] + [f'{terms[-1]}:*']))
+
+def search_statement(model, columns, terms):
+    # (statement, rank, rowid) for rows of model (Activity or
+    # ArchivedActivity) matching the terms. Lower rank sorts first; rowid is
+    # the activity id as the index returns it, so ordering by it descending
+    # doesn't need a sort
+    table = model.__tablename__
+    if dialect() == 'sqlite':
+        fts = db.table(f'{table}_fts', db.column('rowid'), db.column('rank'))
+        statement = (
+            db.select(*columns)
+            .select_from(model)
+            .join(fts, fts.c.rowid == model.id)
+            .where(db.literal_column(f'{table}_fts').op('MATCH')(fts_match(terms)))
+        )
+        return statement, fts.c.rank, fts.c.rowid
+    if dialect() == 'postgresql':
+        vector = db.literal_column(f'{table}.search_vector')
+        statement = db.select(*columns).select_from(model).where(vector.op('@@')(tsquery(terms)))
+        return statement, -db.func.ts_rank(vector, tsquery(terms)), model.id
+    statement = db.select(*columns).select_from(model).where(*(
+        db.or_(model.description.ilike(f'%{term}%'), model.technician.ilike(f'%{term}%'))
+        for term in terms
+    ))
+    return statement, db.literal(0), model.id
+
+def count_matches(model, terms):
+    # Unfiltered match count, straight from the index where there is one
+    if dialect() == 'sqlite':
+        table = model.__tablename__
+        return db.session.scalar(db.text(f'SELECT count(*) FROM {table}_fts WHERE {table}_fts MATCH :match'),
+                                 {'match': fts_match(terms)})
+    statement, _, _ = search_statement(model, [db.func.count()], terms)
+    return db.session.scalar(statement)
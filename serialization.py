@@ -0,0 +1,94 @@
+from flask import request, current_app
+from src.models.machine import Machine
+from src.models.activity import Activity
+from src.models.archived_activity import ArchivedActivity
+from src.models.predictive_data import PredictiveData
+import gzip
+import json
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Output key -> column, in the same order and naming as each model's to_dict()
+MACHINE_FIELDS = {
+    'id': Machine.id,
+    'name': Machine.name,
+    'status': Machine.status,
+    'efficiency': Machine.efficiency,
+    'temperature': Machine.temperature,
+    'vibration': Machine.vibration,
+    'lastMaintenance': Machine.last_maintenance,
+    'created_at': Machine.created_at,
+    'updated_at': Machine.updated_at
+}
+
+ACTIVITY_FIELDS = {
+    'id': Activity.id,
+    'description': Activity.description,
+    'technician': Activity.technician,
+    'status': Activity.status,
+    'machine_id': Activity.machine_id,
+    'timestamp': Activity.timestamp,
+    'completed_at': Activity.completed_at,
+    'labor_cost': Activity.labor_cost,
+    'parts_cost': Activity.parts_cost
+}
+
+# Same output keys, read from the archive, for history queries that
+# include archived activities
+ARCHIVED_ACTIVITY_FIELDS = {field: getattr(ArchivedActivity, column.key) for field, column in ACTIVITY_FIELDS.items()}
+
+PREDICTIVE_FIELDS = {
+    'id': PredictiveData.id,
+    'machine_id': PredictiveData.machine_id,
+    'failureProbability': PredictiveData.failure_probability,
+    'recommendedMaintenance': PredictiveData.recommended_maintenance,
+    'costSavings': PredictiveData.cost_savings,
+    'created_at': PredictiveData.created_at,
+    'updated_at': PredictiveData.updated_at
+}
+
+def requested_fields(field_map):
+    # ?fields=id,status selects a subset of columns; unknown names raise
+    # ValueError so the view can answer 400
+    value = request.args.get('fields')
+    if not value:
+        return list(field_map)
+    fields = [field.strip() for field in value.split(',') if field.strip()]
+    unknown = [field for field in fields if field not in field_map]
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+    return fields
+
+def rows_to_dicts(fields, rows):
+    return [dict(zip(fields, row)) for row in rows]
+
+def encode_json(payload):
+    if orjson is not None:
+        # orjson writes naive datetimes in the same format as isoformat()
+        return orjson.dumps(payload)
+    return json.dumps(payload, default=lambda value: value.isoformat(), separators=(',', ':')).encode()
+
+def json_response(payload, status=200):
+    body = encode_json(payload)
+    response = current_app.response_class(body, status=status, mimetype='application/json')
+    response.vary.add('Accept-Encoding')
+
+    if len(body) < current_app.config['COMPRESSION_MIN_SIZE']:
+        return response
+
+    accepted = request.accept_encodings
+    if brotli is not None and accepted['br']:
+        response.set_data(brotli.compress(body, quality=4))
+        response.headers['Content-Encoding'] = 'br'
+    elif accepted['gzip']:
+        response.set_data(gzip.compress(body, compresslevel=current_app.config['COMPRESSION_LEVEL']))
+        response.headers['Content-Encoding'] = 'gzip'
+    return response
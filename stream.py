@@ -0,0 +1,102 @@
+from flask import Blueprint, Response, request, jsonify, current_app
+from flask_jwt_extended import create_refresh_token, get_jwt, get_jwt_identity, jwt_required, verify_jwt_in_request
+from src.utils.events import event_hub
+from src.utils.tenancy import current_tenant, TENANT_CLAIM
+from datetime import timedelta
+import functools
+import json
+import queue
+
+stream_bp = Blueprint('stream', __name__)
+
+def format_event(sequence, event_type, data):
+    return f'id: {sequence}\nevent: {event_type}\ndata: {json.dumps(data)}\n\n'
+
+def generate_events(hub, subscriber, heartbeat):
+    try:
+        # Tell EventSource how long to wait before reconnecting
+        yield 'retry: 3000\n\n'
+        while True:
+            try:
+                yield format_event(*subscriber.queue.get(timeout=heartbeat))
+            except queue.Empty:
+                if subscriber.dropped:
+                    break
+                yield ': keepalive\n\n'
+                continue
+            if subscriber.dropped and subscriber.queue.empty():
+                break
+        # The client missed events; it should refetch the lists and reconnect
+        yield format_event(0, 'resync', {'reason': 'slow consumer'})
+    finally:
+        hub.unsubscribe(subscriber)
+
+# Marks the tokens POST /stream/token issues
+SCOPE_CLAIM = 'scope'
+STREAM_SCOPE = 'stream'
+
+def stream_jwt_required(view):
+    # EventSource can't send an Authorization header, so the stream also
+    # accepts ?jwt=<token>. Query strings end up in access logs, so only the
+    # short-lived stream tokens from POST /stream/token are taken there;
+    # session tokens still have to come in the header
+    @functools.wraps(view)
+    def decorator(*args, **kwargs):
+        if current_app.config['JWT_QUERY_STRING_NAME'] in request.args:
+            verify_jwt_in_request(locations=['query_string'], verify_type=False)
+            token = get_jwt()
+            if token['type'] != 'refresh' or token.get(SCOPE_CLAIM) != STREAM_SCOPE:
+                return jsonify({'error': 'Only stream tokens from POST /api/stream/token are accepted in the query string'}), 401
+        else:
+            verify_jwt_in_request(locations=['headers'])
+        return view(*args, **kwargs)
+    return decorator
+
+@stream_bp.route('/token', methods=['POST'])
+@jwt_required()
+def create_stream_token():
+    try:
+        # A refresh-type token, so every other endpoint (they all take
+        # access tokens only) rejects it should it leak from a log. A zero
+        # lifetime would mean no expiry at all
+        ttl = max(current_app.config['STREAM_TOKEN_TTL'], 1)
+        token = create_refresh_token(
+            identity=get_jwt_identity(),
+            expires_delta=timedelta(seconds=ttl),
+            additional_claims={TENANT_CLAIM: current_tenant(), SCOPE_CLAIM: STREAM_SCOPE}
+        )
+        return jsonify({'token': token, 'expires_in': ttl}), 201
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@stream_bp.route('', methods=['GET'])
+@stream_jwt_required
+def stream_changes():
+    try:
+        # The tenant's hub itself: the generator runs after the request
+        hub = event_hub.instance()
+        subscriber = hub.subscribe(
+            current_app.config['STREAM_QUEUE_SIZE'],
+            current_app.config['STREAM_MAX_CLIENTS']
+        )
+        if subscriber is None:
+            return jsonify({'error': 'Too many stream clients, retry later'}), 503
+
+        response = Response(
+            generate_events(hub, subscriber, current_app.config['STREAM_HEARTBEAT']),
+            mimetype='text/event-stream'
+        )
+        response.headers['Cache-Control'] = 'no-cache'
+        response.headers['X-Accel-Buffering'] = 'no'
+        return response
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@stream_bp.route('/status', methods=['GET'])
+@jwt_required()
+def get_stream_status():
+    try:
+        return jsonify(event_hub.metrics()), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
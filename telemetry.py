@@ -0,0 +1,195 @@
+from flask import Blueprint, request, jsonify, current_app
+from flask_jwt_extended import jwt_required
+from src.models.user import db
+from src.models.machine import Machine
+from src.utils.cache import dashboard_stats_cache
+from src.utils.events import event_hub
+from src.utils.journal import record_changes
+from src.utils.tenancy import PerTenant, current_tenant, tenant_context
+from datetime import datetime
+import atexit
+import threading
+import time
+
+telemetry_bp = Blueprint('telemetry', __name__)
+
+TELEMETRY_FIELDS = ('temperature', 'vibration', 'efficiency')
+
+class TelemetryBuffer:
+    # Readings are coalesced last-write-wins per machine and written out by a
+    # background thread, so a burst of pushes becomes one UPDATE per interval
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.pending = {}
+        self.wakeup = threading.Event()
+        self.thread = None
+        self.app = None
+        self.tenant = None
+        # Machines written but not journaled yet, and when each was last
+        # journaled (monotonic seconds)
+        self.unjournaled = set()
+        self.journaled_at = {}
+        self.stats = {
+            'readings_received': 0,
+            'readings_coalesced': 0,
+            'rows_flushed': 0,
+            'flushes': 0,
+            'flush_errors': 0,
+            'journaled': 0,
+            'last_flush_ms': None,
+            'max_flush_ms': None,
+            'total_flush_ms': 0.0
+        }
+
+    def start(self, app):
+        with self.lock:
+            if self.thread is not None:
+                return
+            self.app = app
+            self.tenant = current_tenant()
+            self.thread = threading.Thread(target=self.run, name=f'telemetry-flusher-{self.tenant}', daemon=True)
+            self.thread.start()
+        atexit.register(self.flush)
+
+    def add(self, readings):
+        with self.lock:
+            for machine_id, values in readings:
+                current = self.pending.get(machine_id)
+                if current is None:
+                    self.pending[machine_id] = values
+                else:
+                    current.update(values)
+                    self.stats['readings_coalesced'] += 1
+                self.stats['readings_received'] += 1
+            depth = len(self.pending)
+        if depth >= self.app.config['TELEMETRY_MAX_BUFFER']:
+            self.wakeup.set()
+        return depth
+
+    def run(self):
+        while True:
+            self.wakeup.wait(self.app.config['TELEMETRY_FLUSH_INTERVAL'])
+            self.wakeup.clear()
+            self.flush()
+
+    def journal_due(self, now):
+        # Machines written since their last journal entry whose window has
+        # passed. Called with the lock held
+        window = self.app.config['TELEMETRY_JOURNAL_INTERVAL']
+        return sorted(machine_id for machine_id in self.unjournaled
+                      if now - self.journaled_at.get(machine_id, now - window) >= window)
+
+    def flush(self):
+        # Writes the buffered readings, and journals machines at most once
+        # per TELEMETRY_JOURNAL_INTERVAL: a gateway pushing every second would
+        # otherwise add a change_log row per machine per flush
+        started_at = time.monotonic()
+        with self.lock:
+            pending, self.pending = self.pending, {}
+            self.unjournaled.update(pending)
+            journal = self.journal_due(started_at)
+        if not pending and not journal:
+            return 0
+
+        started = time.perf_counter()
+        now = datetime.utcnow()
+
+        # executemany needs every row to bind the same columns, so group
+        # machines by which fields they received in this interval
+        groups = {}
+        for machine_id, values in pending.items():
+            groups.setdefault(tuple(sorted(values)), []).append(dict(values, b_id=machine_id, updated_at=now))
+
+        with tenant_context(self.tenant), self.app.app_context():
+            try:
+                # The SET clause is derived from each group's parameter keys
+                statement = db.update(Machine.__table__).where(Machine.__table__.c.id == db.bindparam('b_id'))
+                for rows in groups.values():
+                    db.session.execute(statement, rows)
+                # One entry per due machine with its latest values, covering
+                # every flush since its previous entry. Readings for unknown
+                # ids updated nothing and have no row to journal
+                if journal:
+                    machines = db.session.scalars(db.select(Machine).where(Machine.id.in_(journal))).all()
+                    record_changes('machine', 'updated', [(machine.id, machine.to_dict()) for machine in machines])
+                db.session.commit()
+                if pending:
+                    dashboard_stats_cache.invalidate()
+                    event_hub.publish('machine.batch', {'created': [], 'updated': sorted(pending)})
+            except Exception:
+                db.session.rollback()
+                with self.lock:
+                    self.stats['flush_errors'] += 1
+                    # Put the readings back unless newer ones already arrived
+                    for machine_id, values in pending.items():
+                        self.pending[machine_id] = dict(values, **self.pending.get(machine_id, {}))
+                current_app.logger.exception('Telemetry flush failed')
+                return 0
+
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        with self.lock:
+            window = self.app.config['TELEMETRY_JOURNAL_INTERVAL']
+            self.unjournaled.difference_update(journal)
+            self.journaled_at.update((machine_id, started_at) for machine_id in journal)
+            if journal:
+                # Entries past their window no longer hold anything back
+                self.journaled_at = {machine_id: at for machine_id, at in self.journaled_at.items()
+                                     if started_at - at < window}
+            self.stats['journaled'] += len(journal)
+            if pending:
+                self.stats['flushes'] += 1
+                self.stats['rows_flushed'] += len(pending)
+                self.stats['last_flush_ms'] = round(elapsed_ms, 2)
+                self.stats['max_flush_ms'] = round(max(elapsed_ms, self.stats['max_flush_ms'] or 0), 2)
+                self.stats['total_flush_ms'] += elapsed_ms
+        return len(pending)
+
+    def metrics(self):
+        with self.lock:
+            stats = dict(self.stats, buffer_depth=len(self.pending))
+        stats['avg_flush_ms'] = round(stats.pop('total_flush_ms') / stats['flushes'], 2) if stats['flushes'] else None
+        return stats
+
+# One buffer and flusher thread per tenant that has pushed readings
+telemetry_buffer = PerTenant(TelemetryBuffer)
+
+@telemetry_bp.route('/', methods=['POST'])
+@jwt_required()
+def ingest_telemetry():
+    try:
+        data = request.get_json()
+        readings = data.get('readings') if isinstance(data, dict) else data
+
+        if not isinstance(readings, list) or not readings:
+            return jsonify({'error': 'A non-empty array of readings is required'}), 400
+
+        parsed = []
+        for reading in readings:
+            machine_id = reading.get('machine_id') if isinstance(reading, dict) else None
+            if not machine_id:
+                return jsonify({'error': 'Each reading needs a machine_id'}), 400
+            if not isinstance(machine_id, str):
+                return jsonify({'error': 'machine_id must be a string'}), 400
+            try:
+                values = {field: float(reading[field]) for field in TELEMETRY_FIELDS if reading.get(field) is not None}
+            except (TypeError, ValueError):
+                return jsonify({'error': 'Temperature, vibration and efficiency must be numbers'}), 400
+            if values:
+                parsed.append((machine_id, values))
+
+        telemetry_buffer.start(current_app._get_current_object())
+        depth = telemetry_buffer.add(parsed)
+
+        return jsonify({'accepted': len(parsed), 'buffer_depth': depth}), 202
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@telemetry_bp.route('/metrics', methods=['GET'])
+@jwt_required()
+def get_telemetry_metrics():
+    try:
+        return jsonify(telemetry_buffer.metrics()), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
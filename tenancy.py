@@ -0,0 +1,193 @@
+from flask import g, request, jsonify, current_app, has_app_context
+from flask_sqlalchemy.session import Session
+from sqlalchemy.engine import make_url
+from contextlib import contextmanager
+from contextvars import ContextVar
+from src.models.user import db
+from src.utils.routing import engine_options
+import functools
+import click
+import json
+import re
+import threading
+
+DEFAULT_TENANT = 'default'
+
+TENANT_CLAIM = 'tenant'
+
+TENANT_HEADER = 'X-Tenant'
+
+TENANT_NAME = re.compile(r'^[A-Za-z0-9_-]{1,64}$')
+
+# Tenant for code running outside a request: CLI commands and background
+# threads. Requests keep theirs on g
+_current_tenant = ContextVar('maintai_tenant', default=DEFAULT_TENANT)
+
+class UnknownTenant(ValueError):
+    pass
+
+def parse_tenant_databases(value):
+    # TENANT_DATABASES maps tenant names to a database URL, or to
+    # {"url": ..., "schema": ..., <engine options>} for a PostgreSQL schema
+    # and/or a pool sized for that tenant
+    if isinstance(value, str):
+        value = json.loads(value) if value.strip() else {}
+    tenants = dict(value or {})
+    for name, database in tenants.items():
+        if not TENANT_NAME.match(name) or name == DEFAULT_TENANT:
+            raise ValueError(f'Invalid tenant name: {name!r}')
+        if isinstance(database, str):
+            tenants[name] = {'url': database}
+        elif not isinstance(database, dict) or not database.get('url'):
+            raise ValueError(f'Tenant {name!r} needs a database url')
+    return tenants
+
+def bind_key(tenant):
+    return f'tenant:{tenant}'
+
+def schema_connect_args(url, schema):
+    # Pins every connection of a pool to the tenant's schema
+    if make_url(url).get_driver_name() == 'asyncpg':
+        return {'server_settings': {'search_path': schema}}
+    return {'options': f'-csearch_path={schema}'}
+
+def tenant_engine_options(name, database, driver_url=str):
+    # Engine options for one tenant's database. driver_url maps its URL to
+    # the driver the engine runs on; the async engines pass their own
+    options = dict(engine_options('DB'), **database)
+    options['url'] = driver_url(options['url'])
+    schema = options.pop('schema', None)
+    if schema:
+        if make_url(options['url']).get_backend_name() != 'postgresql':
+            raise ValueError(f'Tenant {name!r}: schemas are only supported on PostgreSQL')
+        options['connect_args'] = dict(options.get('connect_args', {}), **schema_connect_args(options['url'], schema))
+    return options
+
+def tenant_binds(tenants):
+    # One Flask-SQLAlchemy bind, and so one engine and connection pool, per
+    # tenant. Tenants sharing a server through separate schemas still get
+    # their own pool, since each connection is pinned to one search_path
+    return {bind_key(name): tenant_engine_options(name, database) for name, database in tenants.items()}
+
+def tenant_names():
+    return [DEFAULT_TENANT, *current_app.config['TENANT_DATABASES']]
+
+def tenant_schema(tenant):
+    return current_app.config['TENANT_DATABASES'].get(tenant, {}).get('schema')
+
+def current_tenant():
+    if has_app_context() and 'tenant' in g:
+        return g.tenant
+    return _current_tenant.get()
+
+@contextmanager
+def tenant_context(tenant):
+    # Runs the block against tenant's database, e.g. in a CLI command or a
+    # background thread. Open a new app context inside it so the session
+    # isn't one already bound to another tenant
+    if has_app_context() and tenant not in tenant_names():
+        raise UnknownTenant(f'Unknown tenant: {tenant}')
+    token = _current_tenant.set(tenant)
+    try:
+        yield tenant
+    finally:
+        _current_tenant.reset(token)
+
+def tenant_engine(tenant):
+    # None means the app's default database (and read replica, if any)
+    if tenant == DEFAULT_TENANT:
+        return None
+    return db.engines[bind_key(tenant)]
+
+class TenantSession(Session):
+    # Every statement and flush in a session goes to the current tenant's
+    # engine, so queries are scoped to the tenant without filtering by it
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None:
+            engine = tenant_engine(current_tenant())
+            if engine is not None:
+                return engine
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+class PerTenant:
+    # Stands in for a process-wide singleton (a cache, the event hub, a
+    # background worker) and forwards to a separate instance per tenant, so
+    # state never leaks between tenants. instance() returns the current
+    # tenant's instance itself, for code that outlives the request
+
+    def __init__(self, factory):
+        self._factory = factory
+        self._lock = threading.Lock()
+        self._instances = {}
+
+    def instance(self, tenant=None):
+        tenant = tenant or current_tenant()
+        with self._lock:
+            instance = self._instances.get(tenant)
+            if instance is None:
+                instance = self._instances[tenant] = self._factory()
+            return instance
+
+    def __getattr__(self, name):
+        return getattr(self.instance(), name)
+
+def tenant_option(command):
+    # Adds --tenant (or MAINTAI_TENANT) to a CLI command and runs it against
+    # that tenant's database
+    @click.option('--tenant', default=DEFAULT_TENANT, envvar='MAINTAI_TENANT', show_default=True,
+                  help='Tenant whose database the command runs against.')
+    @functools.wraps(command)
+    def run_for_tenant(*args, tenant, **kwargs):
+        try:
+            with tenant_context(tenant):
+                return command(*args, **kwargs)
+        except UnknownTenant as e:
+            raise click.BadParameter(str(e), param_hint='--tenant')
+    return run_for_tenant
+
+def header_tenant():
+    # Tenant for requests without a token (login, register); tokens carry
+    # their own and verify_tenant_claim() switches to it
+    tenant = request.headers.get(TENANT_HEADER) or DEFAULT_TENANT
+    if tenant not in tenant_names():
+        raise UnknownTenant(f'Unknown tenant: {tenant}')
+    return tenant
+
+def verify_tenant_claim(jwt_header, jwt_data):
+    # Runs as part of @jwt_required, after the signature is checked and
+    # before the view, so the token is only decoded once. Tokens issued
+    # before tenants existed belong to the default tenant
+    tenant = jwt_data.get(TENANT_CLAIM, DEFAULT_TENANT)
+    header = request.headers.get(TENANT_HEADER)
+    if tenant not in tenant_names() or (header and header != tenant):
+        return False
+    g.tenant = tenant
+    return True
+
+def tenant_claim_failed(jwt_header, jwt_data):
+    tenant = jwt_data.get(TENANT_CLAIM, DEFAULT_TENANT)
+    if tenant not in tenant_names():
+        return jsonify({'error': f'Unknown tenant: {tenant}'}), 401
+    return jsonify({'error': 'Token was issued for another tenant'}), 403
+
+def init_app(app, jwt):
+    # Must run before db.init_app(), which creates an engine per bind
+    app.config['TENANT_DATABASES'] = parse_tenant_databases(app.config.get('TENANT_DATABASES'))
+    binds = tenant_binds(app.config['TENANT_DATABASES'])
+    if binds:
+        app.config['SQLALCHEMY_BINDS'] = dict(app.config.get('SQLALCHEMY_BINDS') or {}, **binds)
+
+    # db is created without session options, so the tenant-aware session
+    # class is installed on its session factory instead
+    db.session.session_factory.class_ = TenantSession
+
+    jwt.token_verification_loader(verify_tenant_claim)
+    jwt.token_verification_failed_loader(tenant_claim_failed)
+
+    @app.before_request
+    def resolve_tenant():
+        try:
+            g.tenant = header_tenant()
+        except UnknownTenant as e:
+            return jsonify({'error': str(e)}), 400
@@ -0,0 +1,78 @@
+from contextlib import contextmanager
+from sqlalchemy import event
+from src.main import create_app, init_db
+from src.models.user import db
+import pytest
+
+# Process-wide state kept per tenant. Every test app serves the default
+# tenant, so it is cleared between tests rather than carried from one test
+# database into the next
+def per_tenant_singletons():
+    from src.utils.cache import dashboard_stats_cache
+    from src.utils.events import event_hub
+    from src.utils.identity import identity_cache
+    from src.utils.recompute import predictive_recomputer
+    from src.utils.scheduler import maintenance_scheduler
+    from src.routes.telemetry import telemetry_buffer
+    return (dashboard_stats_cache, event_hub, identity_cache, predictive_recomputer, maintenance_scheduler, telemetry_buffer)
+
+@pytest.fixture(autouse=True)
+def reset_per_tenant_state():
+    yield
+    for singleton in per_tenant_singletons():
+        singleton._instances.clear()
+
+@pytest.fixture
+def make_app(tmp_path):
+    # Apps on their own SQLite file under tmp_path, initialized like a
+    # deployment with `flask maintai init-db`
+    def make(name='maintai', **config):
+        app = create_app(dict({
+            'TESTING': True,
+            'SQLALCHEMY_DATABASE_URI': f"sqlite:///{tmp_path / f'{name}.db'}",
+            'PREDICTIVE_RECOMPUTE_INTERVAL': 0,
+            'DASHBOARD_STATS_TTL': 0
+        }, **config))
+        with app.app_context():
+            init_db()
+        return app
+    return make
+
+@pytest.fixture
+def app(make_app):
+    return make_app()
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+def login(client, username='admin', password='password'):
+    response = client.post('/api/auth/login', json={'username': username, 'password': password})
+    assert response.status_code == 200, response.get_json()
+    return {'Authorization': f"Bearer {response.get_json()['access_token']}"}
+
+@pytest.fixture
+def auth_headers(client):
+    return login(client)
+
+def generate_fleet(app, machines, activities, seed=42):
+    # The seeded benchmark fleet, scored and with its cost ledger built
+    from benchmarks.fleet import generate_fleet
+    with app.app_context():
+        generate_fleet(machines, activities, seed=seed, log=lambda message: None)
+
+@contextmanager
+def recorded_statements(app):
+    # Every statement sent to app's database while the block runs
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    with app.app_context():
+        engine = db.engine
+    event.listen(engine, 'before_cursor_execute', record)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, 'before_cursor_execute', record)
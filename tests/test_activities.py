@@ -0,0 +1,39 @@
+from datetime import datetime
+from src.models.activity import Activity
+from src.models.user import db
+import base64
+import pytest
+
+def add_activities(app, *timestamps, status='pending'):
+    with app.app_context():
+        db.session.add_all(Activity(description=f'Belt check {number}', technician='Ana', status=status, timestamp=timestamp)
+                           for number, timestamp in enumerate(timestamps))
+        db.session.commit()
+
+def test_keyset_pages_cover_every_activity_once_in_order(app, client, auth_headers):
+    # Ties on timestamp are broken by id, so a page boundary between them
+    # neither repeats nor skips a row
+    add_activities(app, datetime(2024, 1, 3), datetime(2024, 1, 2), datetime(2024, 1, 2), datetime(2024, 1, 2), datetime(2024, 1, 1))
+    add_activities(app, datetime(2024, 1, 2), status='completed')
+
+    ids, cursor = [], None
+    while True:
+        query = f'&cursor={cursor}' if cursor else ''
+        page = client.get(f'/api/activities/?limit=2{query}', headers=auth_headers).get_json()
+        assert len(page['activities']) <= 2
+        ids.extend(activity['id'] for activity in page['activities'])
+        cursor = page['next_cursor']
+        if cursor is None:
+            break
+
+    assert ids == [1, 6, 4, 3, 2, 5]
+    completed = client.get('/api/activities/?limit=2&status=completed', headers=auth_headers).get_json()
+    assert [activity['id'] for activity in completed['activities']] == [6]
+    assert completed['next_cursor'] is None
+
+@pytest.mark.parametrize('cursor', ['not-a-cursor', base64.urlsafe_b64encode(b'"2024-01-01"').decode(), base64.urlsafe_b64encode(b'["yesterday", 1]').decode()])
+def test_malformed_cursor_is_rejected(client, auth_headers, cursor):
+    response = client.get(f'/api/activities/?cursor={cursor}', headers=auth_headers)
+
+    assert response.status_code == 400
+    assert response.get_json()['error'].startswith('Invalid query parameters')
@@ -0,0 +1,53 @@
+from datetime import datetime, timedelta
+from src.main import init_db
+from src.models.activity import Activity
+from src.models.archived_activity import ArchivedActivity
+from src.models.user import db
+from src.utils.archive import archive_activities
+
+def add_completed_activities(app, count):
+    with app.app_context():
+        db.session.add_all(Activity(
+            description=f'Belt check {number}', technician='Ana', status='completed',
+            timestamp=datetime(2020, 1, 1), completed_at=datetime(2020, 1, 2)
+        ) for number in range(count))
+        db.session.commit()
+
+def archive_all(app):
+    with app.app_context():
+        return archive_activities(timedelta(days=1), batch_size=100, pause=0)
+
+def test_ids_of_archived_activities_are_not_reused(app, client, auth_headers):
+    add_completed_activities(app, 3)
+    assert archive_all(app) == 3
+
+    response = client.post('/api/activities/', json={'description': 'Oil change', 'technician': 'Ben'}, headers=auth_headers)
+
+    assert response.status_code == 201
+    assert response.get_json()['id'] == 4
+    listed = client.get('/api/activities/?include_archived=true', headers=auth_headers).get_json()
+    ids = [activity['id'] for activity in listed['activities']]
+    assert sorted(ids) == [1, 2, 3, 4]
+
+def test_init_db_rebuilds_sqlite_activity_table_without_autoincrement(app, client, auth_headers):
+    with app.app_context():
+        # The table as databases created before AUTOINCREMENT have it
+        ddl = db.session.execute(db.text("SELECT sql FROM sqlite_master WHERE name = 'activity'")).scalar()
+        db.session.execute(db.text('DROP TABLE activity'))
+        db.session.execute(db.text(ddl.replace(' AUTOINCREMENT', '')))
+        db.session.commit()
+    client.post('/api/activities/', json={'description': 'Oil change', 'technician': 'Ben'}, headers=auth_headers)
+    add_completed_activities(app, 3)
+    archive_all(app)
+
+    with app.app_context():
+        init_db()
+        ddl = db.session.execute(db.text("SELECT sql FROM sqlite_master WHERE name = 'activity'")).scalar()
+        assert 'AUTOINCREMENT' in ddl
+        assert db.session.scalars(db.select(Activity.id)).all() == [1]
+        assert db.session.scalars(db.select(ArchivedActivity.id).order_by(ArchivedActivity.id)).all() == [2, 3, 4]
+
+    created = client.post('/api/activities/', json={'description': 'Belt swap', 'technician': 'Ben'}, headers=auth_headers)
+    assert created.get_json()['id'] == 5
+    found = client.get('/api/activities/search?q=swap', headers=auth_headers).get_json()
+    assert [activity['id'] for activity in found['activities']] == [5]
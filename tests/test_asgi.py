@@ -0,0 +1,103 @@
+from src.asgi import AsgiServer
+from src.routes.analytics import async_views
+from src.utils.async_db import async_db
+from src.utils.events import event_hub
+from src.utils.tenancy import DEFAULT_TENANT
+from tests.conftest import login
+import asyncio
+import json
+import pytest
+
+async def request(server, path, headers=None, until=None):
+    # One GET through server as uvicorn would send it. The client
+    # disconnects once until(body) holds, or after the full response
+    messages = []
+    disconnect = asyncio.Event()
+    requested = False
+    scope = {
+        'type': 'http', 'http_version': '1.1', 'method': 'GET', 'scheme': 'http',
+        'path': path, 'root_path': '', 'query_string': b'',
+        'headers': [(name.lower().encode('latin1'), value.encode('latin1')) for name, value in (headers or {}).items()],
+        'server': ('testserver', 80), 'client': ('127.0.0.1', 50000)
+    }
+
+    async def receive():
+        nonlocal requested
+        if not requested:
+            requested = True
+            return {'type': 'http.request', 'body': b'', 'more_body': False}
+        await disconnect.wait()
+        return {'type': 'http.disconnect'}
+
+    async def send(message):
+        messages.append(message)
+        body = b''.join(message.get('body', b'') for message in messages[1:])
+        if until is not None and until(body):
+            disconnect.set()
+
+    await asyncio.wait_for(server(scope, receive, send), timeout=10)
+    start, chunks = messages[0], messages[1:]
+    return start['status'], {name.decode(): value.decode() for name, value in start['headers']}, b''.join(chunk.get('body', b'') for chunk in chunks)
+
+def serve(app, *requests):
+    # Runs the requests on one event loop, then closes the async engines
+    # that loop opened
+    server = AsgiServer(app, async_views)
+
+    async def run():
+        try:
+            return [await request(server, *arguments) for arguments in requests]
+        finally:
+            await async_db.dispose()
+    try:
+        return asyncio.run(run())
+    finally:
+        server.executor.shutdown()
+
+@pytest.fixture
+def generated(client, auth_headers):
+    client.post('/api/machines/generate-sample', headers=auth_headers)
+    client.post('/api/analytics/generate-sample-data', headers=auth_headers)
+
+def test_sync_json_view_and_not_modified(app, client, auth_headers, generated):
+    status, headers, body = serve(app, ('/api/machines/', auth_headers))[0]
+
+    assert status == 200
+    assert headers['content-type'] == 'application/json'
+    assert json.loads(body) == client.get('/api/machines/', headers=auth_headers).get_json()
+
+    (status, _, body), = serve(app, ('/api/machines/', dict(auth_headers, **{'If-None-Match': headers['etag']})))
+    assert status == 304
+    assert body == b''
+
+def test_async_view_matches_the_sync_view(app, client, auth_headers, generated):
+    expected = client.get('/api/analytics/predictive', headers=auth_headers)
+
+    (status, headers, body), (unauthorized, _, _) = serve(app, ('/api/analytics/predictive', auth_headers), ('/api/analytics/predictive', {}))
+
+    assert status == 200
+    assert json.loads(body) == expected.get_json()
+    assert headers['etag'] == expected.headers['ETag']
+    assert unauthorized == 401
+
+    (status, _, body), = serve(app, ('/api/analytics/predictive', dict(auth_headers, **{'If-None-Match': headers['etag']})))
+    assert status == 304
+    assert body == b''
+
+def test_event_stream_delivers_events_until_the_client_disconnects(make_app):
+    app = make_app(STREAM_HEARTBEAT=0.05)
+    headers = login(app.test_client())
+    hub = event_hub.instance(DEFAULT_TENANT)
+
+    def delivered(body):
+        # Publish once the stream is open; disconnect once the event arrived
+        if body.startswith(b'retry:') and not hub.stats['published']:
+            hub.publish('machine.updated', {'id': 'M-1'})
+        return b'event: machine.updated' in body
+
+    (status, response_headers, body), = serve(app, ('/api/stream', headers, delivered))
+
+    assert status == 200
+    assert response_headers['content-type'].startswith('text/event-stream')
+    assert b'data: {"id": "M-1"}' in body
+    assert hub.metrics()['clients'] == 0
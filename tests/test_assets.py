@@ -0,0 +1,58 @@
+from src.utils import assets
+from src.utils.assets import static_assets
+import gzip
+import os
+
+def test_debug_mode_rescans_only_changed_files(app, tmp_path, monkeypatch):
+    folder = tmp_path / 'static'
+    folder.mkdir()
+    (folder / 'index.html').write_text('<html>' + 'home ' * 200 + '</html>')
+    (folder / 'app.js').write_text('console.log("v1");' * 50)
+    app.static_folder = str(folder)
+    app.debug = True
+    static_assets.reset()
+
+    compressed = []
+    compress = assets.compress
+    monkeypatch.setattr(assets, 'compress', lambda body, mimetype: compressed.append(body) or compress(body, mimetype))
+    client = app.test_client()
+
+    assert client.get('/app.js').status_code == 200
+    assert len(compressed) == 2
+    client.get('/app.js')
+    client.get('/')
+    assert len(compressed) == 2
+
+    (folder / 'app.js').write_text('console.log("v2");' * 50)
+    os.utime(folder / 'app.js', ns=(0, os.stat(folder / 'app.js').st_mtime_ns + 1))
+    assert b'v2' in client.get('/app.js', headers={'Accept-Encoding': 'identity'}).data
+    assert compressed[2:] == [b'console.log("v2");' * 50]
+
+def test_hashed_paths_are_immutable_and_plain_paths_revalidate(app, tmp_path, monkeypatch):
+    folder = tmp_path / 'static'
+    folder.mkdir()
+    (folder / 'index.html').write_text('<html>home</html>')
+    (folder / 'app.js').write_text('console.log("v1");' * 50)
+    app.static_folder = str(folder)
+    monkeypatch.setattr(assets, 'brotli', None)
+    static_assets.reset()
+    client = app.test_client()
+
+    hashed = client.get('/asset-manifest.json').get_json()['app.js']
+    assert hashed.startswith('app.') and hashed.endswith('.js') and hashed != 'app.js'
+
+    immutable = client.get(f'/{hashed}', headers={'Accept-Encoding': 'gzip'})
+    assert immutable.headers['Cache-Control'] == assets.IMMUTABLE
+    assert immutable.headers['Content-Encoding'] == 'gzip'
+    assert gzip.decompress(immutable.data) == b'console.log("v1");' * 50
+
+    plain = client.get('/app.js', headers={'Accept-Encoding': 'identity'})
+    assert plain.headers['Cache-Control'] == 'no-cache'
+    assert plain.data == b'console.log("v1");' * 50
+    revalidated = client.get('/app.js', headers={'Accept-Encoding': 'identity', 'If-None-Match': plain.headers['ETag']})
+    assert revalidated.status_code == 304
+    # The gzip variant has its own tag, so a cached identity body isn't reused for it
+    assert client.get('/app.js', headers={'Accept-Encoding': 'gzip', 'If-None-Match': plain.headers['ETag']}).status_code == 200
+
+    # Client-side routes get the SPA entry point
+    assert client.get('/machines/M-1').data == b'<html>home</html>'
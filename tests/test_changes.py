@@ -0,0 +1,46 @@
+from tests.conftest import login
+
+def create_machines(client, headers, count):
+    client.post('/api/machines/bulk', json=[{'id': f'M-{number}', 'name': f'Machine {number}'} for number in range(count)], headers=headers)
+
+def test_feed_pages_through_changes_in_sequence_order(client, auth_headers):
+    create_machines(client, auth_headers, 3)
+    client.put('/api/machines/M-1', json={'status': 'warning'}, headers=auth_headers)
+    client.delete('/api/machines/M-2', headers=auth_headers)
+
+    first = client.get('/api/changes?since=0&limit=3', headers=auth_headers).get_json()
+    assert first['has_more'] is True
+    assert [(change['entity_id'], change['action']) for change in first['changes']] == [
+        ('M-0', 'created'), ('M-1', 'created'), ('M-2', 'created')
+    ]
+
+    rest = client.get(f"/api/changes?since={first['next_since']}", headers=auth_headers).get_json()
+    assert rest['has_more'] is False
+    assert [(change['entity_id'], change['action']) for change in rest['changes']] == [
+        ('M-1', 'updated'), ('M-2', 'deleted')
+    ]
+    assert rest['changes'][0]['data']['status'] == 'warning'
+
+    caught_up = client.get(f"/api/changes?since={rest['next_since']}", headers=auth_headers).get_json()
+    assert caught_up == {'changes': [], 'next_since': rest['next_since'], 'has_more': False}
+
+def test_committed_changes_are_returned_immediately(client, auth_headers):
+    create_machines(client, auth_headers, 1)
+    changes = client.get('/api/changes', headers=auth_headers).get_json()['changes']
+    assert [change['entity_id'] for change in changes] == ['M-0']
+
+def test_clients_too_far_behind_get_a_snapshot_token(make_app):
+    app = make_app(CHANGE_FEED_MAX_LAG=2)
+    client = app.test_client()
+    headers = login(client)
+    create_machines(client, headers, 3)
+
+    response = client.get('/api/changes?since=0', headers=headers)
+
+    assert response.status_code == 410
+    assert response.get_json()['snapshot_token'] == 3
+    resumed = client.get('/api/changes?since=3', headers=headers)
+    assert resumed.status_code == 200
+
+def test_feed_rejects_non_integer_positions(client, auth_headers):
+    assert client.get('/api/changes?since=abc', headers=auth_headers).status_code == 400
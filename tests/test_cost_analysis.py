@@ -0,0 +1,45 @@
+from datetime import datetime
+from src.models.user import db
+from src.utils.ledger import period_of, rebuild_cost_ledger
+
+def cost_analysis(client, headers, query=''):
+    response = client.get(f'/api/analytics/cost-analysis{query}', headers=headers)
+    assert response.status_code == 200
+    return response.get_json()
+
+def totals(analysis):
+    return analysis['total_maintenance_cost'], analysis['labor_cost'], analysis['parts_cost'], analysis['completed_activities']
+
+def test_monthly_totals_follow_activity_writes(app, client, auth_headers):
+    for machine_id in ('A', 'B'):
+        client.post('/api/machines/', json={'id': machine_id, 'name': f'Machine {machine_id}'}, headers=auth_headers)
+    activities = [client.post('/api/activities/', json=activity, headers=auth_headers).get_json()['id'] for activity in (
+        {'description': 'Bearing swap', 'technician': 'Ana', 'machine_id': 'A', 'status': 'completed', 'labor_cost': 100, 'parts_cost': 50},
+        {'description': 'Belt swap', 'technician': 'Ben', 'machine_id': 'B', 'status': 'completed', 'labor_cost': 200},
+        {'description': 'Motor rewind', 'technician': 'Ana', 'machine_id': 'A', 'labor_cost': 999}
+    )]
+
+    # Only completed work is booked, in the month it was completed
+    fleet = cost_analysis(client, auth_headers)
+    assert totals(fleet) == (350, 300, 50, 2)
+    assert fleet['monthly'][-1]['period'] == period_of(datetime.utcnow())
+    assert totals(cost_analysis(client, auth_headers, '?machine_id=A')) == (150, 100, 50, 1)
+
+    client.put(f'/api/activities/{activities[2]}', json={'status': 'completed'}, headers=auth_headers)
+    client.put(f'/api/activities/{activities[0]}', json={'parts_cost': 0}, headers=auth_headers)
+    client.delete(f'/api/activities/{activities[1]}', headers=auth_headers)
+
+    assert totals(cost_analysis(client, auth_headers, '?machine_id=A')) == (1099, 1099, 0, 2)
+    assert cost_analysis(client, auth_headers, '?machine_id=B')['monthly'] == []
+    fleet = cost_analysis(client, auth_headers)
+    assert totals(fleet) == (1099, 1099, 0, 2)
+
+    # The incrementally kept totals match a rebuild from the activities
+    with app.app_context():
+        assert rebuild_cost_ledger() == 2
+        db.session.commit()
+    assert cost_analysis(client, auth_headers) == fleet
+
+def test_invalid_periods_are_rejected(client, auth_headers):
+    assert client.get('/api/analytics/cost-analysis?start=2024-13', headers=auth_headers).status_code == 400
+    assert client.get('/api/analytics/cost-analysis?start=2024-06&end=2024-01', headers=auth_headers).status_code == 400
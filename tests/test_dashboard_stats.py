@@ -0,0 +1,39 @@
+from src.models.machine import Machine
+from src.models.user import db
+from tests.conftest import login
+import pytest
+
+@pytest.fixture
+def cached_app(make_app):
+    # A TTL long enough that only invalidate() refreshes the snapshot
+    return make_app(DASHBOARD_STATS_TTL=3600)
+
+def test_snapshot_is_cached_until_a_write_through_the_api(cached_app):
+    client = cached_app.test_client()
+    headers = login(client)
+
+    def stats():
+        response = client.get('/api/analytics/dashboard-stats', headers=headers)
+        assert response.status_code == 200
+        return response.get_json()
+
+    assert stats()['total_machines'] == 0
+
+    # A write that bypasses the API is only seen once the TTL runs out
+    with cached_app.app_context():
+        db.session.add(Machine(id='M-1', name='Press', status='warning'))
+        db.session.commit()
+    assert stats()['total_machines'] == 0
+
+    client.post('/api/machines/', json={'id': 'M-2', 'name': 'Lathe'}, headers=headers)
+    after_create = stats()
+    assert (after_create['total_machines'], after_create['warning_machines'], after_create['operational_machines']) == (2, 1, 1)
+
+    client.put('/api/machines/M-2', json={'status': 'maintenance'}, headers=headers)
+    assert stats()['maintenance_machines'] == 1
+
+    client.post('/api/activities/', json={'description': 'Oil change', 'technician': 'Ben', 'machine_id': 'M-2'}, headers=headers)
+    assert stats()['recent_activities'] == 1
+
+    client.delete('/api/machines/M-1', headers=headers)
+    assert stats()['total_machines'] == 1
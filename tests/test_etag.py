@@ -0,0 +1,23 @@
+from tests.conftest import login
+
+def test_maintenance_schedule_answers_304_until_the_plan_changes(make_app):
+    app = make_app(SCHEDULER_SYNC_INTERVAL=0)
+    client = app.test_client()
+    headers = login(client)
+    client.post('/api/machines/generate-sample', headers=headers)
+
+    first = client.get('/api/analytics/maintenance-schedule', headers=headers)
+    assert first.status_code == 200
+    assert [job['rank'] for job in first.get_json()['schedule']] == [1, 2, 3, 4]
+    etag = first.headers['ETag']
+
+    repeat = client.get('/api/analytics/maintenance-schedule', headers=dict(headers, **{'If-None-Match': etag}))
+    assert repeat.status_code == 304
+
+    client.put('/api/machines/MACHINE-001', json={'status': 'maintenance'}, headers=headers)
+    changed = client.get('/api/analytics/maintenance-schedule', headers=dict(headers, **{'If-None-Match': etag}))
+    assert changed.status_code == 200
+    assert changed.headers['ETag'] != etag
+
+    other_page = client.get('/api/analytics/maintenance-schedule?limit=2', headers=headers)
+    assert other_page.headers['ETag'] != changed.headers['ETag']
@@ -0,0 +1,86 @@
+from src.models.change_log import ChangeLog
+from src.models.user import db
+from src.routes.telemetry import telemetry_buffer
+from src.utils.events import event_hub
+from src.utils.tenancy import DEFAULT_TENANT
+
+def subscribe():
+    return event_hub.instance(DEFAULT_TENANT).subscribe(maxsize=100, max_clients=10)
+
+def published(subscriber):
+    events = []
+    while not subscriber.queue.empty():
+        _, event_type, data = subscriber.queue.get_nowait()
+        events.append((event_type, data))
+    return events
+
+def test_bulk_upsert_publishes_one_batch_event(client, auth_headers):
+    client.post('/api/machines/bulk', json=[{'id': 'M-1', 'name': 'Press'}], headers=auth_headers)
+    subscriber = subscribe()
+
+    response = client.post('/api/machines/bulk', json=[
+        {'id': 'M-1', 'status': 'warning'},
+        {'id': 'M-2', 'name': 'Lathe'},
+        {'id': 'M-3', 'name': 'Mill'}
+    ], headers=auth_headers)
+
+    assert response.status_code == 200
+    assert published(subscriber) == [('machine.batch', {'created': ['M-2', 'M-3'], 'updated': ['M-1']})]
+
+def test_generate_sample_publishes_created_machines(client, auth_headers):
+    subscriber = subscribe()
+
+    response = client.post('/api/machines/generate-sample', headers=auth_headers)
+
+    assert response.status_code == 201
+    assert published(subscriber) == [('machine.batch', {'created': response.get_json()['machines'], 'updated': []})]
+
+def test_telemetry_flush_publishes_flushed_machines(app, client, auth_headers):
+    client.post('/api/machines/bulk', json=[{'id': 'M-1', 'name': 'Press'}, {'id': 'M-2', 'name': 'Lathe'}], headers=auth_headers)
+    subscriber = subscribe()
+    buffer = telemetry_buffer.instance(DEFAULT_TENANT)
+    buffer.app, buffer.tenant = app, DEFAULT_TENANT
+
+    buffer.add([('M-1', {'temperature': 41.0}), ('M-2', {'vibration': 0.4}), ('M-1', {'efficiency': 80.0})])
+    assert buffer.flush() == 2
+
+    assert published(subscriber) == [('machine.batch', {'created': [], 'updated': ['M-1', 'M-2']})]
+
+def journal_entries(app, entity_id):
+    with app.app_context():
+        return db.session.scalars(db.select(ChangeLog).where(ChangeLog.entity_id == entity_id).order_by(ChangeLog.id)).all()
+
+def test_telemetry_flush_journals_flushed_machines(app, client, auth_headers):
+    client.post('/api/machines/bulk', json=[{'id': 'M-1', 'name': 'Press'}], headers=auth_headers)
+    buffer = telemetry_buffer.instance(DEFAULT_TENANT)
+    buffer.app, buffer.tenant = app, DEFAULT_TENANT
+
+    buffer.add([('M-1', {'temperature': 41.0}), ('UNKNOWN', {'temperature': 20.0})])
+    buffer.flush()
+
+    [entry] = journal_entries(app, 'M-1')[1:]
+    assert entry.action == 'updated'
+    assert entry.data['temperature'] == 41.0
+    assert journal_entries(app, 'UNKNOWN') == []
+
+def test_telemetry_is_journaled_at_most_once_per_window(app, client, auth_headers, monkeypatch):
+    client.post('/api/machines/bulk', json=[{'id': 'M-1', 'name': 'Press'}], headers=auth_headers)
+    app.config['TELEMETRY_JOURNAL_INTERVAL'] = 60
+    clock = [1000.0]
+    monkeypatch.setattr('src.routes.telemetry.time.monotonic', lambda: clock[0])
+    buffer = telemetry_buffer.instance(DEFAULT_TENANT)
+    buffer.app, buffer.tenant = app, DEFAULT_TENANT
+
+    for second, temperature in enumerate((40.0, 41.0, 42.0)):
+        clock[0] = 1000.0 + second
+        buffer.add([('M-1', {'temperature': temperature})])
+        buffer.flush()
+    assert [entry.data['temperature'] for entry in journal_entries(app, 'M-1')[1:]] == [40.0]
+
+    # The next flush after the window journals the latest values, even
+    # without new readings
+    clock[0] = 1060.0
+    buffer.flush()
+    buffer.flush()
+    assert [entry.data['temperature'] for entry in journal_entries(app, 'M-1')[1:]] == [40.0, 42.0]
+    assert buffer.metrics()['journaled'] == 2
@@ -0,0 +1,25 @@
+from benchmarks import load
+from benchmarks.explain import check_scenarios
+from src.models.activity import Activity
+from src.models.machine import Machine
+from src.models.user import db
+from tests.conftest import generate_fleet
+
+# Small enough to seed quickly; every table at or above MIN_ROWS counts as
+# large, so unindexed reads show up in the plan as they would at full size
+MACHINES = 300
+ACTIVITIES = 3000
+MIN_ROWS = 100
+
+def test_endpoint_queries_use_indexes(app):
+    # Full scans outside benchmarks.explain.FULL_SCAN_ALLOWED fail the test
+    generate_fleet(app, MACHINES, ACTIVITIES)
+    with app.app_context():
+        machine_ids = list(db.session.scalars(db.select(Machine.id)))
+        max_activity_id = db.session.scalar(db.select(db.func.max(Activity.id)))
+    client = load.FlaskClient(app, load.login(app=app))
+
+    failures = check_scenarios(app, client, load.READ_SCENARIOS, machine_ids, max_activity_id,
+                               min_rows=MIN_ROWS, log=lambda message: None)
+
+    assert [(name, table) for name, table, _ in failures] == []
@@ -0,0 +1,36 @@
+from src.routes import exports
+import csv
+import io
+import json
+
+def test_ndjson_export_streams_every_machine(client, auth_headers, monkeypatch):
+    # Batches smaller than the table, so the export spans several fetches
+    monkeypatch.setattr(exports, 'EXPORT_BATCH_SIZE', 3)
+    client.post('/api/machines/generate-sample', headers=auth_headers)
+    listed = client.get('/api/machines/', headers=auth_headers).get_json()
+
+    response = client.get('/api/exports/machines', headers=auth_headers)
+
+    assert response.status_code == 200
+    assert response.is_streamed
+    assert response.mimetype == 'application/x-ndjson'
+    assert response.headers['Content-Disposition'] == 'attachment; filename=machines.ndjson'
+    rows = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    assert len(rows) == len(listed) > 3
+    assert [row['id'] for row in rows] == sorted(machine['id'] for machine in listed)
+
+def test_csv_export_has_one_header_and_a_row_per_activity(client, auth_headers):
+    for description in ('Oil change', 'Belt swap, drive side'):
+        client.post('/api/activities/', json={'description': description, 'technician': 'Ben'}, headers=auth_headers)
+
+    response = client.get('/api/exports/activities?format=csv', headers=auth_headers)
+
+    assert response.status_code == 200
+    assert response.mimetype == 'text/csv'
+    rows = list(csv.DictReader(io.StringIO(response.get_data(as_text=True))))
+    assert [row['description'] for row in rows] == ['Oil change', 'Belt swap, drive side']
+
+def test_unknown_exports_and_formats_are_rejected(client, auth_headers):
+    assert client.get('/api/exports/users', headers=auth_headers).status_code == 404
+    assert client.get('/api/exports/machines?format=xml', headers=auth_headers).status_code == 400
+    assert client.get('/api/exports/machines').status_code == 401
@@ -0,0 +1,44 @@
+from src.models.machine import Machine
+from src.models.predictive_data import PredictiveData
+from src.models.user import db
+
+def test_deleting_a_scored_machine_deletes_its_predictive_data(app, client, auth_headers):
+    client.post('/api/machines/generate-sample', headers=auth_headers)
+    assert client.post('/api/analytics/generate-sample-data', headers=auth_headers).status_code == 201
+
+    response = client.delete('/api/machines/MACHINE-001', headers=auth_headers)
+
+    assert response.status_code == 200
+    with app.app_context():
+        assert db.session.get(Machine, 'MACHINE-001') is None
+        machine_ids = db.session.scalars(db.select(PredictiveData.machine_id).order_by(PredictiveData.machine_id)).all()
+    assert machine_ids == ['MACHINE-002', 'MACHINE-003', 'MACHINE-004']
+
+def test_bulk_upsert_reports_a_result_per_row(app, client, auth_headers):
+    client.post('/api/machines/bulk', json=[{'id': 'M-1', 'name': 'Press'}], headers=auth_headers)
+
+    response = client.post('/api/machines/bulk', json=[
+        {'id': 'M-1', 'status': 'warning'},
+        {'id': 'M-2', 'name': 'Lathe', 'temperature': '41.5'},
+        {'id': 'M-3'},
+        {'id': 'M-4', 'name': 5},
+        {'id': 'M-5', 'name': 'Mill', 'status': ['warning']},
+        {'id': 'M-6', 'name': 'Saw', 'last_maintenance': 20240115},
+        {'id': 'M-7', 'name': 'Drill', 'vibration': 'high'},
+        {'id': 7, 'name': 'Numeric'},
+        {'id': 'M-2', 'name': 'Duplicate'}
+    ], headers=auth_headers)
+
+    body = response.get_json()
+    assert response.status_code == 200
+    assert [result['result'] for result in body['results']] == [
+        'updated', 'created', 'error', 'error', 'error', 'error', 'error', 'error', 'error'
+    ]
+    assert (body['created'], body['updated'], body['errors']) == (1, 1, 7)
+    assert body['results'][3]['error'] == 'Name, status and last_maintenance must be strings'
+
+    with app.app_context():
+        assert db.session.get(Machine, 'M-1').status == 'warning'
+        assert db.session.get(Machine, 'M-1').name == 'Press'
+        assert db.session.get(Machine, 'M-2').temperature == 41.5
+        assert db.session.scalars(db.select(Machine.id).order_by(Machine.id)).all() == ['M-1', 'M-2']
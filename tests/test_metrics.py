@@ -0,0 +1,41 @@
+from tests.conftest import login
+import logging
+
+def sample(client, line):
+    # The value of one exposition line, 0 while it hasn't been recorded.
+    # The counters are per process, so tests compare before and after
+    for metric in client.get('/api/metrics').get_data(as_text=True).splitlines():
+        name, _, value = metric.rpartition(' ')
+        if name == line:
+            return float(value)
+    return 0
+
+def test_requests_are_counted_by_endpoint_and_status(client, auth_headers):
+    ok = 'maintai_http_requests_total{endpoint="machines.get_machines",method="GET",status="200"}'
+    unauthorized = 'maintai_http_requests_total{endpoint="machines.get_machines",method="GET",status="401"}'
+    statements = 'maintai_db_statements_total{endpoint="machines.get_machines"}'
+    latency = 'maintai_http_request_duration_seconds_count{endpoint="machines.get_machines"}'
+    before = {line: sample(client, line) for line in (ok, unauthorized, statements, latency)}
+
+    client.get('/api/machines/', headers=auth_headers)
+    client.get('/api/machines/', headers=auth_headers)
+    client.get('/api/machines/')
+
+    response = client.get('/api/metrics')
+    assert response.mimetype == 'text/plain'
+    assert sample(client, ok) - before[ok] == 2
+    assert sample(client, unauthorized) - before[unauthorized] == 1
+    assert sample(client, latency) - before[latency] == 3
+    assert sample(client, statements) > before[statements]
+
+def test_slow_requests_are_logged_with_their_statements(make_app, caplog):
+    app = make_app(SLOW_REQUEST_THRESHOLD_MS=0.001)
+    client = app.test_client()
+    headers = login(client)
+
+    with caplog.at_level(logging.WARNING, logger=app.logger.name):
+        client.get('/api/machines/', headers=headers)
+
+    message = next(record.getMessage() for record in caplog.records if 'GET /api/machines/' in record.getMessage())
+    assert message.startswith('Slow request GET /api/machines/ -> 200')
+    assert 'FROM machine' in message
@@ -0,0 +1,31 @@
+from tests.conftest import generate_fleet, login, recorded_statements
+import pytest
+
+FLEET_SIZES = (50, 500)
+
+def statements_per_request(make_app, machines, path):
+    app = make_app(f'fleet-{machines}')
+    generate_fleet(app, machines, machines * 4)
+    client = app.test_client()
+    headers = login(client)
+
+    # The first request may fill caches; the second shows the steady state
+    assert client.get(path, headers=headers).status_code == 200
+    with recorded_statements(app) as statements:
+        response = client.get(path, headers=headers)
+    assert response.status_code == 200
+    return statements
+
+@pytest.mark.parametrize('path', ['/api/analytics/predictive', '/api/analytics/dashboard-stats'])
+def test_query_count_does_not_grow_with_fleet(make_app, path):
+    small, large = (statements_per_request(make_app, machines, path) for machines in FLEET_SIZES)
+    assert len(small) == len(large), (small, large)
+
+def test_predictive_reads_machines_in_one_join(make_app):
+    statements = statements_per_request(make_app, FLEET_SIZES[0], '/api/analytics/predictive')
+    # The ETag version check, then machines joined with their predictive data
+    assert len(statements) == 2
+    assert 'JOIN predictive_data' in statements[1]
+
+def test_dashboard_stats_is_one_statement(make_app):
+    assert len(statements_per_request(make_app, FLEET_SIZES[0], '/api/analytics/dashboard-stats')) == 1
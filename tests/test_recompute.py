@@ -0,0 +1,19 @@
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from src.utils.recompute import is_stale
+
+MAX_AGE = timedelta(hours=1)
+
+def test_missing_score_is_stale():
+    assert is_stale(SimpleNamespace(updated_at=datetime.utcnow()), None, MAX_AGE)
+
+def test_score_older_than_machine_inputs_is_stale():
+    now = datetime.utcnow()
+    machine = SimpleNamespace(updated_at=now)
+    assert is_stale(machine, SimpleNamespace(updated_at=now - timedelta(minutes=1)), MAX_AGE)
+
+def test_score_older_than_max_age_is_stale():
+    now = datetime.utcnow()
+    machine = SimpleNamespace(updated_at=now - timedelta(days=30))
+    assert is_stale(machine, SimpleNamespace(updated_at=now - timedelta(hours=2)), MAX_AGE)
+    assert not is_stale(machine, SimpleNamespace(updated_at=now - timedelta(minutes=30)), MAX_AGE)
@@ -0,0 +1,50 @@
+from sqlalchemy import event
+from src.models.machine import Machine
+from src.models.user import db
+from src.utils import routing
+from tests.conftest import login
+import pytest
+
+@pytest.fixture
+def remove_routing_listeners():
+    yield
+    for identifier, listener in (('do_orm_execute', routing.route_reads), ('after_flush', routing.route_after_flush)):
+        if event.contains(db.session, identifier, listener):
+            event.remove(db.session, identifier, listener)
+
+def test_reads_go_to_the_replica_until_the_client_writes(make_app, remove_routing_listeners):
+    # The replica is a separate database holding a machine the primary lacks
+    replica_app = make_app('replica')
+    with replica_app.app_context():
+        db.session.add(Machine(id='R-1', name='Replica only'))
+        db.session.commit()
+    replica = replica_app.config['SQLALCHEMY_DATABASE_URI']
+    app = make_app(DATABASE_READ_URL=replica, SQLALCHEMY_BINDS={'replica': replica})
+    # Logging in is a POST, so it sets the read-your-writes cookie too
+    headers = login(app.test_client())
+    client = app.test_client()
+
+    assert [machine['id'] for machine in client.get('/api/machines/', headers=headers).get_json()] == ['R-1']
+
+    created = client.post('/api/machines/', json={'id': 'M-1', 'name': 'Press'}, headers=headers)
+    assert created.status_code == 201
+    assert routing.READ_PRIMARY_COOKIE in created.headers['Set-Cookie']
+    assert [machine['id'] for machine in client.get('/api/machines/', headers=headers).get_json()] == ['M-1']
+
+    # A client without the cookie still reads the replica
+    other = app.test_client()
+    assert [machine['id'] for machine in other.get('/api/machines/', headers=headers).get_json()] == ['R-1']
+
+def test_session_listeners_are_added_once_per_process(make_app, tmp_path, remove_routing_listeners):
+    replica = f"sqlite:///{tmp_path / 'maintai.db'}"
+    make_app(DATABASE_READ_URL=replica, SQLALCHEMY_BINDS={'replica': replica})
+    app = make_app(DATABASE_READ_URL=replica, SQLALCHEMY_BINDS={'replica': replica})
+
+    with app.app_context():
+        assert list(db.session().dispatch.do_orm_execute) == [routing.route_reads]
+        assert list(db.session().dispatch.after_flush) == [routing.route_after_flush]
+
+    # An app without a replica keeps reading from its only database
+    plain = make_app('plain')
+    client = plain.test_client()
+    assert client.get('/api/machines/', headers=login(client)).status_code == 200
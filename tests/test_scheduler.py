@@ -0,0 +1,48 @@
+from tests.conftest import login
+import pytest
+
+@pytest.fixture
+def schedule_client(make_app):
+    # One job per technician per day, and every request syncs the plan
+    app = make_app(SCHEDULER_TECHNICIAN_CAPACITY=1, SCHEDULER_SYNC_INTERVAL=0)
+    client = app.test_client()
+    headers = login(client)
+    for machine in ({'id': 'A', 'status': 'maintenance', 'efficiency': 90.0},
+                    {'id': 'B', 'status': 'warning', 'efficiency': 100.0},
+                    {'id': 'C', 'status': 'operational', 'efficiency': 50.0},
+                    {'id': 'D', 'status': 'operational', 'efficiency': 100.0}):
+        client.post('/api/machines/', json=dict(machine, name=f"Machine {machine['id']}"), headers=headers)
+    for machine_id, technician in (('C', 'Ana'), ('C', 'Ana'), ('B', 'Ben')):
+        client.post('/api/activities/', json={'description': 'Inspection', 'technician': technician, 'machine_id': machine_id}, headers=headers)
+    return client, headers
+
+def schedule(client, headers, query=''):
+    response = client.get(f'/api/analytics/maintenance-schedule{query}', headers=headers)
+    assert response.status_code == 200
+    return response.get_json()
+
+def test_jobs_are_ranked_by_priority_and_planned_per_technician(schedule_client):
+    client, headers = schedule_client
+
+    first = schedule(client, headers, '?limit=3')
+    rest = schedule(client, headers, f"?offset={first['next_offset']}&limit=3")
+
+    jobs = first['schedule'] + rest['schedule']
+    assert (first['total'], first['next_offset'], rest['next_offset']) == (4, 3, None)
+    assert [(job['machineId'], job['rank'], job['urgency']) for job in jobs] == [
+        ('A', 1, 'high'), ('B', 2, 'medium'), ('C', 3, 'medium'), ('D', 4, 'low')
+    ]
+    # Two technicians with one slot each: two jobs a day, and each machine
+    # goes to the technician who has worked on it, when they are free
+    assert [(job['scheduledDay'], job['technician']) for job in jobs] == [(0, 'Ana'), (0, 'Ben'), (1, 'Ana'), (1, 'Ben')]
+
+def test_changed_machines_are_re_ranked(schedule_client):
+    client, headers = schedule_client
+    before = client.get('/api/analytics/maintenance-schedule', headers=headers)
+    assert client.get('/api/analytics/maintenance-schedule', headers=dict(headers, **{'If-None-Match': before.headers['ETag']})).status_code == 304
+
+    client.put('/api/machines/D', json={'status': 'maintenance', 'efficiency': 40.0}, headers=headers)
+
+    after = client.get('/api/analytics/maintenance-schedule', headers=dict(headers, **{'If-None-Match': before.headers['ETag']}))
+    assert after.status_code == 200
+    assert [job['machineId'] for job in after.get_json()['schedule']] == ['D', 'A', 'B', 'C']
@@ -0,0 +1,21 @@
+from src.main import init_db
+from src.models.user import db
+from sqlalchemy import inspect
+
+def test_init_db_adds_columns_missing_from_existing_tables(app):
+    with app.app_context():
+        db.session.execute(db.text(
+            "INSERT INTO activity (description, technician, status, timestamp) "
+            "VALUES ('Belt check', 'Ana', 'completed', '2025-01-01 00:00:00')"
+        ))
+        db.session.commit()
+        for column in ('labor_cost', 'parts_cost'):
+            db.session.execute(db.text(f'ALTER TABLE activity DROP COLUMN {column}'))
+        db.session.commit()
+
+        init_db()
+        init_db()
+
+        columns = {column['name'] for column in inspect(db.session.connection()).get_columns('activity')}
+        assert {'labor_cost', 'parts_cost'} <= columns
+        assert db.session.execute(db.text('SELECT labor_cost, parts_cost FROM activity')).one() == (0.0, 0.0)
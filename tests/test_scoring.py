@@ -0,0 +1,26 @@
+from src.models.predictive_data import PredictiveData
+from src.models.user import db
+from src.utils.scoring import LogisticRiskModel, ScoringModel, score_machines
+import pytest
+
+def test_machines_with_null_readings_are_scored_with_the_column_defaults(app, client, auth_headers):
+    client.post('/api/machines/bulk', json=[
+        {'id': 'M-1', 'name': 'Press', 'temperature': 25.0, 'vibration': 0.5, 'efficiency': 100.0},
+        {'id': 'M-2', 'name': 'Lathe', 'temperature': 25.0, 'vibration': 0.5, 'efficiency': 100.0}
+    ], headers=auth_headers)
+    assert client.put('/api/machines/M-2', json={'temperature': None}, headers=auth_headers).status_code == 200
+
+    with app.app_context():
+        assert score_machines() == 2
+        scores = {row.machine_id: row for row in db.session.scalars(db.select(PredictiveData))}
+
+    for column in ('failure_probability', 'recommended_maintenance', 'cost_savings'):
+        assert getattr(scores['M-2'], column) == getattr(scores['M-1'], column)
+    assert 1 <= scores['M-2'].recommended_maintenance <= LogisticRiskModel.max_interval
+
+def test_scoring_models_must_implement_score():
+    class Unfinished(ScoringModel):
+        version = 'unfinished'
+
+    with pytest.raises(TypeError):
+        Unfinished()
@@ -0,0 +1,54 @@
+from src.routes import activities
+import pytest
+
+@pytest.fixture
+def logged(client, auth_headers):
+    # Activity ids 1-4, in this order
+    for description, technician, status in (
+        ('Replaced hydraulic pump seal', 'Ana', 'completed'),
+        ('Lubricated conveyor bearings', 'Ben', 'pending'),
+        ('Hydraulic hose inspection', 'Cara', 'pending'),
+        ('Pump alignment after hydraulic pump swap', 'Ben', 'completed')
+    ):
+        client.post('/api/activities/', json={'description': description, 'technician': technician, 'status': status}, headers=auth_headers)
+
+def search(client, headers, query):
+    response = client.get(f'/api/activities/search?{query}', headers=headers)
+    assert response.status_code == 200, response.get_json()
+    return response.get_json()
+
+def ids(result):
+    return [activity['id'] for activity in result['activities']]
+
+def test_every_term_must_match_and_the_last_is_a_prefix(client, auth_headers, logged):
+    assert sorted(ids(search(client, auth_headers, 'q=hydraul'))) == [1, 3, 4]
+    assert sorted(ids(search(client, auth_headers, 'q=hydraulic+pump'))) == [1, 4]
+    # Stemmed, and technicians are indexed too
+    assert ids(search(client, auth_headers, 'q=bearing')) == [2]
+    assert sorted(ids(search(client, auth_headers, 'q=ben'))) == [2, 4]
+    # Query syntax in the input is searched for as words
+    assert sorted(ids(search(client, auth_headers, 'q=pump%22+OR+*'))) == []
+
+def test_results_are_ranked_filtered_and_paged(client, auth_headers, logged, monkeypatch):
+    # The activity mentioning the pump twice ranks first
+    ranked = search(client, auth_headers, 'q=pump&limit=1')
+    assert (ids(ranked), ranked['total'], ranked['next_offset']) == ([4], 2, 1)
+    assert ids(search(client, auth_headers, 'q=pump&limit=1&offset=1')) == [1]
+
+    filtered = search(client, auth_headers, 'q=hydraulic&status=pending')
+    assert (ids(filtered), filtered['total']) == ([3], 1)
+
+    # Past MAX_RANKED_MATCHES the newest come first instead
+    monkeypatch.setattr(activities, 'MAX_RANKED_MATCHES', 1)
+    assert ids(search(client, auth_headers, 'q=hydraulic')) == [4, 3, 1]
+
+def test_index_follows_updates_and_deletes(client, auth_headers, logged):
+    client.put('/api/activities/3', json={'description': 'Coolant hose inspection'}, headers=auth_headers)
+    client.delete('/api/activities/1', headers=auth_headers)
+
+    assert ids(search(client, auth_headers, 'q=hydraulic')) == [4]
+    assert ids(search(client, auth_headers, 'q=coolant')) == [3]
+
+def test_a_query_without_words_is_rejected(client, auth_headers):
+    assert client.get('/api/activities/search?q=%2A%22', headers=auth_headers).status_code == 400
+    assert client.get('/api/activities/search', headers=auth_headers).status_code == 400
@@ -0,0 +1,52 @@
+from src.utils import serialization
+import gzip
+import json
+import pytest
+
+@pytest.fixture
+def app(make_app):
+    # The sample fleet's machine list is a little under the default threshold
+    return make_app(COMPRESSION_MIN_SIZE=256)
+
+@pytest.fixture
+def machines(client, auth_headers):
+    client.post('/api/machines/generate-sample', headers=auth_headers)
+    return client.get('/api/machines/', headers=dict(auth_headers, **{'Accept-Encoding': 'identity'})).get_json()
+
+def test_fields_selects_columns_in_the_requested_order(client, auth_headers, machines):
+    response = client.get('/api/machines/?fields=status,id', headers=auth_headers)
+
+    assert response.status_code == 200
+    assert response.get_json() == [{'status': machine['status'], 'id': machine['id']} for machine in machines]
+    assert list(response.get_json()[0]) == ['status', 'id']
+
+    unknown = client.get('/api/machines/?fields=id,serial', headers=auth_headers)
+    assert unknown.status_code == 400
+    assert 'serial' in unknown.get_json()['error']
+
+def test_large_bodies_are_gzipped_when_accepted(client, auth_headers, machines, monkeypatch):
+    monkeypatch.setattr(serialization, 'brotli', None)
+
+    response = client.get('/api/machines/', headers=dict(auth_headers, **{'Accept-Encoding': 'br, gzip'}))
+
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert 'Accept-Encoding' in response.headers['Vary']
+    assert json.loads(gzip.decompress(response.data)) == machines
+
+def test_brotli_is_preferred_when_installed(client, auth_headers, machines):
+    brotli = pytest.importorskip('brotli')
+
+    response = client.get('/api/machines/', headers=dict(auth_headers, **{'Accept-Encoding': 'gzip, br'}))
+
+    assert response.headers['Content-Encoding'] == 'br'
+    assert json.loads(brotli.decompress(response.data)) == machines
+
+def test_small_or_unaccepted_bodies_are_sent_uncompressed(client, auth_headers, machines):
+    # An empty page is below COMPRESSION_MIN_SIZE
+    small = client.get('/api/activities/', headers=dict(auth_headers, **{'Accept-Encoding': 'gzip'}))
+    plain = client.get('/api/machines/', headers=dict(auth_headers, **{'Accept-Encoding': 'identity'}))
+
+    assert 'Content-Encoding' not in small.headers
+    assert small.get_json()['activities'] == []
+    assert 'Content-Encoding' not in plain.headers
+    assert plain.get_json() == machines
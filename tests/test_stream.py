@@ -0,0 +1,47 @@
+from datetime import timedelta
+from flask_jwt_extended import create_refresh_token
+from src.utils.events import event_hub
+from src.utils.tenancy import DEFAULT_TENANT, TENANT_CLAIM
+
+def stream_token(client, headers):
+    response = client.post('/api/stream/token', headers=headers)
+    assert response.status_code == 201
+    return response.get_json()['token']
+
+def test_stream_requires_a_token(client, auth_headers):
+    assert client.get('/api/stream').status_code == 401
+    assert client.post('/api/stream/token').status_code == 401
+    assert client.get('/api/stream?jwt=not-a-token').status_code == 422
+
+def test_query_string_only_takes_stream_tokens(app, client, auth_headers):
+    session_token = auth_headers['Authorization'].split(' ', 1)[1]
+    response = client.get(f'/api/stream?jwt={session_token}')
+    assert response.status_code == 401
+    assert 'stream tokens' in response.get_json()['error']
+
+    with app.test_request_context():
+        expired = create_refresh_token(identity='1', expires_delta=timedelta(seconds=-1),
+                                       additional_claims={TENANT_CLAIM: DEFAULT_TENANT, 'scope': 'stream'})
+    assert client.get(f'/api/stream?jwt={expired}').status_code == 401
+
+def test_stream_tokens_are_rejected_everywhere_else(client, auth_headers):
+    token = stream_token(client, auth_headers)
+
+    assert client.get('/api/machines/', headers={'Authorization': f'Bearer {token}'}).status_code == 422
+    assert client.get(f'/api/machines/?jwt={token}').status_code == 401
+
+def test_events_are_delivered_to_a_stream_token_client(client, auth_headers):
+    token = stream_token(client, auth_headers)
+    response = client.get(f'/api/stream?jwt={token}', buffered=False)
+    assert response.status_code == 200
+    assert response.mimetype == 'text/event-stream'
+    chunks = response.iter_encoded()
+    assert next(chunks) == b'retry: 3000\n\n'
+
+    client.post('/api/machines/', json={'id': 'M-1', 'name': 'Press'}, headers=auth_headers)
+
+    event = next(chunks).decode()
+    assert event.startswith('id: 1\nevent: machine.created\ndata: ')
+    assert '"id": "M-1"' in event
+    response.close()
+    assert event_hub.instance(DEFAULT_TENANT).metrics()['clients'] == 0
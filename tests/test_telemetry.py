@@ -0,0 +1,17 @@
+import pytest
+
+@pytest.mark.parametrize('machine_id', [['M-1'], {'id': 'M-1'}, 7, ''])
+def test_readings_need_a_string_machine_id(client, auth_headers, machine_id):
+    response = client.post('/api/telemetry/', json=[{'machine_id': machine_id, 'temperature': 40.0}], headers=auth_headers)
+
+    assert response.status_code == 400
+    assert 'machine_id' in response.get_json()['error']
+
+def test_valid_readings_are_accepted(client, auth_headers):
+    response = client.post('/api/telemetry/', json=[
+        {'machine_id': 'M-1', 'temperature': 40.0},
+        {'machine_id': 'M-1', 'vibration': 0.7}
+    ], headers=auth_headers)
+
+    assert response.status_code == 202
+    assert response.get_json() == {'accepted': 2, 'buffer_depth': 1}
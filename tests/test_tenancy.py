@@ -0,0 +1,31 @@
+from src.main import init_db
+from src.utils.tenancy import tenant_context
+from tests.conftest import login
+import pytest
+
+@pytest.fixture
+def tenant_app(make_app, tmp_path):
+    # The default tenant plus 'acme' on its own SQLite file, both freshly
+    # initialized, so their tables hold identical rows
+    app = make_app(TENANT_DATABASES={'acme': f"sqlite:///{tmp_path / 'acme.db'}"})
+    with tenant_context('acme'), app.app_context():
+        init_db()
+    return app
+
+def test_user_endpoints_require_a_token(client):
+    assert client.get('/api/users/users').status_code == 401
+    assert client.get('/api/users/users/1').status_code == 401
+    assert client.post('/api/users/users', json={'username': 'eve', 'email': 'eve@example.com'}).status_code == 401
+    assert client.get('/api/users/users', headers=login(client)).status_code == 200
+
+def test_etags_differ_between_tenants_with_identical_data(tenant_app):
+    client = tenant_app.test_client()
+    default_headers = login(client)
+    response = client.post('/api/auth/login', json={'username': 'admin', 'password': 'password'}, headers={'X-Tenant': 'acme'})
+    acme_headers = {'Authorization': f"Bearer {response.get_json()['access_token']}"}
+
+    default_tag = client.get('/api/machines/', headers=default_headers).headers['ETag']
+    acme = client.get('/api/machines/', headers=dict(acme_headers, **{'If-None-Match': default_tag}))
+
+    assert acme.status_code == 200
+    assert acme.headers['ETag'] != default_tag
@@ -0,0 +1,53 @@
+from src.models.machine import Machine
+from src.models.monthly_cost import MonthlyCost
+from src.models.predictive_data import PredictiveData
+from src.models.user import db
+from src.routes import machines
+from src.utils import ledger, scoring
+import pytest
+
+@pytest.fixture(params=['on_conflict', 'fallback'])
+def upsert_mode(request, monkeypatch):
+    # Every caller of upsert() also runs with it returning None, as it does
+    # on dialects without ON CONFLICT
+    if request.param == 'fallback':
+        for module in (machines, ledger, scoring):
+            monkeypatch.setattr(module, 'upsert', lambda *args, **kwargs: None)
+    return request.param
+
+def test_bulk_upsert_creates_then_updates(app, client, auth_headers, upsert_mode):
+    client.post('/api/machines/bulk', json=[{'id': 'M-1', 'name': 'Press', 'efficiency': 90}], headers=auth_headers)
+    with app.app_context():
+        created_at = db.session.get(Machine, 'M-1').created_at
+
+    response = client.post('/api/machines/bulk', json=[
+        {'id': 'M-1', 'temperature': 60},
+        {'id': 'M-2', 'name': 'Lathe'}
+    ], headers=auth_headers)
+
+    assert [result['result'] for result in response.get_json()['results']] == ['updated', 'created']
+    with app.app_context():
+        machine = db.session.get(Machine, 'M-1')
+        assert (machine.name, machine.efficiency, machine.temperature, machine.created_at) == ('Press', 90.0, 60.0, created_at)
+        assert db.session.get(Machine, 'M-2').efficiency == 100.0
+
+def test_monthly_totals_sum_into_one_row(app, client, auth_headers, upsert_mode):
+    client.post('/api/machines/', json={'id': 'M-1', 'name': 'Press'}, headers=auth_headers)
+    for labor_cost in (100, 250):
+        client.post('/api/activities/', json={
+            'description': 'Bearing swap', 'technician': 'Ana', 'machine_id': 'M-1', 'status': 'completed', 'labor_cost': labor_cost
+        }, headers=auth_headers)
+
+    with app.app_context():
+        rows = db.session.execute(db.select(MonthlyCost.machine_id, MonthlyCost.labor_cost, MonthlyCost.activity_count)
+                                  .order_by(MonthlyCost.machine_id)).all()
+    assert [tuple(row) for row in rows] == [('*', 350.0, 2), ('M-1', 350.0, 2)]
+
+def test_rescoring_keeps_one_row_per_machine(app, client, auth_headers, upsert_mode):
+    client.post('/api/machines/generate-sample', headers=auth_headers)
+    for _ in range(2):
+        assert client.post('/api/analytics/recompute', headers=auth_headers).status_code == 200
+
+    with app.app_context():
+        machine_ids = db.session.scalars(db.select(PredictiveData.machine_id).order_by(PredictiveData.machine_id)).all()
+        assert machine_ids == db.session.scalars(db.select(Machine.id).order_by(Machine.id)).all()
@@ -0,0 +1,21 @@
+from src.models.user import db
+
+def upsert(model, index_elements, update_columns, summed_columns=()):
+    # INSERT ... ON CONFLICT (index_elements) DO UPDATE for the session's
+    # database, or None where the dialect has no upsert and callers fall
+    # back to separate UPDATEs and INSERTs. update_columns take the new
+    # row's value; summed_columns add it to the stored one
+    dialect_name = db.session.get_bind().dialect.name
+    # Dialect modules are imported on first use; the PostgreSQL one is
+    # noticeable at startup and only one of them is ever needed
+    if dialect_name == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert
+    elif dialect_name == 'sqlite':
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        return None
+    statement = insert(model)
+    table = model.__table__
+    set_ = {column: statement.excluded[column] for column in update_columns}
+    set_.update({column: table.c[column] + statement.excluded[column] for column in summed_columns})
+    return statement.on_conflict_do_update(index_elements=index_elements, set_=set_)
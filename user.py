@@ -1,14 +1,18 @@
 from flask import Blueprint, jsonify, request
+from flask_jwt_extended import jwt_required
 from src.models.user import User, db
+from src.utils.identity import identity_cache
 
 user_bp = Blueprint('user', __name__)
 
 @user_bp.route('/users', methods=['GET'])
+@jwt_required()
 def get_users():
     users = User.query.all()
     return jsonify([user.to_dict() for user in users])
 
 @user_bp.route('/users', methods=['POST'])
+@jwt_required()
 def create_user():
     
     data = request.json
@@ -18,22 +22,27 @@ def create_user():
     return jsonify(user.to_dict()), 201
 
 @user_bp.route('/users/<int:user_id>', methods=['GET'])
+@jwt_required()
 def get_user(user_id):
     user = User.query.get_or_404(user_id)
     return jsonify(user.to_dict())
 
 @user_bp.route('/users/<int:user_id>', methods=['PUT'])
+@jwt_required()
 def update_user(user_id):
     user = User.query.get_or_404(user_id)
     data = request.json
     user.username = data.get('username', user.username)
     user.email = data.get('email', user.email)
     db.session.commit()
+    identity_cache.invalidate(user_id)
     return jsonify(user.to_dict())
 
 @user_bp.route('/users/<int:user_id>', methods=['DELETE'])
+@jwt_required()
 def delete_user(user_id):
     user = User.query.get_or_404(user_id)
     db.session.delete(user)
     db.session.commit()
+    identity_cache.invalidate(user_id)
     return '', 204